@@ -1,7 +1,13 @@
 import { NextRequest, NextResponse } from 'next/server'
 import { timingSafeEqual } from 'crypto'
 import { verifyAuth } from '@/lib/api-auth'
-import { archiveWikiAdmin, getWikiBySlugAdmin, setPinnedAdmin, upsertWikiAdmin } from '@/lib/firestore/wikis-admin'
+import {
+  archiveWikiAdmin,
+  getWikiBySlugAdmin,
+  setPinnedAdmin,
+  upsertWikiAdmin,
+  WikiConflictError,
+} from '@/lib/firestore/wikis-admin'
 import { validateSlug } from '@/lib/wikis/slugify'
 import { WIKI_SURFACES, type WikiSurface } from '@/lib/types/wiki'
 
@@ -37,6 +43,18 @@ function joinSlug(slugParts: string[]): string {
   return slugParts.map(decodeURIComponent).join('/')
 }
 
+// A wiki's version is its updatedAt: sent as the ETag, and accepted back in
+// If-Match so concurrent writers get a 412 instead of overwriting each other.
+function etag(updatedAt: string): string {
+  return `"${updatedAt}"`
+}
+
+function ifMatch(req: NextRequest): string | undefined {
+  const header = req.headers.get('if-match')
+  if (!header) return undefined
+  return header.trim().replace(/^W\//, '').replace(/^"(.*)"$/, '$1')
+}
+
 export async function GET(req: NextRequest, ctx: { params: Promise<{ slug: string[] }> }) {
   const auth = await resolveUid(req)
   if (auth instanceof NextResponse) return auth
@@ -48,7 +66,7 @@ export async function GET(req: NextRequest, ctx: { params: Promise<{ slug: strin
 
   const wiki = await getWikiBySlugAdmin(auth.uid, slug)
   if (!wiki) return NextResponse.json({ error: 'wiki not found' }, { status: 404 })
-  return NextResponse.json({ wiki })
+  return NextResponse.json({ wiki }, { headers: { ETag: etag(wiki.updatedAt) } })
 }
 
 export async function PUT(req: NextRequest, ctx: { params: Promise<{ slug: string[] }> }) {
@@ -83,17 +101,26 @@ export async function PUT(req: NextRequest, ctx: { params: Promise<{ slug: strin
   if (title.length > 256) return NextResponse.json({ error: 'title exceeds 256 chars' }, { status: 400 })
   if (contentMd.length > 200_000) return NextResponse.json({ error: 'contentMd exceeds 200KB' }, { status: 400 })
 
-  const wiki = await upsertWikiAdmin(auth.uid, {
-    slug,
-    title,
-    contentMd,
-    surface,
-    updatedBy,
-    agentVersion,
-    pinned,
-  })
+  let wiki
+  try {
+    wiki = await upsertWikiAdmin(auth.uid, {
+      slug,
+      title,
+      contentMd,
+      surface,
+      updatedBy,
+      agentVersion,
+      pinned,
+      ifUpdatedAt: ifMatch(req),
+    })
+  } catch (err) {
+    if (err instanceof WikiConflictError) {
+      return NextResponse.json({ error: err.message, wiki: err.current }, { status: 412 })
+    }
+    throw err
+  }
 
-  return NextResponse.json({ wiki })
+  return NextResponse.json({ wiki }, { headers: { ETag: etag(wiki.updatedAt) } })
 }
 
 export async function PATCH(req: NextRequest, ctx: { params: Promise<{ slug: string[] }> }) {
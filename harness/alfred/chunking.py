@@ -0,0 +1,97 @@
+"""Token-aware, content-defined chunking for long transcripts.
+
+Text is split into units (speaker turns / lines, long ones further into
+sentences) and units are packed into chunks of at least half
+`target_tokens` and at most `max_tokens` including overlap. Where a chunk
+ends is decided by the content of the unit itself (a hash), not by its
+offset, so an edit or an appended section only changes the chunks it touches — the rest hash the same and
+their per-chunk model results come straight from the response cache.
+
+Each chunk is prefixed with the last `overlap_tokens` worth of units from the
+previous chunk, so an action item stated across a boundary is seen whole.
+
+Token counts use the same ~4 chars/token estimate as the router's budget
+planning; chunks are sized for the local model's context, with headroom.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+
+CHARS_PER_TOKEN = 4
+BOUNDARY_EVERY = 8  # on average, one unit in this many may end a chunk once it's past min_tokens
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+def count_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+@dataclass(frozen=True)
+class TextChunk:
+    index: int
+    text: str       # overlap context followed by this chunk's own units
+    overlap: int    # leading characters of `text` repeated from the previous chunk
+
+    @property
+    def tokens(self) -> int:
+        return count_tokens(self.text)
+
+
+def split_units(text: str, max_tokens: int) -> list[str]:
+    """Lines, with any line over max_tokens split at sentence ends, then hard-wrapped."""
+    units = []
+    limit = max_tokens * CHARS_PER_TOKEN
+    for line in filter(None, (line.strip() for line in text.splitlines())):
+        if len(line) <= limit:
+            units.append(line)
+            continue
+        for sentence in _SENTENCE.split(line):
+            units.extend(sentence[i:i + limit] for i in range(0, len(sentence), limit))
+    return units
+
+
+def _is_boundary(unit: str) -> bool:
+    digest = hashlib.blake2b(unit.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % BOUNDARY_EVERY == 0
+
+
+def chunk_text(text: str, *, target_tokens: int = 1000, max_tokens: int = 1500,
+               overlap_tokens: int = 150) -> list[TextChunk]:
+    if overlap_tokens >= max_tokens:
+        raise ValueError("overlap_tokens must be smaller than max_tokens")
+    body_max = max_tokens - overlap_tokens
+    min_tokens = max(1, target_tokens // 2)
+    groups: list[list[str]] = []
+    current: list[str] = []
+    size = 0
+    for unit in split_units(text, body_max):
+        tokens = count_tokens(unit) + 1  # + newline
+        if current and size + tokens > body_max:
+            groups.append(current)
+            current, size = [], 0
+        current.append(unit)
+        size += tokens
+        if size >= min_tokens and _is_boundary(unit):
+            groups.append(current)
+            current, size = [], 0
+    if current:
+        groups.append(current)
+
+    chunks = []
+    previous: list[str] = []
+    for index, units in enumerate(groups):
+        context: list[str] = []
+        budget = overlap_tokens
+        for unit in reversed(previous):
+            budget -= count_tokens(unit) + 1
+            if budget < 0:
+                break
+            context.insert(0, unit)
+        prefix = "".join(f"{unit}\n" for unit in context)
+        chunks.append(TextChunk(index, prefix + "\n".join(units), len(prefix)))
+        previous = units
+    return chunks
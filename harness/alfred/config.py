@@ -1,7 +1,7 @@
 """Env config + model routing thresholds. Single source of truth so the rest
 of the harness doesn't read os.environ directly.
 
-Phase 4 scaffold. Expected env vars when this gets wired up:
+Env vars:
 - ANTHROPIC_API_KEY          Claude API access
 - INBOX_SHARED_SECRET        auth to Website's /api/inbox + /api/wikis
 - INBOX_URL                  default https://www.loricorpuz.com/api/inbox
@@ -11,6 +11,179 @@ Phase 4 scaffold. Expected env vars when this gets wired up:
 - AB_SUPABASE_URL            AlamoBernal Supabase
 - AB_SUPABASE_SERVICE_KEY    AlamoBernal service role
 - FIREBASE_ADMIN_CREDENTIALS path to Website Firebase service account JSON
+- FIREBASE_UID               Website user whose inbox_messages Alfred consumes
 - OLLAMA_BASE_URL            default http://localhost:11434
+- WAVE_API_TOKEN             Wave API (transcripts)
+- POLYGON_API_KEY            Polygon.io market data (memos)
 - LOG_LEVEL                  default INFO
+
+Runner tuning (all optional):
+- ALFRED_POLL_MIN_SECONDS    poll interval while items are arriving (default 2)
+- ALFRED_POLL_MAX_SECONDS    ceiling for idle backoff (default 120)
+- ALFRED_POLL_BATCH          max items claimed per poll (default 10)
+- ALFRED_LANE_BACKLOG        max claimed-but-unfinished items per workflow (default 20)
+- ALFRED_SHUTDOWN_GRACE      seconds in-flight work gets to finish on shutdown (default 60)
+- ALFRED_CONCURRENCY         per-workflow overrides, e.g. "memo=1,todo_extract=8"
+- ALFRED_PUSH                "1" to subscribe to queue changes (Firestore listeners,
+                             Supabase realtime) instead of relying on polling alone
+- ALFRED_RECONCILE_SECONDS   with push on, idle poll ceiling — polling only
+                             reconciles what push missed (default 300)
+
+Ollama scheduler (alfred.models.ollama):
+- ALFRED_OLLAMA_MAX_IN_FLIGHT   concurrent requests to the daemon; match its
+                                OLLAMA_NUM_PARALLEL (default 2)
+- ALFRED_OLLAMA_BATCH_WINDOW_MS how long embed calls wait to share a batch (default 10)
+- ALFRED_OLLAMA_READ_TIMEOUT    seconds to wait on the daemon between bytes of a
+                                reply; CPU generation is slow (default 600, 0 = no limit)
+
+Supabase queues (alfred.tools.supabase):
+- ALFRED_SUPABASE_WRITE_WINDOW_MS how long status writes wait to share a request (default 50)
+
+Wiki writes (alfred.tools.wikis):
+- ALFRED_WIKI_WRITE_WINDOW_MS how long updates to one page wait to share a PUT (default 250)
+
+Model routing (alfred.models.routing):
+- ALFRED_LATENCY_USD_PER_SECOND what a second of added latency is worth when
+                                deciding to skip the local tier (default 0.002)
+- ALFRED_ROUTING_MIN_SAMPLES    local attempts per workflow before learned
+                                decisions replace the static matrix (default 20)
+- ALFRED_ROUTING_WINDOW         recent invocations per workflow/tier kept (default 100)
+- ALFRED_ROUTING_PROBE_EVERY    while skipping the local tier, every Nth item
+                                still tries it so the decision can reverse (default 20)
+
+Response cache (alfred.models.cache):
+- ALFRED_CACHE_PATH          SQLite file (default harness/.alfred_cache.sqlite)
+- ALFRED_CACHE_MAX_MB        size before LRU eviction (default 256)
+- ALFRED_SEMANTIC_THRESHOLD  cosine similarity for near-duplicate hits (default 0.97)
+- ALFRED_EMBED_MODEL         Ollama embedding model (default nomic-embed-text)
+
+Work journal (alfred.journal):
+- ALFRED_JOURNAL_PATH        SQLite file (default harness/.alfred_journal.sqlite)
+- ALFRED_JOURNAL_RETENTION_DAYS  days a completed, recorded item is kept for
+                             duplicate-delivery checks before pruning (default 30)
+
+Vector index (alfred.vectors):
+- ALFRED_VECTOR_PATH         index directory (default harness/.alfred_vectors)
+- ALFRED_VECTOR_NPROBE       IVF lists scanned per query (default 8)
 """
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Mapping
+
+_HARNESS_DIR = Path(__file__).resolve().parent.parent
+
+
+def _parse_concurrency(spec: str) -> dict[str, int]:
+    """'memo=1,todo_extract=8' → {'memo': 1, 'todo_extract': 8}."""
+    out = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition("=")
+        if not value:
+            raise ValueError(f"ALFRED_CONCURRENCY entry {part!r} must be name=N")
+        out[name.strip()] = int(value)
+    return out
+
+
+@dataclass(frozen=True)
+class Config:
+    anthropic_api_key: str | None = None
+    inbox_shared_secret: str | None = None
+    inbox_url: str = "https://www.loricorpuz.com/api/inbox"
+    wikis_api_base: str = "https://www.loricorpuz.com/api/wikis"
+    supabase_url: str | None = None
+    supabase_service_key: str | None = None
+    ab_supabase_url: str | None = None
+    ab_supabase_service_key: str | None = None
+    firebase_admin_credentials: str | None = None
+    firebase_uid: str | None = None
+    ollama_base_url: str = "http://localhost:11434"
+    wave_api_token: str | None = None
+    polygon_api_key: str | None = None
+    log_level: str = "INFO"
+
+    poll_min_seconds: float = 2.0
+    poll_max_seconds: float = 120.0
+    poll_batch: int = 10
+    lane_backlog: int = 20
+    shutdown_grace_seconds: float = 60.0
+    concurrency: Mapping[str, int] = field(default_factory=dict)
+    push: bool = False
+    reconcile_seconds: float = 300.0
+
+    ollama_max_in_flight: int = 2
+    ollama_batch_window_ms: float = 10.0
+    ollama_read_timeout: float = 600.0
+
+    supabase_write_window_ms: float = 50.0
+
+    wiki_write_window_ms: float = 250.0
+
+    latency_usd_per_second: float = 0.002
+    routing_min_samples: int = 20
+    routing_window: int = 100
+    routing_probe_every: int = 20
+
+    cache_path: str = str(_HARNESS_DIR / ".alfred_cache.sqlite")
+    cache_max_mb: int = 256
+    semantic_threshold: float = 0.97
+    embed_model: str = "nomic-embed-text"
+
+    journal_path: str = str(_HARNESS_DIR / ".alfred_journal.sqlite")
+    journal_retention_days: float = 30
+
+    vector_path: str = str(_HARNESS_DIR / ".alfred_vectors")
+    vector_nprobe: int = 8
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str] = os.environ) -> "Config":
+        defaults = cls()
+
+        def get(name: str, default=None):
+            value = env.get(name)
+            return value if value not in (None, "") else default
+
+        return cls(
+            anthropic_api_key=get("ANTHROPIC_API_KEY"),
+            inbox_shared_secret=get("INBOX_SHARED_SECRET"),
+            inbox_url=get("INBOX_URL", defaults.inbox_url),
+            wikis_api_base=get("WIKIS_API_BASE", defaults.wikis_api_base),
+            supabase_url=get("SUPABASE_URL"),
+            supabase_service_key=get("SUPABASE_SERVICE_KEY"),
+            ab_supabase_url=get("AB_SUPABASE_URL"),
+            ab_supabase_service_key=get("AB_SUPABASE_SERVICE_KEY"),
+            firebase_admin_credentials=get("FIREBASE_ADMIN_CREDENTIALS"),
+            firebase_uid=get("FIREBASE_UID"),
+            ollama_base_url=get("OLLAMA_BASE_URL", defaults.ollama_base_url),
+            wave_api_token=get("WAVE_API_TOKEN"),
+            polygon_api_key=get("POLYGON_API_KEY"),
+            log_level=get("LOG_LEVEL", defaults.log_level),
+            poll_min_seconds=float(get("ALFRED_POLL_MIN_SECONDS", defaults.poll_min_seconds)),
+            poll_max_seconds=float(get("ALFRED_POLL_MAX_SECONDS", defaults.poll_max_seconds)),
+            poll_batch=int(get("ALFRED_POLL_BATCH", defaults.poll_batch)),
+            lane_backlog=int(get("ALFRED_LANE_BACKLOG", defaults.lane_backlog)),
+            shutdown_grace_seconds=float(get("ALFRED_SHUTDOWN_GRACE", defaults.shutdown_grace_seconds)),
+            concurrency=_parse_concurrency(get("ALFRED_CONCURRENCY", "")),
+            push=get("ALFRED_PUSH", "0").lower() in ("1", "true", "yes"),
+            reconcile_seconds=float(get("ALFRED_RECONCILE_SECONDS", defaults.reconcile_seconds)),
+            ollama_max_in_flight=int(get("ALFRED_OLLAMA_MAX_IN_FLIGHT", defaults.ollama_max_in_flight)),
+            ollama_batch_window_ms=float(get("ALFRED_OLLAMA_BATCH_WINDOW_MS", defaults.ollama_batch_window_ms)),
+            ollama_read_timeout=float(get("ALFRED_OLLAMA_READ_TIMEOUT", defaults.ollama_read_timeout)),
+            supabase_write_window_ms=float(get("ALFRED_SUPABASE_WRITE_WINDOW_MS", defaults.supabase_write_window_ms)),
+            wiki_write_window_ms=float(get("ALFRED_WIKI_WRITE_WINDOW_MS", defaults.wiki_write_window_ms)),
+            latency_usd_per_second=float(get("ALFRED_LATENCY_USD_PER_SECOND", defaults.latency_usd_per_second)),
+            routing_min_samples=int(get("ALFRED_ROUTING_MIN_SAMPLES", defaults.routing_min_samples)),
+            routing_window=int(get("ALFRED_ROUTING_WINDOW", defaults.routing_window)),
+            routing_probe_every=int(get("ALFRED_ROUTING_PROBE_EVERY", defaults.routing_probe_every)),
+            cache_path=get("ALFRED_CACHE_PATH", defaults.cache_path),
+            cache_max_mb=int(get("ALFRED_CACHE_MAX_MB", defaults.cache_max_mb)),
+            semantic_threshold=float(get("ALFRED_SEMANTIC_THRESHOLD", defaults.semantic_threshold)),
+            embed_model=get("ALFRED_EMBED_MODEL", defaults.embed_model),
+            journal_path=get("ALFRED_JOURNAL_PATH", defaults.journal_path),
+            journal_retention_days=float(get("ALFRED_JOURNAL_RETENTION_DAYS", defaults.journal_retention_days)),
+            vector_path=get("ALFRED_VECTOR_PATH", defaults.vector_path),
+            vector_nprobe=int(get("ALFRED_VECTOR_NPROBE", defaults.vector_nprobe)),
+        )
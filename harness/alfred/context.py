@@ -0,0 +1,75 @@
+"""Shared services built once at runner startup and handed to every workflow,
+so workflows never construct their own clients or read config themselves.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from alfred.config import Config
+from alfred.invocations import InvocationLog
+from alfred.journal import WorkJournal
+from alfred.models.cache import ResponseCache
+from alfred.models.claude import ClaudeClient
+from alfred.models.gateway import ModelGateway
+from alfred.models.ollama import OllamaClient, OllamaScheduler
+from alfred.models.routing import Router, RoutingPolicy, RoutingStats
+from alfred.prompts import PromptRegistry
+from alfred.tools.http import HttpPool
+from alfred.tools.inbox import InboxClient
+from alfred.tools.polygon import PolygonClient
+from alfred.tools.todos import OpsTodos
+from alfred.tools.wave import WaveClient
+from alfred.tools.wikis import WikiClient
+from alfred.vectors import VectorIndex
+
+
+@dataclass
+class Context:
+    config: Config
+    http: HttpPool = field(default_factory=HttpPool)
+
+    def __post_init__(self):
+        c = self.config
+        self.prompts = PromptRegistry().load()
+        self.inbox = InboxClient(self.http, c.inbox_url, c.inbox_shared_secret)
+        self.wikis = WikiClient(self.http, c.wikis_api_base, c.inbox_shared_secret,
+                                window=c.wiki_write_window_ms / 1000)
+        self.wave = WaveClient(self.http, c.wave_api_token)
+        self.polygon = PolygonClient(self.http, c.polygon_api_key)
+        self.ollama = OllamaScheduler(
+            OllamaClient(self.http, c.ollama_base_url, read_timeout=c.ollama_read_timeout or None),
+            max_in_flight=c.ollama_max_in_flight, window=c.ollama_batch_window_ms / 1000,
+        )
+        self.claude = ClaudeClient(c.anthropic_api_key)
+        self.invocations = InvocationLog(c.supabase_url, c.supabase_service_key)
+        self.todos = OpsTodos(c.supabase_url, c.supabase_service_key)
+        self.cache = ResponseCache(
+            c.cache_path, max_bytes=c.cache_max_mb * 1024 * 1024,
+            similarity=c.semantic_threshold, embedder=self._embed,
+        )
+        self.models = ModelGateway(
+            {"claude": self.claude, "ollama": self.ollama}, self.invocations, self.cache,
+        )
+        self.router = Router(
+            self.models,
+            RoutingPolicy(latency_usd_per_second=c.latency_usd_per_second, min_samples=c.routing_min_samples,
+                          probe_every=c.routing_probe_every),
+            RoutingStats(window=c.routing_window),
+        )
+        self.invocations.listeners.append(self.router.stats.observe)
+        self.journal = WorkJournal(c.journal_path, retention=c.journal_retention_days * 86400)
+        self.vectors = VectorIndex(c.vector_path, embedder=self._embed_many, nprobe=c.vector_nprobe)
+
+    async def _embed(self, text: str) -> list[float]:
+        return (await self.ollama.embed([text], model=self.config.embed_model))[0]
+
+    async def _embed_many(self, texts: list[str]) -> list[list[float]]:
+        return await self.ollama.embed(texts, model=self.config.embed_model)
+
+    async def aclose(self) -> None:
+        await self.wikis.flush()
+        self.cache.close()
+        self.vectors.close()
+        self.journal.close()
+        await self.http.aclose()
@@ -0,0 +1,100 @@
+"""harness_invocations: one row per LLM call (cache hits included).
+
+Columns: workflow, model, prompt_version, input_token_count,
+output_token_count, cache_read_token_count, cache_write_token_count,
+cost_estimate, escalation_reason, cache_status, latency_ms, created_at.
+input_token_count includes the provider prompt-cache reads and writes;
+input_token_count - cache_read_token_count - cache_write_token_count were
+billed uncached. The table's DDL is sql/harness_invocations.sql. Every row
+is also logged as JSON, so calls stay observable when Supabase is
+unreachable, not configured, or its table is behind these columns.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timezone
+from typing import Any, Callable, Mapping
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Invocation:
+    workflow: str
+    model: str
+    prompt_version: str
+    input_token_count: int
+    output_token_count: int
+    cost_estimate: float
+    escalation_reason: str | None = None
+    cache_status: str | None = None
+    latency_ms: int = 0
+    cache_read_token_count: int = 0
+    cache_write_token_count: int = 0
+
+    def row(self) -> dict:
+        return {**asdict(self), "created_at": datetime.now(timezone.utc).isoformat()}
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "Invocation":
+        return cls(**{f.name: row[f.name] for f in fields(cls) if row.get(f.name) is not None})
+
+
+class InvocationLog:
+    """Writes invocations to DeepOps Supabase (when configured) and keeps per-run counters."""
+
+    def __init__(self, supabase_url: str | None = None, supabase_key: str | None = None):
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+        self.cache_counts: Counter[str] = Counter()
+        self.cost = 0.0
+        self.listeners: list[Callable[[Invocation], None]] = []  # e.g. the router's outcome stats
+
+    async def record(self, invocation: Invocation) -> None:
+        row = invocation.row()
+        logger.info(json.dumps({"component": "harness_invocations", **row}))
+        if invocation.cache_status:
+            self.cache_counts[invocation.cache_status] += 1
+        self.cost += invocation.cost_estimate
+        for listener in self.listeners:
+            listener(invocation)
+        if not (self.supabase_url and self.supabase_key):
+            return
+        try:
+            await asyncio.to_thread(self._insert, row)
+        except Exception:
+            # Losing an observability row must never fail the workflow
+            logger.exception("harness_invocations insert failed")
+
+    def _insert(self, row: dict) -> None:
+        from alfred.tools.supabase import client
+        client(self.supabase_url, self.supabase_key).table("harness_invocations").insert(row).execute()
+
+    async def recent(self, limit: int = 2000) -> list[Invocation]:
+        """The latest `limit` logged invocations, oldest first. Empty without Supabase."""
+        if not (self.supabase_url and self.supabase_key):
+            return []
+        try:
+            rows = await asyncio.to_thread(self._select, limit)
+        except Exception:
+            logger.exception("harness_invocations read failed")
+            return []
+        return [Invocation.from_row(row) for row in reversed(rows)]
+
+    def _select(self, limit: int) -> list[dict]:
+        from alfred.tools.supabase import client
+        return (
+            client(self.supabase_url, self.supabase_key).table("harness_invocations")
+            .select("*").order("created_at", desc=True).limit(limit).execute().data
+        )
+
+    @property
+    def cache_hit_rate(self) -> float:
+        total = sum(self.cache_counts.values())
+        hits = self.cache_counts["exact"] + self.cache_counts["semantic"]
+        return hits / total if total else 0.0
@@ -0,0 +1,223 @@
+"""Durable local work journal (SQLite, WAL) for at-least-once processing.
+
+Every item the runner claims is journaled under an idempotency key (source,
+id and a digest of the payload, so an edited-and-requeued item is new work)
+and moves through
+
+    claimed → in_progress → completed | failed      (released on shutdown)
+
+with `recorded` set once that outcome has been written back to the source
+queue. Inside a run, Workflow.step() checkpoints each expensive step's
+result under the item's key, so a re-run skips every step that already
+finished — a transcript whose chunks were extracted before a crash doesn't
+pay for those LLM calls again.
+
+After the process dies, recovery (Dispatcher.recover) uses the journal to:
+
+- re-run items left claimed/in_progress — the source still shows them
+  claimed, so nothing else will — resuming from their checkpoints;
+- write back outcomes that were journaled but never recorded at the source.
+
+A redelivered item that already completed is dropped with one dict lookup
+(the key → state map is held in memory) and its stored result written back
+instead. Released items keep their checkpoints and resume when the source
+hands them out again: the digest skips the queue's own bookkeeping fields
+(status, claimed_at, ...), which change between deliveries of the same work.
+
+Items completed and recorded more than `retention` seconds ago are pruned,
+with their checkpoints, at open and then hourly; a redelivery after that is
+treated as new work.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+if TYPE_CHECKING:
+    from alfred.workflows.base import WorkItem
+
+CLAIMED = "claimed"
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+FAILED = "failed"
+RELEASED = "released"
+UNFINISHED = (CLAIMED, IN_PROGRESS)  # a process died holding these
+
+# Queue bookkeeping the sources write onto a row/document; not part of the work
+BOOKKEEPING = frozenset({"status", "claimed_at", "result", "error", "completed_at", "updated_at"})
+PRUNE_EVERY = 3600.0  # seconds between retention sweeps in a long-running process
+
+current_key: contextvars.ContextVar[str | None] = contextvars.ContextVar("alfred_journal_key", default=None)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class WorkJournal:
+    def __init__(self, path: str | Path, retention: float = 30 * 86400):
+        self.path = Path(path)
+        self.retention = retention
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # survives a process crash; launchd restarts are the case
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                type TEXT NOT NULL,
+                workflow TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                record TEXT NOT NULL,
+                state TEXT NOT NULL,
+                recorded INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS steps (
+                key TEXT NOT NULL,
+                step TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (key, step)
+            );
+        """)
+        self._states: dict[str, str] = dict(self._conn.execute("SELECT key, state FROM items"))
+        self.prune()
+
+    @staticmethod
+    def key(item: WorkItem) -> str:
+        work = {k: v for k, v in item.payload.items() if k not in BOOKKEEPING}
+        digest = hashlib.blake2b(_dumps(work).encode(), digest_size=8).hexdigest()
+        return f"{item.key}:{digest}"
+
+    def state(self, key: str) -> str | None:
+        return self._states.get(key)
+
+    def _set(self, key: str, state: str, **columns: Any) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in ("state", "updated_at", *columns))
+        with self._lock:
+            self._conn.execute(f"UPDATE items SET {assignments} WHERE key = ?",
+                               (state, time.time(), *columns.values(), key))
+        self._states[key] = state
+
+    # ── lifecycle ──
+
+    def claim(self, key: str, item: WorkItem, workflow: str) -> None:
+        """Journal a delivered item (again, if it was released or failed before)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO items (key, source, item_id, type, workflow, payload, record, state, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET state = excluded.state, recorded = 0, "
+                "updated_at = excluded.updated_at",
+                (key, item.source, item.id, item.type, workflow, _dumps(dict(item.payload)),
+                 _dumps(dict(item.record)), CLAIMED, time.time()),
+            )
+        self._states[key] = CLAIMED
+
+    def start(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE items SET attempts = attempts + 1 WHERE key = ?", (key,))
+        self._set(key, IN_PROGRESS)
+
+    def complete(self, key: str, result: dict[str, Any]) -> None:
+        self._set(key, COMPLETED, result=_dumps(result), error=None)
+
+    def fail(self, key: str, error: str) -> None:
+        self._set(key, FAILED, error=error)
+
+    def release(self, key: str) -> None:
+        self._set(key, RELEASED)
+
+    def recorded(self, key: str) -> None:
+        """The outcome has been written back to the source queue."""
+        with self._lock:
+            self._conn.execute("UPDATE items SET recorded = 1 WHERE key = ?", (key,))
+        if time.time() - self._pruned_at > PRUNE_EVERY:
+            self.prune()
+
+    def result(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM items WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    # ── step checkpoints ──
+
+    async def step(self, name: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn` once per item: a checkpointed result is returned without calling it.
+
+        The result must be JSON-serializable (tuples come back as lists).
+        Outside a journaled run (tests, ad hoc calls) this just awaits fn().
+        """
+        key = current_key.get()
+        if key is None:
+            return await fn()
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM steps WHERE key = ? AND step = ?", (key, name)).fetchone()
+        if row:
+            return json.loads(row[0])
+        value = await fn()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO steps VALUES (?, ?, ?, ?)",
+                               (key, name, json.dumps(value), time.time()))
+        return value
+
+    def checkpoints(self, key: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM steps WHERE key = ?", (key,)).fetchone()[0]
+
+    # ── recovery ──
+
+    def pending(self) -> list[tuple[str, str, WorkItem]]:
+        """(key, state, item) for everything a previous process left unfinished or unrecorded, oldest first."""
+        from alfred.workflows.base import WorkItem  # workflows.base imports Context, which holds the journal
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, state, source, item_id, type, payload, record FROM items "
+                "WHERE state IN (?, ?) OR (state IN (?, ?) AND recorded = 0) ORDER BY updated_at",
+                (*UNFINISHED, COMPLETED, FAILED),
+            ).fetchall()
+        return [
+            (key, state, WorkItem(source, item_id, type_, json.loads(payload), json.loads(record)))
+            for key, state, source, item_id, type_, payload, record in rows
+        ]
+
+    def error(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT error FROM items WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # ── retention ──
+
+    def prune(self) -> int:
+        """Drop items completed and recorded more than `retention` seconds ago, and their steps."""
+        cutoff = time.time() - self.retention
+        with self._lock:
+            keys = [key for (key,) in self._conn.execute(
+                "SELECT key FROM items WHERE state = ? AND recorded = 1 AND updated_at < ?", (COMPLETED, cutoff))]
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM steps WHERE key = ?", [(key,) for key in keys])
+            self._conn.executemany("DELETE FROM items WHERE key = ?", [(key,) for key in keys])
+            self._conn.execute("COMMIT")
+        for key in keys:
+            self._states.pop(key, None)
+        self._pruned_at = time.time()
+        return len(keys)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,54 @@
+"""Types shared by the model clients and the routing layer."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import AsyncIterator, Protocol
+
+
+@dataclass(frozen=True)
+class Completion:
+    text: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_seconds: float = 0.0
+    cache: str | None = None  # "exact" | "semantic" | "miss"; None when caching is off
+    cache_read_tokens: int = 0   # of input_tokens, read from the provider's prompt cache
+    cache_write_tokens: int = 0  # of input_tokens, written to it
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """One piece of a streamed reply. The final chunk has done=True and carries the token counts."""
+    text: str
+    done: bool = False
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+
+class SystemPrompt(str):
+    """A system prompt whose first `stable` characters are the same on every call.
+
+    It is the plain string everywhere else (cache keys, Ollama, token
+    estimates); providers with prompt caching mark the stable prefix cacheable.
+    """
+
+    stable: int
+
+    def __new__(cls, prefix: str, suffix: str = ""):
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.stable = len(prefix)
+        return prompt
+
+
+class ModelClient(Protocol):
+    """What the gateway needs from a provider client. None means the tier is unavailable."""
+
+    async def complete(self, messages: list[dict[str, str]], *, model: str, system: str | None = None,
+                       max_tokens: int = 1024, format: str | dict | None = None) -> Completion | None: ...
+
+    def stream(self, messages: list[dict[str, str]], *, model: str, system: str | None = None,
+               max_tokens: int = 1024, format: str | dict | None = None) -> AsyncIterator[Chunk]: ...
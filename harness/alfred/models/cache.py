@@ -0,0 +1,208 @@
+"""Two-level LLM response cache in a local SQLite file (WAL).
+
+1. Exact: keyed on (workflow, model, prompt_version, hash of the normalized
+   input — system prompt, messages, output format). Replays of the same Wave
+   transcript or journal entry hit here and cost nothing.
+2. Near-duplicate (opt-in per call): the input's embedding is compared with
+   cached inputs of the same workflow/model/prompt_version; a cosine
+   similarity at or above the threshold reuses that response. Meant for
+   free-text workflows where a re-sent entry differs only in whitespace,
+   signatures or trailing edits.
+
+Entries are evicted least-recently-used once the file's payload exceeds
+max_bytes. The prompt version is part of every key, so a bumped prompt can
+never be served an old response; the first lookup at a newer version also
+purges that workflow's older-version entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+
+from alfred.models.base import Completion
+
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[str], Awaitable[list[float]]]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Unicode NFC, whitespace runs collapsed, ends stripped."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def input_text(messages: list[dict[str, str]], system: str | None, format: Any) -> str:
+    """The part of a call that determines its output, normalized, as one string."""
+    parts = [f"system:{normalize(system or '')}"]
+    parts += [f"{m['role']}:{normalize(m['content'])}" for m in messages]
+    if format is not None:
+        parts.append(f"format:{json.dumps(format, sort_keys=True)}")
+    return "\n".join(parts)
+
+
+def _version_number(version: str) -> int:
+    match = re.fullmatch(r"v(\d+)", version)
+    return int(match.group(1)) if match else -1
+
+
+class ResponseCache:
+    def __init__(self, path: str | Path, max_bytes: int = 256 * 1024 * 1024,
+                 similarity: float = 0.97, embedder: Embedder | None = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.similarity = similarity
+        self.embedder = embedder
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                workflow TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                completion TEXT NOT NULL,
+                embedding BLOB,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_namespace ON responses (workflow, model, prompt_version);
+            CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at);
+        """)
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._versions: dict[str, int] = {}  # workflow → newest prompt version seen this run
+        self._matrices: dict[tuple, tuple[list[str], np.ndarray]] = {}  # namespace → (keys, unit vectors)
+
+    @staticmethod
+    def key(workflow: str, model: str, prompt_version: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        return f"{workflow}/{model}/{prompt_version}/{digest}"
+
+    # ── lookup ──
+
+    async def get(self, workflow: str, model: str, prompt_version: str, text: str,
+                  semantic: bool = False) -> tuple[Completion | None, list[float] | None]:
+        """Return (cached completion or None, the input's embedding if one was computed)."""
+        self._purge_older_versions(workflow, prompt_version)
+        key = self.key(workflow, model, prompt_version, text)
+        with self._lock:
+            row = self._conn.execute("SELECT completion FROM responses WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._touch(key)
+                return Completion(**{**json.loads(row[0]), "cache": "exact"}), None
+
+        if not (semantic and self.embedder):
+            return None, None
+        try:
+            vector = await self.embedder(text)
+        except Exception:
+            # No embedding (Ollama down) just means no near-duplicate lookup
+            logger.warning("embedding failed; skipping near-duplicate lookup", exc_info=True)
+            return None, None
+        match = self._nearest((workflow, model, prompt_version), vector)
+        if match is None:
+            return None, vector
+        with self._lock:
+            row = self._conn.execute("SELECT completion FROM responses WHERE key = ?", (match,)).fetchone()
+            if not row:
+                return None, vector
+            self._touch(match)
+        return Completion(**{**json.loads(row[0]), "cache": "semantic"}), vector
+
+    def _nearest(self, namespace: tuple, vector: list[float]) -> str | None:
+        keys, matrix = self._matrix(namespace)
+        if not keys:
+            return None
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or matrix.shape[1] != query.shape[0]:
+            return None
+        scores = matrix @ (query / norm)
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.similarity else None
+
+    def _matrix(self, namespace: tuple) -> tuple[list[str], np.ndarray]:
+        if namespace not in self._matrices:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, embedding FROM responses "
+                    "WHERE workflow = ? AND model = ? AND prompt_version = ? AND embedding IS NOT NULL",
+                    namespace,
+                ).fetchall()
+            keys = [k for k, _ in rows]
+            matrix = np.stack([np.frombuffer(e, dtype=np.float32) for _, e in rows]) if rows else np.empty((0, 0))
+            if rows:
+                matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            self._matrices[namespace] = (keys, matrix)
+        return self._matrices[namespace]
+
+    # ── store ──
+
+    async def put(self, workflow: str, model: str, prompt_version: str, text: str, completion: Completion,
+                  embedding: list[float] | None = None) -> None:
+        key = self.key(workflow, model, prompt_version, text)
+        payload = json.dumps({k: v for k, v in asdict(completion).items() if k != "cache"})
+        blob = np.asarray(embedding, dtype=np.float32).tobytes() if embedding is not None else None
+        size = len(payload) + len(blob or b"")
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, workflow, model, prompt_version, payload, blob, size, time.time()),
+            )
+            self._bytes += size - (old[0] if old else 0)
+            if blob is not None:
+                self._matrices.pop((workflow, model, prompt_version), None)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _touch(self, key: str) -> None:
+        self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until 90% of max_bytes."""
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._bytes <= target:
+                break
+            doomed.append((key,))
+            self._bytes -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self._matrices.clear()
+
+    def _purge_older_versions(self, workflow: str, prompt_version: str) -> None:
+        number = _version_number(prompt_version)
+        if self._versions.get(workflow, -1) >= number:
+            return
+        self._versions[workflow] = number
+        with self._lock:
+            stale = [
+                (key, size) for key, version, size in self._conn.execute(
+                    "SELECT key, prompt_version, size FROM responses WHERE workflow = ?", (workflow,)
+                ) if _version_number(version) < number
+            ]
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k, _ in stale])
+            self._bytes -= sum(size for _, size in stale)
+        self._matrices = {ns: m for ns, m in self._matrices.items() if ns[0] != workflow or ns[2] == prompt_version}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
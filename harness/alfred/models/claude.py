@@ -1,6 +1,96 @@
-"""Anthropic SDK wrapper. Wraps anthropic.Anthropic().messages.create() with the
-harness's logging contract (per-call: workflow, model, prompt_version, input/output
-tokens, cost_estimate, escalation_reason → harness_invocations table).
+"""Anthropic SDK wrapper. Wraps anthropic.AsyncAnthropic().messages.create();
+the per-call logging contract (workflow, model, prompt_version, input/output
+tokens, cost_estimate, escalation_reason → harness_invocations) is applied
+uniformly by alfred.models.gateway for every provider.
 
-Phase 4 scaffold — implementation TBD. See README.md.
+A SystemPrompt's stable prefix (a prompt version's static instructions, see
+alfred.prompts) is sent as its own system block with a cache_control
+breakpoint, so repeat calls within the cache TTL read it from Anthropic's
+prompt cache. Prefixes under the model's minimum cacheable length are
+simply not cached by the API.
 """
+
+from __future__ import annotations
+
+import time
+from typing import AsyncIterator
+
+from alfred.models.base import Chunk, Completion, SystemPrompt
+
+SONNET = "claude-sonnet-4-6"
+OPUS = "claude-opus-4-7"
+
+# List prices, USD per million tokens (input, output). Update with Anthropic pricing.
+PRICING_PER_MTOK = {
+    SONNET: (3.0, 15.0),
+    OPUS: (15.0, 75.0),
+}
+# Prompt-cache input pricing relative to the base input price (5-minute TTL)
+CACHE_READ_MULTIPLIER = 0.1
+CACHE_WRITE_MULTIPLIER = 1.25
+
+
+def cost_estimate(model: str, input_tokens: int, output_tokens: int,
+                  cache_read_tokens: int = 0, cache_write_tokens: int = 0) -> float:
+    """USD for one call; 0 for local models. input_tokens includes the cache reads and writes."""
+    price_in, price_out = PRICING_PER_MTOK.get(model, (0.0, 0.0))
+    uncached = input_tokens - cache_read_tokens - cache_write_tokens
+    input_cost = price_in * (uncached + CACHE_READ_MULTIPLIER * cache_read_tokens
+                             + CACHE_WRITE_MULTIPLIER * cache_write_tokens)
+    return (input_cost + output_tokens * price_out) / 1_000_000
+
+
+def _usage(usage) -> dict[str, int]:
+    """Completion/Chunk token fields from an Anthropic usage object; input_tokens counts cached ones too."""
+    read = getattr(usage, "cache_read_input_tokens", None) or 0
+    write = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return {"input_tokens": usage.input_tokens + read + write, "output_tokens": usage.output_tokens,
+            "cache_read_tokens": read, "cache_write_tokens": write}
+
+
+class ClaudeClient:
+    def __init__(self, api_key: str | None):
+        self.api_key = api_key
+        self._client = None
+
+    def _sdk(self):
+        if self._client is None:
+            if not self.api_key:
+                raise RuntimeError("ANTHROPIC_API_KEY not set")
+            from anthropic import AsyncAnthropic
+            self._client = AsyncAnthropic(api_key=self.api_key)
+        return self._client
+
+    async def complete(self, messages: list[dict[str, str]], *, model: str = SONNET, system: str | None = None,
+                       max_tokens: int = 1024, format: str | dict | None = None) -> Completion:
+        kwargs = self._kwargs(messages, model, system, max_tokens)
+        started = time.monotonic()
+        response = await self._sdk().messages.create(**kwargs)
+        return Completion(
+            text="".join(block.text for block in response.content if block.type == "text"),
+            model=model,
+            latency_seconds=time.monotonic() - started,
+            **_usage(response.usage),
+        )
+
+    async def stream(self, messages: list[dict[str, str]], *, model: str = SONNET, system: str | None = None,
+                     max_tokens: int = 1024, format: str | dict | None = None) -> AsyncIterator[Chunk]:
+        """Yield text deltas as they arrive, then a done chunk with usage. Closing early stops generation."""
+        async with self._sdk().messages.stream(**self._kwargs(messages, model, system, max_tokens)) as stream:
+            async for text in stream.text_stream:
+                yield Chunk(text)
+            usage = (await stream.get_final_message()).usage
+        yield Chunk("", done=True, **_usage(usage))
+
+    @staticmethod
+    def _kwargs(messages: list[dict[str, str]], model: str, system: str | None, max_tokens: int) -> dict:
+        # `format` is Ollama's structured-output switch; Claude gets its schema from the prompt
+        kwargs = {"model": model, "messages": messages, "max_tokens": max_tokens}
+        if isinstance(system, SystemPrompt) and system.stable:
+            blocks = [{"type": "text", "text": system[:system.stable], "cache_control": {"type": "ephemeral"}}]
+            if len(system) > system.stable:
+                blocks.append({"type": "text", "text": system[system.stable:]})
+            kwargs["system"] = blocks
+        elif system:
+            kwargs["system"] = system
+        return kwargs
@@ -0,0 +1,146 @@
+"""The one path workflows use to call a model.
+
+Every call goes cache lookup → provider client → cache store → one
+harness_invocations row (hits included, with cache_status set), so
+caching and logging can't be skipped by a workflow that forgets them.
+
+complete_structured() streams instead, feeding tokens to a
+StreamingValidator so a reply that can't match the schema is cut off at
+the first bad token (and still logged) rather than paid for in full.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import replace
+from typing import Any, Callable, Mapping
+
+from alfred.invocations import Invocation, InvocationLog
+from alfred.models.base import Completion, ModelClient
+from alfred.models.cache import ResponseCache, input_text
+from alfred.models.claude import cost_estimate
+from alfred.models.structured import SchemaViolation, StreamingValidator
+
+
+def _cost(completion: Completion) -> float:
+    return cost_estimate(completion.model, completion.input_tokens, completion.output_tokens,
+                         completion.cache_read_tokens, completion.cache_write_tokens)
+
+
+class ModelGateway:
+    def __init__(self, clients: Mapping[str, ModelClient], log: InvocationLog,
+                 cache: ResponseCache | None = None):
+        self.clients = dict(clients)  # provider name ("claude", "ollama") → client
+        self.log = log
+        self.cache = cache
+
+    async def complete(self, workflow: str, prompt_version: str, messages: list[dict[str, str]], *,
+                       provider: str, model: str, system: str | None = None, max_tokens: int = 1024,
+                       format: str | dict | None = None, semantic: bool = False,
+                       escalation_reason: str | None = None) -> Completion | None:
+        """Complete through the cache. semantic=True also allows near-duplicate hits.
+
+        Returns None when the provider is unavailable (Ollama down); nothing is cached or logged then.
+        """
+        started = time.monotonic()
+        text = input_text(messages, system, format)
+        embedding = None
+        if self.cache:
+            cached, embedding = await self.cache.get(workflow, model, prompt_version, text, semantic=semantic)
+            if cached:
+                await self._record(workflow, prompt_version, cached, escalation_reason, started, cost=0.0)
+                return cached
+
+        completion = await self.clients[provider].complete(
+            messages, model=model, system=system, max_tokens=max_tokens, format=format,
+        )
+        if completion is None:
+            return None
+        if self.cache:
+            await self.cache.put(workflow, model, prompt_version, text, completion, embedding)
+            completion = replace(completion, cache="miss")
+        await self._record(workflow, prompt_version, completion, escalation_reason, started,
+                           cost=_cost(completion))
+        return completion
+
+    async def complete_structured(self, workflow: str, prompt_version: str, messages: list[dict[str, str]], *,
+                                  provider: str, model: str, schema: dict | None, emit: tuple | None = None,
+                                  on_item: Callable[[Any], None] | None = None, system: str | None = None,
+                                  max_tokens: int = 1024, format: str | dict | None = None,
+                                  escalation_reason: str | None = None) -> tuple[Completion, Any] | None:
+        """Stream a completion, validating as it arrives. Returns (completion, parsed value).
+
+        Values at `emit` go to on_item as they close. Raises SchemaViolation
+        (with .partial, the tokens spent so far) as soon as the output can't
+        match; returns None when the provider is unavailable.
+        """
+        started = time.monotonic()
+        text = input_text(messages, system, format)
+        validator = StreamingValidator(schema, emit=emit, on_item=on_item)
+        if self.cache:
+            cached, _ = await self.cache.get(workflow, model, prompt_version, text)
+            if cached:
+                validator.feed(cached.text)
+                value = validator.close()
+                await self._record(workflow, prompt_version, cached, escalation_reason, started, cost=0.0)
+                return cached, value
+
+        pieces = 0
+        usage = None
+        stream = self.clients[provider].stream(messages, model=model, system=system, max_tokens=max_tokens,
+                                               format=format)
+        try:
+            async for chunk in stream:
+                if chunk.done:
+                    usage = chunk
+                elif chunk.text:
+                    pieces += 1
+                    validator.feed(chunk.text)
+            if not (pieces or usage):
+                return None
+            value = validator.close()
+        except SchemaViolation as violation:
+            # Aborted mid-stream: no usage from the provider, so estimate what was spent
+            violation.partial = Completion(
+                text=validator.text, model=model, input_tokens=len(text) // 4, output_tokens=pieces,
+                latency_seconds=time.monotonic() - started, cache="miss" if self.cache else None,
+            )
+            await self._record(workflow, prompt_version, violation.partial, escalation_reason, started,
+                               cost=cost_estimate(model, len(text) // 4, pieces))
+            raise
+        finally:
+            await stream.aclose()
+
+        completion = Completion(
+            text=validator.text, model=model,
+            input_tokens=usage.input_tokens if usage else len(text) // 4,
+            output_tokens=usage.output_tokens if usage else pieces,
+            latency_seconds=time.monotonic() - started,
+            cache_read_tokens=usage.cache_read_tokens if usage else 0,
+            cache_write_tokens=usage.cache_write_tokens if usage else 0,
+        )
+        if self.cache:
+            await self.cache.put(workflow, model, prompt_version, text, completion)
+            completion = replace(completion, cache="miss")
+        await self._record(workflow, prompt_version, completion, escalation_reason, started,
+                           cost=_cost(completion))
+        return completion, value
+
+    async def _record(self, workflow: str, prompt_version: str, completion: Completion,
+                      escalation_reason: str | None, started: float, *, cost: float) -> None:
+        hit = completion.cache in ("exact", "semantic")
+        await self.log.record(Invocation(
+            workflow=workflow,
+            model=completion.model,
+            prompt_version=prompt_version,
+            # A hit sends nothing to the provider; the cached counts are what it saved
+            input_token_count=0 if hit else completion.input_tokens,
+            output_token_count=0 if hit else completion.output_tokens,
+            cache_read_token_count=0 if hit else completion.cache_read_tokens,
+            cache_write_token_count=0 if hit else completion.cache_write_tokens,
+            cost_estimate=cost,
+            escalation_reason=escalation_reason,
+            cache_status=completion.cache,
+            latency_ms=int((time.monotonic() - started) * 1000),
+        ))
+
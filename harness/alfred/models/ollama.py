@@ -1,5 +1,263 @@
 """Local model client — POSTs to http://localhost:11434/api/chat (Ollama HTTP API).
-Falls back to None if the daemon isn't running; the routing layer escalates to Claude.
+Falls back to None if the daemon isn't running, times out or errors; the
+routing layer escalates to Claude.
 
-Phase 4 scaffold — implementation TBD. See README.md.
+Requests go through the shared HttpPool, so the connection to the daemon
+stays open across calls. Generation gets its own long read timeout (the
+pool's suits web APIs, not a CPU-bound 8B model) and is never retried: a
+retry would generate again while the abandoned request still holds one of
+the daemon's slots.
+
+OllamaScheduler sits in front of the client for everything the harness
+sends. /api/chat takes one conversation per request — the daemon batches
+across its OLLAMA_NUM_PARALLEL slots itself — so the scheduler's job is to
+keep exactly that many requests outstanding (more only queue inside the
+daemon and time out; fewer leave slots idle), collapse identical concurrent
+requests into one, and batch embeddings, which /api/embed does accept as a
+list. It reports queue depth and tokens/sec for tuning max_in_flight.
 """
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from alfred.models.base import Chunk, Completion
+from alfred.tools.http import HttpPool
+
+DEFAULT_MODEL = "llama3.1:8b"
+EMBED_MODEL = "nomic-embed-text"
+
+logger = logging.getLogger(__name__)
+
+
+def _chat_body(messages: list[dict[str, str]], model: str, system: str | None, max_tokens: int,
+               format: str | dict | None, stream: bool) -> dict[str, Any]:
+    if system:
+        messages = [{"role": "system", "content": system}, *messages]
+    body: dict[str, Any] = {"model": model, "messages": messages, "stream": stream,
+                            "options": {"num_predict": max_tokens}}
+    if format is not None:
+        body["format"] = format
+    return body
+
+
+class OllamaClient:
+    def __init__(self, http: HttpPool, base_url: str, read_timeout: float | None = 600.0):
+        self.http = http
+        self.base_url = base_url.rstrip("/")
+        self.read_timeout = read_timeout  # None: wait as long as generation takes
+
+    def _timeout(self):
+        import httpx
+        return httpx.Timeout(self.read_timeout, connect=self.http.settings.connect_timeout)
+
+    async def _post_chat(self, body: dict[str, Any]) -> Completion | None:
+        import httpx
+
+        started = time.monotonic()
+        try:
+            response = await self.http.request("POST", f"{self.base_url}/api/chat", json=body,
+                                               idempotent=False, timeout=self._timeout())
+            response.raise_for_status()
+            data = response.json()
+        except httpx.ConnectError:
+            return None  # daemon not running
+        except httpx.HTTPError as e:
+            # Timed out, or an error status (e.g. the model isn't pulled)
+            logger.warning(f"ollama {body['model']}: {type(e).__name__}: {e}")
+            return None
+        return Completion(
+            text=data["message"]["content"],
+            model=body["model"],
+            input_tokens=data.get("prompt_eval_count", 0),
+            output_tokens=data.get("eval_count", 0),
+            latency_seconds=time.monotonic() - started,
+        )
+
+    async def complete(self, messages: list[dict[str, str]], *, model: str = DEFAULT_MODEL, system: str | None = None,
+                       max_tokens: int = 1024, format: str | dict | None = None) -> Completion | None:
+        return await self._post_chat(_chat_body(messages, model, system, max_tokens, format, stream=False))
+
+    async def stream(self, messages: list[dict[str, str]], *, model: str = DEFAULT_MODEL, system: str | None = None,
+                     max_tokens: int = 1024, format: str | dict | None = None) -> AsyncIterator[Chunk]:
+        """Yield the reply as it's generated. Yields nothing if the daemon isn't running, or
+        times out or errors before the first chunk; a failure after that is raised, since
+        part of the reply has already been consumed."""
+        import httpx
+
+        body = _chat_body(messages, model, system, max_tokens, format, stream=True)
+        started = False
+        try:
+            async with self.http.stream("POST", f"{self.base_url}/api/chat", json=body,
+                                        timeout=self._timeout()) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    started = True
+                    if data.get("done"):
+                        yield Chunk("", done=True, input_tokens=data.get("prompt_eval_count", 0),
+                                    output_tokens=data.get("eval_count", 0))
+                    else:
+                        yield Chunk(data["message"]["content"])
+        except httpx.ConnectError:
+            return  # daemon not running
+        except httpx.HTTPError as e:
+            if started:
+                raise
+            logger.warning(f"ollama {model}: {type(e).__name__}: {e}")
+
+    async def embed(self, texts: list[str], *, model: str = EMBED_MODEL) -> list[list[float]]:
+        response = await self.http.request(
+            "POST", f"{self.base_url}/api/embed", json={"model": model, "input": texts}, idempotent=True,
+            timeout=self._timeout(),
+        )
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+
+class OllamaScheduler:
+    """Admission control, request coalescing and embedding batching for one local daemon.
+
+    Drop-in for OllamaClient wherever complete/stream/embed are used.
+    max_in_flight should match the daemon's OLLAMA_NUM_PARALLEL.
+    """
+
+    def __init__(self, client: OllamaClient, *, max_in_flight: int = 2, window: float = 0.01,
+                 max_batch: int = 32, rate_window: float = 60.0):
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.window = window            # seconds embed requests wait for company
+        self.max_batch = max_batch      # texts per /api/embed call
+        self.rate_window = rate_window  # seconds of history behind tokens_per_second
+        self.stats = {"requests": 0, "coalesced": 0, "embed_batches": 0}
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._waiting = 0
+        self._in_flight = 0
+        self._shared: dict[str, asyncio.Task] = {}
+        self._embeds: dict[str, list[tuple[list[str], asyncio.Future]]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._finished: deque[tuple[float, float, int]] = deque()  # (started, finished, output tokens)
+
+    # ── metrics ──
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for a slot, plus embed calls waiting for their batch to go out."""
+        return self._waiting + sum(len(batch) for batch in self._embeds.values())
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Generated tokens per wall-clock second across all slots, over the last rate_window."""
+        now = time.monotonic()
+        while self._finished and self._finished[0][1] < now - self.rate_window:
+            self._finished.popleft()
+        if not self._finished:
+            return 0.0
+        span = now - max(min(started for started, _, _ in self._finished), now - self.rate_window)
+        return sum(tokens for _, _, tokens in self._finished) / span if span > 0 else 0.0
+
+    def metrics(self) -> dict[str, Any]:
+        return {"queue_depth": self.queue_depth, "in_flight": self._in_flight,
+                "tokens_per_second": round(self.tokens_per_second, 2), **self.stats}
+
+    @asynccontextmanager
+    async def _slot(self):
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+        started = time.monotonic()
+        tokens = [0]
+        try:
+            yield tokens
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+            self._finished.append((started, time.monotonic(), tokens[0]))
+
+    # ── chat ──
+
+    async def complete(self, messages: list[dict[str, str]], *, model: str = DEFAULT_MODEL, system: str | None = None,
+                       max_tokens: int = 1024, format: str | dict | None = None) -> Completion | None:
+        """Identical concurrent requests share one call; a caller cancelling doesn't cancel the others."""
+        self.stats["requests"] += 1
+        key = json.dumps([messages, model, system, max_tokens, format], sort_keys=True)
+        task = self._shared.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._complete(messages, model, system, max_tokens, format))
+            self._shared[key] = task
+            task.add_done_callback(lambda _: self._shared.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def _complete(self, messages, model, system, max_tokens, format) -> Completion | None:
+        async with self._slot() as tokens:
+            completion = await self.client.complete(
+                messages, model=model, system=system, max_tokens=max_tokens, format=format,
+            )
+            tokens[0] = completion.output_tokens if completion else 0
+        return completion
+
+    async def stream(self, messages: list[dict[str, str]], *, model: str = DEFAULT_MODEL, system: str | None = None,
+                     max_tokens: int = 1024, format: str | dict | None = None) -> AsyncIterator[Chunk]:
+        """Pass the reply through as it arrives. Holds a slot until the stream ends or is closed."""
+        self.stats["requests"] += 1
+        async with self._slot() as tokens:
+            async for chunk in self.client.stream(
+                messages, model=model, system=system, max_tokens=max_tokens, format=format,
+            ):
+                if chunk.done:
+                    tokens[0] = chunk.output_tokens
+                yield chunk
+
+    # ── embeddings ──
+
+    async def embed(self, texts: list[str], *, model: str = EMBED_MODEL) -> list[list[float]]:
+        """Calls arriving within `window` of each other go out as one /api/embed request."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._embeds.setdefault(model, [])
+        batch.append((list(texts), future))
+        if sum(len(t) for t, _ in batch) >= self.max_batch:
+            self._flush(model)
+        elif model not in self._timers:
+            self._timers[model] = loop.call_later(self.window, self._flush, model)
+        return await future
+
+    def _flush(self, model: str) -> None:
+        timer = self._timers.pop(model, None)
+        if timer:
+            timer.cancel()
+        batch = self._embeds.pop(model, None)
+        if batch:
+            task = asyncio.ensure_future(self._send_embeds(model, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send_embeds(self, model: str, batch: list[tuple[list[str], asyncio.Future]]) -> None:
+        self.stats["embed_batches"] += 1
+        try:
+            async with self._slot():
+                vectors = await self.client.embed([t for texts, _ in batch for t in texts], model=model)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        offset = 0
+        for texts, future in batch:
+            if not future.done():
+                future.set_result(vectors[offset:offset + len(texts)])
+            offset += len(texts)
@@ -4,5 +4,446 @@
 Default tier: Ollama (free). Escalate to Claude Sonnet 4.6 on confidence-low or
 no-schema-match. Opus 4.7 reserved for memos + investor comms (explicit tier).
 
-Phase 4 scaffold — implementation TBD. See README.md.
+On top of that static matrix the router learns from harness_invocations:
+per workflow, the local tier's recent success rate (a local call followed by a
+failure escalation counts as a miss), latency percentiles per tier, and the
+remote tier's cost per call. With those it decides before calling:
+
+- try local first, escalating on a miss (the static behaviour);
+- skip local, when the measured success rate is below the break-even rate at
+  which a local attempt saves more than it costs in expected added latency
+  (priced at latency_usd_per_second), or while the Ollama daemon is down;
+- hedge, when a deadline is tight: start local, and if it hasn't answered by
+  its own median latency, start Sonnet too and take whichever valid answer
+  lands first.
+
+Success rate measures answer quality only (schema misses, low confidence).
+An escalation because the daemon didn't answer (down, timed out, or raised
+a transport or HTTP error) counts toward availability instead, so an outage can't make the local model look bad. While skipping,
+every probe_every-th item still goes local-first, so a recovered daemon or
+an improved model is noticed and the router can't get stuck on remote.
+
+Decisions read only from RoutingStats, which is fed the same Invocation rows
+live and offline, so replay() can re-run any policy over logged history.
 """
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Mapping
+
+import numpy as np
+
+from alfred.invocations import Invocation
+from alfred.models.base import Completion
+from alfred.models.claude import OPUS, SONNET
+from alfred.models.ollama import DEFAULT_MODEL
+from alfred.models.structured import SchemaViolation
+
+if TYPE_CHECKING:
+    from alfred.models.gateway import ModelGateway
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Tier:
+    provider: str
+    model: str
+
+
+LOCAL = Tier("ollama", DEFAULT_MODEL)
+REMOTE = Tier("claude", SONNET)
+PREMIUM = Tier("claude", OPUS)
+
+# Workflow.model → the tier it starts at
+TIERS = {"ollama": LOCAL, "sonnet": REMOTE, "opus": PREMIUM}
+
+# escalation_reason values. The first three mean the local attempt failed.
+LOCAL_UNAVAILABLE = "local_unavailable"
+SCHEMA_MISS = "schema_miss"
+LOW_CONFIDENCE = "low_confidence"
+SKIP_LOCAL = "skip_local"
+HEDGE = "hedge"
+LOCAL_FAILURES = frozenset({LOCAL_UNAVAILABLE, SCHEMA_MISS, LOW_CONFIDENCE})
+LOCAL_MISSES = frozenset({SCHEMA_MISS, LOW_CONFIDENCE})  # local answered, badly
+
+DOWN_AFTER = 3  # consecutive unanswered local attempts before the daemon counts as down
+
+CACHE_HITS = frozenset({"exact", "semantic"})
+
+
+class TokenBudgetExceeded(RuntimeError):
+    """A workflow item used (or was about to use) more tokens than its budget. Never truncate instead."""
+
+
+@dataclass
+class TokenBudget:
+    """Per-item token allowance for one workflow run; shared by every call the item makes."""
+    workflow: str
+    limit: int
+    used: int = 0
+
+    def check(self, planned: int) -> None:
+        if self.used + planned > self.limit:
+            raise TokenBudgetExceeded(
+                f"{self.workflow}: {self.used} tokens used + {planned} planned exceeds budget {self.limit}"
+            )
+
+    def charge(self, completion: Completion) -> None:
+        if completion.cache in CACHE_HITS:
+            return
+        self.used += completion.input_tokens + completion.output_tokens
+        if self.used > self.limit:
+            raise TokenBudgetExceeded(f"{self.workflow}: used {self.used} tokens, budget {self.limit}")
+
+
+def estimate_tokens(messages: list[dict[str, str]], system: str | None, max_tokens: int) -> int:
+    """Upper-bound planning estimate: ~4 chars per input token plus the full output allowance."""
+    chars = len(system or "") + sum(len(m["content"]) for m in messages)
+    return chars // 4 + max_tokens
+
+
+@dataclass
+class _Samples:
+    latency_ms: deque = field(default_factory=deque)
+    cost: deque = field(default_factory=deque)
+    tokens: deque = field(default_factory=deque)
+
+
+class RoutingStats:
+    """Rolling per-workflow outcome stats, built from Invocation rows in log order."""
+
+    def __init__(self, window: int = 100):
+        self.window = window
+        self._local_ok: dict[str, deque[bool]] = defaultdict(lambda: deque(maxlen=window))
+        self._samples: dict[tuple[str, Tier], _Samples] = defaultdict(
+            lambda: _Samples(deque(maxlen=window), deque(maxlen=window), deque(maxlen=window))
+        )
+        self.local_unanswered = 0  # consecutive local attempts the daemon didn't answer, any workflow
+
+    def warm(self, history: Iterable[Invocation]) -> None:
+        for inv in history:
+            self.observe(inv)
+
+    def observe(self, inv: Invocation) -> None:
+        if inv.cache_status in CACHE_HITS:
+            return  # no provider call happened
+        tier = LOCAL if inv.model == LOCAL.model else Tier("claude", inv.model)
+        samples = self._samples[(inv.workflow, tier)]
+        samples.latency_ms.append(inv.latency_ms)
+        samples.cost.append(inv.cost_estimate)
+        samples.tokens.append(inv.input_token_count + inv.output_token_count)
+        if tier == LOCAL:
+            self._local_ok[inv.workflow].append(True)
+            self.local_unanswered = 0
+        elif inv.escalation_reason == LOCAL_UNAVAILABLE:
+            # Nothing was logged for the local attempt: the daemon didn't answer. Availability, not quality.
+            self.local_unanswered += 1
+        elif inv.escalation_reason in LOCAL_MISSES:
+            # The local attempt this escalation followed was a miss
+            outcomes = self._local_ok[inv.workflow]
+            for i in range(len(outcomes) - 1, -1, -1):
+                if outcomes[i]:
+                    outcomes[i] = False
+                    break
+
+    @property
+    def local_down(self) -> bool:
+        return self.local_unanswered >= DOWN_AFTER
+
+    def local_attempts(self, workflow: str) -> int:
+        return len(self._local_ok[workflow])
+
+    def local_success_rate(self, workflow: str) -> float | None:
+        outcomes = self._local_ok[workflow]
+        return sum(outcomes) / len(outcomes) if outcomes else None
+
+    def latency_ms(self, workflow: str, tier: Tier, q: float) -> float | None:
+        samples = self._samples[(workflow, tier)].latency_ms
+        return float(np.percentile(samples, q)) if samples else None
+
+    def mean_cost(self, workflow: str, tier: Tier) -> float | None:
+        costs = self._samples[(workflow, tier)].cost
+        return sum(costs) / len(costs) if costs else None
+
+
+@dataclass(frozen=True)
+class Plan:
+    first: Tier
+    fallback: Tier | None = None
+    hedge_after: float | None = None  # seconds; start `fallback` in parallel after this long
+    reason: str | None = None         # escalation_reason for the fallback call
+
+
+@dataclass(frozen=True)
+class RoutingPolicy:
+    latency_usd_per_second: float = 0.002  # what a second of added latency is worth
+    min_samples: int = 20                  # local attempts before learned decisions kick in
+    probe_every: int = 20                  # while skipping local, every Nth item still tries it (0: never)
+
+
+class Router:
+    def __init__(self, gateway: ModelGateway | None = None, policy: RoutingPolicy = RoutingPolicy(),
+                 stats: RoutingStats | None = None):
+        self.gateway = gateway
+        self.policy = policy
+        self.stats = stats or RoutingStats()
+        self._skipped: dict[str, int] = defaultdict(int)
+
+    def break_even_rate(self, workflow: str) -> float | None:
+        """Local success rate above which trying local first beats going straight to remote.
+
+        local-first:  (1-p)·C_r + λ·(L_l + (1-p)·L_r)     remote-only:  C_r + λ·L_r
+        local-first wins  ⇔  p > λ·L_l / (C_r + λ·L_r)
+        """
+        lam = self.policy.latency_usd_per_second
+        local_s = self.stats.latency_ms(workflow, LOCAL, 50)
+        remote_s = self.stats.latency_ms(workflow, REMOTE, 50)
+        remote_cost = self.stats.mean_cost(workflow, REMOTE)
+        if local_s is None or remote_s is None or remote_cost is None:
+            return None
+        local_s, remote_s = local_s / 1000, remote_s / 1000
+        return lam * local_s / (remote_cost + lam * remote_s)
+
+    def plan(self, workflow: str, model: str = "ollama", deadline: float | None = None) -> Plan:
+        """Choose tiers for one call. `model` is the workflow's static tier; deadline is in seconds."""
+        start = TIERS[model]
+        if start != LOCAL:
+            return Plan(start)
+        static = Plan(LOCAL, REMOTE)
+        if self.stats.local_down:
+            return self._skip(workflow, "daemon down")
+        if self.stats.local_attempts(workflow) < self.policy.min_samples:
+            return static
+
+        rate = self.stats.local_success_rate(workflow)
+        threshold = self.break_even_rate(workflow)
+        if threshold is not None and rate < threshold:
+            return self._skip(workflow, f"success rate {rate:.2f} < break-even {threshold:.2f}")
+
+        if deadline is not None:
+            local_p50 = self.stats.latency_ms(workflow, LOCAL, 50)
+            local_p95 = self.stats.latency_ms(workflow, LOCAL, 95)
+            remote_p95 = self.stats.latency_ms(workflow, REMOTE, 95) or 0.0
+            # A local miss then a remote call wouldn't fit: hedge once local passes its median
+            if local_p95 / 1000 + remote_p95 / 1000 > deadline:
+                if local_p50 / 1000 >= deadline:
+                    return Plan(REMOTE, reason=SKIP_LOCAL)
+                return Plan(LOCAL, REMOTE, hedge_after=local_p50 / 1000, reason=HEDGE)
+        return static
+
+    def _skip(self, workflow: str, why: str) -> Plan:
+        """Go straight to remote, except every probe_every-th time: then local-first, so the
+        stats that made us skip get fresh samples and the decision can reverse."""
+        self._skipped[workflow] += 1
+        every = self.policy.probe_every
+        if every and self._skipped[workflow] % every == 0:
+            logger.info(f"{workflow}: probing the local tier ({why})")
+            return Plan(LOCAL, REMOTE)
+        return Plan(REMOTE, reason=SKIP_LOCAL)
+
+    async def complete(self, workflow: str, prompt_version: str, messages: list[dict[str, str]], *,
+                       model: str = "ollama", system: str | None = None, max_tokens: int = 1024,
+                       format: str | dict | None = None, validate: Callable[[str], bool] | None = None,
+                       deadline: float | None = None, budget: TokenBudget | None = None,
+                       semantic: bool = False) -> Completion:
+        """Route one call. `validate` rejects a local answer (schema miss / low confidence) → escalate.
+
+        Raises TokenBudgetExceeded before any call the budget can't cover, and
+        RuntimeError when every tier failed.
+        """
+        plan = self.plan(workflow, model, deadline)
+        if plan.reason:
+            logger.info(f"{workflow}: {plan.reason} → {plan.first.model}")
+        planned = estimate_tokens(messages, system, max_tokens)
+
+        async def call(tier: Tier, reason: str | None) -> Completion | None:
+            if budget:
+                budget.check(planned)
+            try:
+                completion = await self.gateway.complete(
+                    workflow, prompt_version, messages, provider=tier.provider, model=tier.model,
+                    system=system, max_tokens=max_tokens, format=format, semantic=semantic,
+                    escalation_reason=reason,
+                )
+            except Exception as e:
+                if tier != LOCAL:
+                    raise
+                _local_failed(workflow, e)
+                return None
+            if completion and budget:
+                budget.charge(completion)
+            return completion
+
+        def ok(tier: Tier, completion: Completion | None) -> bool:
+            return completion is not None and (tier != LOCAL or validate is None or validate(completion.text))
+
+        if plan.hedge_after is not None:
+            return await self._hedged(plan, call, ok)
+
+        first = await call(plan.first, plan.reason if plan.fallback is None else None)
+        if ok(plan.first, first) or plan.fallback is None:
+            if first is None:
+                raise RuntimeError(f"{workflow}: {plan.first.model} unavailable")
+            return first
+        reason = LOCAL_UNAVAILABLE if first is None else SCHEMA_MISS
+        second = await call(plan.fallback, reason)
+        if second is None:
+            raise RuntimeError(f"{workflow}: {plan.fallback.model} unavailable")
+        return second
+
+    async def complete_structured(self, workflow: str, prompt_version: str, messages: list[dict[str, str]], *,
+                                  schema: dict | None, emit: tuple | None = None,
+                                  on_item: Callable[[Any], None] | None = None, model: str = "ollama",
+                                  system: str | None = None, max_tokens: int = 1024,
+                                  budget: TokenBudget | None = None) -> tuple[Completion, Any]:
+        """Streamed, schema-validated routing: a local stream that provably can't match is aborted
+        and escalated immediately. Ollama also gets the schema as its `format`, constraining decoding.
+
+        Items are emitted as they close; an escalated attempt doesn't re-emit an item identical
+        to one the aborted attempt already emitted.
+        """
+        plan = self.plan(workflow, model)
+        if plan.reason:
+            logger.info(f"{workflow}: {plan.reason} → {plan.first.model}")
+        planned = estimate_tokens(messages, system, max_tokens)
+        emitted: set[str] = set()
+
+        def forward(item: Any) -> None:
+            key = json.dumps(item, sort_keys=True)
+            if key not in emitted:
+                emitted.add(key)
+                on_item(item)
+
+        async def call(tier: Tier, reason: str | None) -> tuple[Completion, Any] | None:
+            if budget:
+                budget.check(planned)
+            try:
+                result = await self.gateway.complete_structured(
+                    workflow, prompt_version, messages, provider=tier.provider, model=tier.model,
+                    schema=schema, emit=emit, on_item=forward if on_item else None, system=system,
+                    max_tokens=max_tokens, format=schema if tier == LOCAL else None, escalation_reason=reason,
+                )
+            except SchemaViolation as violation:
+                if budget and violation.partial:
+                    budget.charge(violation.partial)
+                raise
+            except Exception as e:
+                if tier != LOCAL:
+                    raise
+                _local_failed(workflow, e)
+                return None
+            if result and budget:
+                budget.charge(result[0])
+            return result
+
+        first_reason = plan.reason if plan.fallback is None else None
+        if plan.fallback is None:
+            result = await call(plan.first, first_reason)
+            if result is None:
+                raise RuntimeError(f"{workflow}: {plan.first.model} unavailable")
+            return result
+        try:
+            result = await call(plan.first, first_reason)
+            reason = LOCAL_UNAVAILABLE
+        except SchemaViolation as violation:
+            logger.info(f"{workflow}: {plan.first.model} aborted ({violation}); escalating")
+            result, reason = None, SCHEMA_MISS
+        if result is not None:
+            return result
+        result = await call(plan.fallback, reason)
+        if result is None:
+            raise RuntimeError(f"{workflow}: {plan.fallback.model} unavailable")
+        return result
+
+    async def _hedged(self, plan: Plan, call, ok) -> Completion:
+        local = asyncio.ensure_future(call(plan.first, None))
+        done, _ = await asyncio.wait({local}, timeout=plan.hedge_after)
+        if done and ok(plan.first, local.result()):
+            return local.result()
+        reason = plan.reason if not done else (LOCAL_UNAVAILABLE if local.result() is None else SCHEMA_MISS)
+        remote = asyncio.ensure_future(call(plan.fallback, reason))
+        pending = {remote} if done else {local, remote}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tier = plan.first if task is local else plan.fallback
+                    if ok(tier, task.result()):
+                        return task.result()
+            raise RuntimeError(f"{plan.first.model} and {plan.fallback.model} both failed")
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def _local_failed(workflow: str, error: Exception) -> None:
+    """A local-tier call raised (transport error, timeout, HTTP error): the tier is
+    unavailable for this item, so the caller escalates as LOCAL_UNAVAILABLE."""
+    logger.warning(f"{workflow}: {LOCAL.model} failed ({type(error).__name__}: {error}); escalating")
+
+
+def replay(rows: Iterable[Mapping[str, Any] | Invocation], policy: RoutingPolicy = RoutingPolicy(),
+           window: int = 100) -> dict[str, Any]:
+    """Re-run a routing policy over logged harness_invocations rows (oldest first).
+
+    Rows are grouped into items: a local call plus the escalation or hedge that
+    followed it, or a standalone remote call. For each item the policy decides
+    from the stats built so far, and the item's cost/latency under that
+    decision is estimated from the same stats. Returns totals for what
+    happened vs. what the policy would have done.
+    """
+    router = Router(policy=policy, stats=RoutingStats(window))
+    report = {"items": 0, "decisions": defaultdict(int),
+              "actual_cost": 0.0, "policy_cost": 0.0, "actual_latency_ms": 0.0, "policy_latency_ms": 0.0}
+    open_items: dict[str, list[Invocation]] = {}
+
+    def settle(item: list[Invocation]) -> None:
+        workflow = item[0].workflow
+        plan = router.plan(workflow)
+        kind = "hedge" if plan.hedge_after is not None else "local_first" if plan.first == LOCAL else "remote"
+        report["items"] += 1
+        report["decisions"][kind] += 1
+        actual_cost = sum(inv.cost_estimate for inv in item)
+        actual_latency = sum(inv.latency_ms for inv in item)
+        report["actual_cost"] += actual_cost
+        report["actual_latency_ms"] += actual_latency
+        tried_local = item[0].model == LOCAL.model
+        if (plan.first == LOCAL) == tried_local:
+            cost, latency = actual_cost, actual_latency
+        elif plan.first == REMOTE:
+            cost = router.stats.mean_cost(workflow, REMOTE) or actual_cost
+            latency = router.stats.latency_ms(workflow, REMOTE, 50) or actual_latency
+        else:
+            p = router.stats.local_success_rate(workflow) or 0.0
+            local_ms = router.stats.latency_ms(workflow, LOCAL, 50) or 0.0
+            cost = (1 - p) * actual_cost
+            latency = local_ms + (1 - p) * actual_latency
+        report["policy_cost"] += cost
+        report["policy_latency_ms"] += latency
+        for inv in item:
+            router.stats.observe(inv)
+
+    for row in rows:
+        inv = row if isinstance(row, Invocation) else Invocation.from_row(row)
+        if inv.cache_status in CACHE_HITS:
+            continue
+        item = open_items.get(inv.workflow)
+        if item is not None and inv.escalation_reason in LOCAL_FAILURES | {HEDGE}:
+            item.append(inv)
+            continue
+        if item is not None:
+            settle(open_items.pop(inv.workflow))
+        if inv.model == LOCAL.model:
+            open_items[inv.workflow] = [inv]
+        else:
+            settle([inv])
+    for item in open_items.values():
+        settle(item)
+    report["decisions"] = dict(report["decisions"])
+    return report
@@ -0,0 +1,334 @@
+"""Incremental JSON parsing with early schema validation for streamed completions.
+
+StreamingValidator is fed text as tokens arrive and raises SchemaViolation
+at the first character after which the output provably can't match the
+workflow's schema: a value of the wrong type, a key the schema forbids, a
+string that no longer prefixes any enum member, an array past maxItems, or
+plain invalid JSON. Requirements that only become decidable at the end of a
+container (required keys, minItems, integer-ness) are checked as it closes.
+
+Values at the `emit` path (e.g. ("action_items", "*")) are handed to
+`on_item` as soon as they close and validate, so a workflow can write each
+action item while the rest of the reply is still generating.
+
+Schemas are the JSON Schema subset pydantic's model_json_schema() produces
+for plain models: type (incl. lists of types), properties, required,
+additionalProperties, items, enum, minItems/maxItems, anyOf, and local
+$ref into $defs.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+_NUMBER = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?")
+_NUMBER_PREFIX = re.compile(r"-?(0|[1-9]\d*)?(\.\d*)?([eE][+-]?\d*)?")
+_LITERALS = {"true": True, "false": False, "null": None}
+_STARTS = {"{": "object", "[": "array", '"': "string", "t": "boolean", "f": "boolean", "n": "null"}
+_FENCE = "```json"
+
+
+class SchemaViolation(ValueError):
+    """The streamed output can't match the schema (or isn't JSON). `path` locates the offending value."""
+
+    def __init__(self, path: tuple, message: str):
+        self.path = path
+        self.partial = None  # Completion for the aborted stream, set by the gateway
+        where = "/".join(str(p) for p in path) or "<root>"
+        super().__init__(f"{where}: {message}")
+
+
+@dataclass
+class _Frame:
+    kind: str                    # "object" | "array"
+    schema: dict | None
+    path: tuple
+    start: int                   # offset of the opening bracket in the text
+    keys: set = field(default_factory=set)
+    key: str | None = None       # object: key whose value comes next
+    count: int = 0               # array: elements so far
+
+
+class StreamingValidator:
+    def __init__(self, schema: dict | None, *, emit: tuple | None = None,
+                 on_item: Callable[[Any], None] | None = None):
+        self.root_schema = schema or {}
+        self.emit = emit
+        self.on_item = on_item
+        self.text = ""
+        self.items = 0
+        self._stack: list[_Frame] = []
+        self._mode = "preamble"        # preamble | value | string | literal | after | key | colon | done
+        self._preamble = ""
+        self._value_start = 0
+        self._value_schema: dict | None = None
+        self._string_is_key = False
+        self._chars: list[str] = []
+        self._escape = 0               # 1 after a backslash; 2 while reading \uXXXX
+        self._hex = ""
+        self._root_start = 0
+        self._root_end: int | None = None
+
+    # ── public ──
+
+    def feed(self, chunk: str) -> None:
+        for ch in chunk:
+            self.text += ch
+            self._step(ch)
+
+    def close(self) -> Any:
+        """The complete document. Raises SchemaViolation if the stream ended early."""
+        if self._mode == "literal":
+            self._finish_literal(len(self.text))
+        if self._root_end is None:
+            raise SchemaViolation(self._path(), "output ended before the JSON value closed")
+        return json.loads(self.text[self._root_start:self._root_end])
+
+    @property
+    def done(self) -> bool:
+        return self._root_end is not None
+
+    # ── schema helpers ──
+
+    def _resolve(self, schema: dict | None) -> dict | None:
+        while schema and "$ref" in schema:
+            name = schema["$ref"].rsplit("/", 1)[-1]
+            schema = self.root_schema.get("$defs", {}).get(name)
+        return schema
+
+    def _branch(self, schema: dict | None, kind: str, path: tuple) -> dict | None:
+        """Pick the schema (or anyOf branch) that admits a value starting as `kind`."""
+        schema = self._resolve(schema)
+        if not schema:
+            return None
+        if "anyOf" in schema:
+            for option in schema["anyOf"]:
+                option = self._resolve(option)
+                if _admits(option, kind):
+                    return option
+            raise SchemaViolation(path, f"{kind} matches none of the allowed types")
+        if not _admits(schema, kind):
+            raise SchemaViolation(path, f"expected {schema.get('type')}, got {kind}")
+        return schema
+
+    def _path(self) -> tuple:
+        if not self._stack:
+            return ()
+        top = self._stack[-1]
+        return top.path + ((top.key,) if top.kind == "object" and top.key is not None else
+                           (top.count,) if top.kind == "array" else ())
+
+    def _child_schema(self, frame: _Frame) -> dict | None:
+        schema = frame.schema
+        if not schema:
+            return None
+        if frame.kind == "array":
+            return schema.get("items")
+        props = schema.get("properties", {})
+        if frame.key in props:
+            return props[frame.key]
+        extra = schema.get("additionalProperties")
+        return extra if isinstance(extra, dict) else None
+
+    # ── state machine ──
+
+    def _step(self, ch: str) -> None:
+        mode = self._mode
+        if mode == "string":
+            self._string_char(ch)
+        elif mode == "literal":
+            if ch in ",]}" or ch.isspace():
+                self._finish_literal(len(self.text) - 1)
+                self._step(ch)
+            else:
+                self._chars.append(ch)
+                self._check_literal_prefix()
+        elif ch.isspace() or mode == "done":
+            return
+        elif mode == "preamble":
+            if ch in "{[":
+                self._root_start = len(self.text) - 1
+                self._mode = "value"
+                self._start_value(ch, self.root_schema)
+            else:
+                self._preamble += ch
+                if not _FENCE.startswith(self._preamble.strip()):
+                    raise SchemaViolation((), f"output doesn't start with JSON: {self._preamble[:40]!r}")
+        elif mode == "value":
+            frame = self._stack[-1] if self._stack else None
+            if frame and frame.kind == "array" and ch == "]" and frame.count == 0:
+                self._close_container(ch)
+                return
+            self._start_value(ch, self._child_schema(frame) if frame else self.root_schema)
+        elif mode == "key":
+            frame = self._stack[-1]
+            if ch == "}" and not frame.keys:
+                self._close_container(ch)
+            elif ch == '"':
+                self._mode, self._string_is_key, self._chars = "string", True, []
+            else:
+                raise SchemaViolation(frame.path, f"expected a key, got {ch!r}")
+        elif mode == "colon":
+            if ch != ":":
+                raise SchemaViolation(self._path(), f"expected ':', got {ch!r}")
+            self._mode = "value"
+        elif mode == "after":
+            frame = self._stack[-1]
+            if ch == ",":
+                if frame.kind == "object":
+                    frame.key, self._mode = None, "key"
+                else:
+                    frame.count += 1
+                    self._check_max_items(frame)
+                    self._mode = "value"
+            elif ch == ("}" if frame.kind == "object" else "]"):
+                if frame.kind == "array":
+                    frame.count += 1
+                self._close_container(ch)
+            else:
+                raise SchemaViolation(self._path(), f"unexpected {ch!r}")
+
+    def _start_value(self, ch: str, schema: dict | None) -> None:
+        path = self._path()
+        kind = _STARTS.get(ch) or ("number" if ch == "-" or ch.isdigit() else None)
+        if kind is None:
+            raise SchemaViolation(path, f"unexpected {ch!r}")
+        schema = self._branch(schema, kind, path)
+        self._value_start = len(self.text) - 1
+        self._value_schema = schema
+        if kind in ("object", "array"):
+            self._stack.append(_Frame(kind, schema, path, self._value_start))
+            self._mode = "key" if kind == "object" else "value"
+        elif kind == "string":
+            self._mode, self._string_is_key, self._chars = "string", False, []
+        else:
+            self._mode, self._chars = "literal", [ch]
+            self._check_literal_prefix()
+
+    def _string_char(self, ch: str) -> None:
+        if self._escape == 1:
+            self._escape = 2 if ch == "u" else 0
+            if ch not in 'u"\\/bfnrt':
+                raise SchemaViolation(self._path(), f"invalid escape \\{ch}")
+            if ch != "u":
+                self._chars.append(json.loads(f'"\\{ch}"'))
+                self._check_enum_prefix_if_value()
+            return
+        if self._escape >= 2:
+            if ch not in "0123456789abcdefABCDEF":
+                raise SchemaViolation(self._path(), "invalid \\u escape")
+            self._hex += ch
+            if len(self._hex) < 4:
+                return
+            self._chars.append(chr(int(self._hex, 16)))
+            self._escape, self._hex = 0, ""
+            self._check_enum_prefix_if_value()
+            return
+        if ch == "\\":
+            self._escape = 1
+        elif ch == '"':
+            self._finish_string()
+        elif ch < " ":
+            raise SchemaViolation(self._path(), "unescaped control character in string")
+        else:
+            self._chars.append(ch)
+            self._check_enum_prefix_if_value()
+
+    def _finish_string(self) -> None:
+        text = "".join(self._chars)
+        if self._string_is_key:
+            frame = self._stack[-1]
+            schema = frame.schema or {}
+            if schema.get("additionalProperties") is False and text not in schema.get("properties", {}):
+                raise SchemaViolation(frame.path, f"unexpected key {text!r}")
+            frame.key = text
+            frame.keys.add(text)
+            self._mode = "colon"
+            return
+        enum = (self._value_schema or {}).get("enum")
+        if enum is not None and text not in enum:
+            raise SchemaViolation(self._path(), f"{text!r} not in {enum}")
+        self._value_done(len(self.text))
+
+    def _check_enum_prefix_if_value(self) -> None:
+        if self._string_is_key:
+            return
+        prefix = "".join(self._chars)
+        enum = (self._value_schema or {}).get("enum")
+        if enum is not None and not any(isinstance(v, str) and v.startswith(prefix) for v in enum):
+            raise SchemaViolation(self._path(), f"{prefix!r}… can't match any of {enum}")
+
+    def _check_literal_prefix(self) -> None:
+        token = "".join(self._chars)
+        if token[0] in "tfn":
+            if not any(word.startswith(token) for word in _LITERALS):
+                raise SchemaViolation(self._path(), f"invalid literal {token!r}")
+        elif not _NUMBER_PREFIX.fullmatch(token):
+            raise SchemaViolation(self._path(), f"invalid number {token!r}")
+
+    def _finish_literal(self, end: int) -> None:
+        token = "".join(self._chars)
+        path = self._path()
+        if token in _LITERALS:
+            value = _LITERALS[token]
+        elif _NUMBER.fullmatch(token):
+            value = json.loads(token)
+            types = _types(self._value_schema)
+            if types and "number" not in types and "integer" in types and value != int(value):
+                raise SchemaViolation(path, f"expected integer, got {token}")
+        else:
+            raise SchemaViolation(path, f"invalid literal {token!r}")
+        enum = (self._value_schema or {}).get("enum")
+        if enum is not None and value not in enum:
+            raise SchemaViolation(path, f"{token} not in {enum}")
+        self._value_done(end)
+
+    def _check_max_items(self, frame: _Frame) -> None:
+        limit = (frame.schema or {}).get("maxItems")
+        if limit is not None and frame.count >= limit:
+            raise SchemaViolation(frame.path, f"more than maxItems={limit}")
+
+    def _close_container(self, ch: str) -> None:
+        frame = self._stack.pop()
+        schema = frame.schema or {}
+        if frame.kind == "object":
+            missing = [k for k in schema.get("required", []) if k not in frame.keys]
+            if missing:
+                raise SchemaViolation(frame.path, f"missing required {missing}")
+        elif frame.count < schema.get("minItems", 0):
+            raise SchemaViolation(frame.path, f"fewer than minItems={schema['minItems']}")
+        elif frame.count > schema.get("maxItems", frame.count):
+            raise SchemaViolation(frame.path, f"more than maxItems={schema['maxItems']}")
+        self._value_start = frame.start
+        self._value_done(len(self.text))
+
+    def _value_done(self, end: int) -> None:
+        """The value spanning text[_value_start:end] closed and validated."""
+        path = self._path()
+        if self._stack:
+            self._mode = "after"
+        else:
+            self._root_end, self._mode = end, "done"
+        if self.on_item and self.emit and _matches(self.emit, path):
+            self.items += 1
+            self.on_item(json.loads(self.text[self._value_start:end]))
+
+
+def _types(schema: dict | None) -> list[str]:
+    if not schema or "type" not in schema:
+        return []
+    return [schema["type"]] if isinstance(schema["type"], str) else list(schema["type"])
+
+
+def _admits(schema: dict | None, kind: str) -> bool:
+    types = _types(schema)
+    if not types:
+        return True
+    return kind in types or (kind == "number" and "integer" in types)
+
+
+def _matches(pattern: tuple, path: tuple) -> bool:
+    return len(pattern) == len(path) and all(p == "*" or p == q for p, q in zip(pattern, path))
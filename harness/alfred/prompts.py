@@ -0,0 +1,135 @@
+"""Prompt registry: every prompts/<workflow>/v<N>.md parsed and validated once,
+at startup, instead of read from disk on every call.
+
+A prompt file is optional YAML frontmatter followed by the system prompt:
+
+    ---
+    model: sonnet          # tier the version was written for (ollama | sonnet | opus)
+    cache: true            # let providers cache the static prefix (default true)
+    variables: [contact]   # names the body fills in per call as {{contact}}
+    ---
+    # Prompt: crm_rollup v2
+    ...
+
+Everything before the first {{variable}} is the static prefix. It is built
+once per version and handed out as the stable part of a SystemPrompt, so
+Claude calls mark it with a cache breakpoint; only the tail after it is
+rendered per call. Put per-call variables as late in the file as possible.
+
+A frontmatter error, an undeclared or unused variable, or a file not named
+v<N>.md fails the load, listing every bad file, so a broken prompt stops the
+runner at startup rather than mid-queue.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+
+from alfred.models.base import SystemPrompt
+from alfred.models.routing import TIERS
+
+PROMPTS_DIR = Path(__file__).resolve().parents[1] / "prompts"
+
+_VERSION_FILE = re.compile(r"v\d+\.md")
+_FRONTMATTER = re.compile(r"\A---\n(.*?)\n---\n", re.DOTALL)
+_VARIABLE = re.compile(r"\{\{\s*([A-Za-z_]\w*)\s*\}\}")
+_KEYS = frozenset({"model", "cache", "variables"})
+
+
+class PromptError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Prompt:
+    workflow: str
+    version: str
+    prefix: str               # static instructions, identical on every call
+    tail: str                 # from the first {{variable}} on; rendered per call
+    variables: tuple[str, ...] = ()
+    model: str | None = None
+    cache: bool = True
+    static: SystemPrompt | None = field(default=None, repr=False, compare=False)  # built once when no variables
+
+    def render(self, **values: str) -> str:
+        """The system prompt with `values` filled in; a SystemPrompt when caching is on."""
+        if set(values) != set(self.variables):
+            raise PromptError(f"{self.workflow}/{self.version}: expected variables {sorted(self.variables)}, "
+                              f"got {sorted(values)}")
+        tail = _VARIABLE.sub(lambda m: str(values[m.group(1)]), self.tail)
+        if not self.cache:
+            return self.prefix + tail
+        return self.static if self.static is not None else SystemPrompt(self.prefix, tail)
+
+
+def parse(path: Path) -> Prompt:
+    """One prompt file → Prompt. Raises PromptError on anything invalid."""
+    if not _VERSION_FILE.fullmatch(path.name):
+        raise PromptError(f"{path}: prompt files are named v<N>.md")
+    text = path.read_text()
+    meta: dict = {}
+    match = _FRONTMATTER.match(text)
+    if match:
+        try:
+            meta = yaml.safe_load(match.group(1)) or {}
+        except yaml.YAMLError as e:
+            raise PromptError(f"{path}: bad frontmatter: {e}") from e
+        if not isinstance(meta, dict):
+            raise PromptError(f"{path}: frontmatter must be a mapping")
+        text = text[match.end():]
+    unknown = set(meta) - _KEYS
+    if unknown:
+        raise PromptError(f"{path}: unknown frontmatter keys {sorted(unknown)}")
+    if meta.get("model") is not None and meta["model"] not in TIERS:
+        raise PromptError(f"{path}: model must be one of {sorted(TIERS)}")
+    if not isinstance(meta.get("cache", True), bool):
+        raise PromptError(f"{path}: cache must be true or false")
+    declared = meta.get("variables") or []
+    if not (isinstance(declared, list) and all(isinstance(v, str) for v in declared)):
+        raise PromptError(f"{path}: variables must be a list of names")
+
+    body = text.strip() + "\n"
+    if not body.strip():
+        raise PromptError(f"{path}: empty prompt")
+    used = _VARIABLE.findall(body)
+    if set(used) != set(declared):
+        raise PromptError(f"{path}: variables used {sorted(set(used))} but declared {sorted(declared)}")
+    first = _VARIABLE.search(body)
+    split = first.start() if first else len(body)
+    cache = meta.get("cache", True)
+    return Prompt(path.parent.name, path.stem, body[:split], body[split:], tuple(declared), meta.get("model"),
+                  cache, static=SystemPrompt(body) if cache and not declared else None)
+
+
+class PromptRegistry:
+    def __init__(self, root: str | Path = PROMPTS_DIR):
+        self.root = Path(root)
+        self._prompts: dict[tuple[str, str], Prompt] = {}
+
+    def load(self) -> "PromptRegistry":
+        """Parse every prompt under root; raise one PromptError listing every bad file."""
+        prompts, errors = {}, []
+        for path in sorted(self.root.glob("*/*.md")):
+            try:
+                prompt = parse(path)
+            except PromptError as e:
+                errors.append(str(e))
+                continue
+            prompts[(prompt.workflow, prompt.version)] = prompt
+        if errors:
+            raise PromptError("invalid prompts:\n" + "\n".join(errors))
+        self._prompts = prompts
+        return self
+
+    def get(self, workflow: str, version: str) -> Prompt:
+        try:
+            return self._prompts[(workflow, version)]
+        except KeyError:
+            raise PromptError(f"no prompt {workflow}/{version}.md under {self.root}") from None
+
+    def versions(self, workflow: str) -> list[str]:
+        return sorted((v for w, v in self._prompts if w == workflow), key=lambda v: int(v[1:]))
@@ -1,15 +1,443 @@
 """Main poll loop. Polls all project queues, dispatches by `type` field to the
-matching workflow, persists results, alerts via Telegram on completion.
+matching workflow, persists results.
 
-Phase 4 scaffold — implementation TBD. See README.md.
+Layout (one event loop, no threads of our own):
+
+    Poller(deepops research_requests) ┐
+    Poller(ab research_requests)      ├─ claim → Dispatcher ─ lane per workflow
+    Poller(meetings ×2)               │            (semaphore = concurrency,
+    Poller(thesis inbox_messages)     ┘             bounded backlog)
+
+Each source has its own poller: it polls again at once while full pages keep
+arriving, and doubles its interval (with jitter) up to poll_max_seconds while
+the source is quiet. Every workflow has its own lane, so a slow Claude-backed
+memo only ever waits on other memos — todo_extract items keep flowing. A
+poller claims per open lane, each page capped at that lane's remaining
+backlog, so nothing is claimed that can't start soon.
+
+With ALFRED_PUSH=1, sources that can listen (Firestore on_snapshot,
+Supabase realtime) publish "work arrived" events into one EventStream; the
+runner consumes it and wakes that source's poller, so items are claimed
+within milliseconds. Claiming itself stays in the poller — events are
+hints, the claim is still atomic — and idle polling slows to
+reconcile_seconds, just catching anything a listener missed.
+
+SIGINT/SIGTERM stop the pollers, give in-flight work shutdown_grace_seconds
+to finish, then cancel the rest and hand those items back to their queues.
+
+With a WorkJournal (alfred.journal), every claimed item and its outcome is
+journaled locally before the source is updated. On startup, before any
+polling, the runner re-runs what a killed process left in flight — from
+their step checkpoints, through the normal lanes at full concurrency — and
+writes back outcomes it journaled but never recorded. Redelivered items
+that already completed are dropped.
 """
 
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import signal
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Collection, Iterable, Protocol
+
+from alfred.config import Config
+from alfred.context import Context
+from alfred.journal import COMPLETED, UNFINISHED, WorkJournal, current_key
+from alfred.workflows import load as load_workflows
+from alfred.workflows.base import WorkItem, Workflow
+
+logger = logging.getLogger(__name__)
+
+
+class Source(Protocol):
+    """A work queue. Sources that can push may also define
+    `async listen(notify) -> async unsubscribe`; see EventStream."""
+    name: str
+
+    async def claim(self, types: Collection[str], limit: int) -> list[WorkItem]: ...
+    async def complete(self, item: WorkItem, result: dict[str, Any]) -> None: ...
+    async def fail(self, item: WorkItem, error: str) -> None: ...
+    async def release(self, item: WorkItem) -> None: ...
+
+
+class EventStream:
+    """Unified async stream of "source has new work" events from every listener.
+
+    Listeners publish from any thread (firebase-admin calls back on its watch
+    thread). Repeat events for a source that hasn't been consumed yet
+    collapse into one, so a burst of inserts wakes its poller once.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._pending: set[str] = set()
+
+    def publisher(self, source_name: str) -> Callable[[], None]:
+        return lambda: self._loop.call_soon_threadsafe(self._publish, source_name)
+
+    def _publish(self, source_name: str) -> None:
+        if source_name not in self._pending:
+            self._pending.add(source_name)
+            self._queue.put_nowait(source_name)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        while True:
+            source_name = await self._queue.get()
+            self._pending.discard(source_name)
+            yield source_name
+
+
+# ─── Dispatch ─────────────────────────────────────────────────────────────
+
+@dataclass
+class Lane:
+    """One workflow's slice of the runner: its concurrency and backlog limits."""
+    workflow: Workflow
+    concurrency: int
+    backlog: int
+    semaphore: asyncio.Semaphore = field(init=False)
+    pending: int = 0  # claimed and not yet finished, running or waiting
+
+    def __post_init__(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+
+    @property
+    def room(self) -> int:
+        return max(0, self.backlog - self.pending)
+
+    @property
+    def has_room(self) -> bool:
+        return self.room > 0
+
+
+class Dispatcher:
+    """Routes claimed items to per-workflow lanes and records the outcome."""
+
+    def __init__(self, workflows: Iterable[Workflow], sources: dict[str, Source], config: Config,
+                 journal: WorkJournal | None = None):
+        self.sources = sources
+        self.journal = journal
+        self.lanes: dict[str, Lane] = {}
+        self._by_type: dict[str, Lane] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._running: set[str] = set()  # journal keys submitted and not yet finished
+        self.stats = {"duplicates": 0, "resumed": 0, "rerecorded": 0}
+        for workflow in workflows:
+            lane = Lane(
+                workflow,
+                concurrency=max(1, config.concurrency.get(workflow.name, workflow.concurrency)),
+                backlog=max(1, config.lane_backlog),
+            )
+            self.lanes[workflow.name] = lane
+            for item_type in workflow.handles:
+                if item_type in self._by_type:
+                    raise ValueError(f"type {item_type!r} handled by both "
+                                     f"{self._by_type[item_type].workflow.name} and {workflow.name}")
+                self._by_type[item_type] = lane
+
+    def open_lanes(self) -> list[tuple[tuple[str, ...], int]]:
+        """(item types, room) for every lane that can take more work right now."""
+        return [(lane.workflow.handles, lane.room) for lane in self.lanes.values() if lane.has_room]
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def submit(self, item: WorkItem, key: str | None = None) -> None:
+        lane = self._by_type.get(item.type)
+        if lane is None:
+            # Sources only claim handled types; reaching here is a source bug
+            logger.error(f"{item.key}: no workflow handles type {item.type!r}; releasing")
+            self._spawn(self.sources[item.source].release(item))
+            return
+        if self.journal:
+            key = key or self.journal.key(item)
+            if key in self._running:
+                self.stats["duplicates"] += 1
+                logger.info(f"{item.key}: already running; dropping duplicate delivery")
+                return
+            if self.journal.state(key) == COMPLETED:
+                self.stats["duplicates"] += 1
+                logger.info(f"{item.key}: already completed; recording the journaled result")
+                self._spawn(self._record(self.sources[item.source].complete(item, self.journal.result(key)), item, key))
+                return
+            self.journal.claim(key, item, lane.workflow.name)
+            self._running.add(key)
+        lane.pending += 1
+        self._spawn(self._run(lane, item, key), name=f"{lane.workflow.name}:{item.key}")
+
+    def _spawn(self, coro, name: str | None = None) -> None:
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, lane: Lane, item: WorkItem, key: str | None = None) -> None:
+        source = self.sources[item.source]
+        name = lane.workflow.name
+        try:
+            async with lane.semaphore:
+                logger.info(f"{name}: start {item.key}")
+                if key:
+                    self.journal.start(key)
+                    current_key.set(key)  # this task's context: Workflow.step() checkpoints under it
+                result = await lane.workflow.run(item)
+        except asyncio.CancelledError:
+            # Waiting for a slot or mid-run at shutdown: not failed, just unfinished
+            logger.warning(f"{name}: cancelled {item.key}; returning it to the queue")
+            if key:
+                self.journal.release(key)
+            await asyncio.shield(source.release(item))
+            raise
+        except Exception as e:
+            logger.exception(f"{name}: failed {item.key}")
+            error = f"{type(e).__name__}: {e}"
+            if key:
+                self.journal.fail(key, error)
+            await self._record(source.fail(item, error), item, key)
+        else:
+            if key:
+                self.journal.complete(key, result)
+            await self._record(source.complete(item, result), item, key)
+            logger.info(f"{name}: done {item.key}")
+        finally:
+            lane.pending -= 1
+            self._running.discard(key)
+
+    async def _record(self, update, item: WorkItem, key: str | None = None) -> None:
+        try:
+            await update
+        except Exception:
+            # The item stays claimed; the journal retries the write-back on the next start
+            logger.exception(f"{item.key}: could not record outcome")
+        else:
+            if key:
+                self.journal.recorded(key)
+
+    def recover(self) -> None:
+        """Resume what a previous process left in flight; re-send outcomes it never recorded."""
+        if not self.journal:
+            return
+        for key, state, item in self.journal.pending():
+            source = self.sources.get(item.source)
+            if source is None:
+                logger.warning(f"{item.key}: left {state} by a previous run, but its source isn't configured")
+            elif state in UNFINISHED:
+                self.stats["resumed"] += 1
+                logger.info(f"{item.key}: resuming ({self.journal.checkpoints(key)} step(s) checkpointed)")
+                self.submit(item, key)
+            else:
+                self.stats["rerecorded"] += 1
+                outcome = (source.complete(item, self.journal.result(key)) if state == COMPLETED
+                           else source.fail(item, self.journal.error(key) or "failed"))
+                self._spawn(self._record(outcome, item, key))
+
+    async def drain(self, timeout: float) -> None:
+        """Wait up to `timeout` for in-flight items, then cancel the rest."""
+        if not self._tasks:
+            return
+        logger.info(f"Waiting up to {timeout:.0f}s for {len(self._tasks)} in-flight item(s)")
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+# ─── Polling ──────────────────────────────────────────────────────────────
+
+class Poller:
+    """Claims work from one source on an adaptive interval."""
+
+    def __init__(self, source: Source, dispatcher: Dispatcher, config: Config, pushed: bool = False):
+        self.source = source
+        self.dispatcher = dispatcher
+        self.min_interval = config.poll_min_seconds
+        # A pushed source only needs polling to reconcile missed events
+        ceiling = config.reconcile_seconds if pushed else config.poll_max_seconds
+        self.max_interval = max(config.poll_min_seconds, ceiling)
+        self.batch = max(1, config.poll_batch)
+        self.interval = self.min_interval
+        self._wake = asyncio.Event()
+
+    def wake(self) -> None:
+        """Poll now instead of waiting out the current interval."""
+        self._wake.set()
+
+    async def poll_once(self) -> float:
+        """Claim a page per open lane and submit them; returns seconds to wait before the next poll."""
+        lanes = self.dispatcher.open_lanes()
+        if not lanes:
+            # Every lane is full: check back soon, but don't count it as idle
+            return self.min_interval
+        # Never claim past a lane's backlog: a lane one short of full takes one item, not a page
+        limits = [min(self.batch, room) for _, room in lanes]
+        pages = await asyncio.gather(*(self._claim(types, limit) for (types, _), limit in zip(lanes, limits)))
+
+        for items in pages:
+            for item in items:
+                self.dispatcher.submit(item)
+
+        if any(len(items) >= limit for items, limit in zip(pages, limits)):
+            self.interval = self.min_interval
+            return 0.0  # more is probably waiting
+        if any(pages):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * 2)
+        return self.interval * random.uniform(0.8, 1.2)
+
+    async def _claim(self, types: Collection[str], limit: int) -> list[WorkItem]:
+        try:
+            return await self.source.claim(types, limit)
+        except Exception:
+            logger.exception(f"{self.source.name}: claim failed")
+            return []
+
+    async def run(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            # Clear before claiming: a push landing mid-claim must trigger another poll
+            self._wake.clear()
+            delay = await self.poll_once()
+            if delay <= 0:
+                continue
+            stop_wait = asyncio.ensure_future(stop.wait())
+            wake_wait = asyncio.ensure_future(self._wake.wait())
+            await asyncio.wait({stop_wait, wake_wait}, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in (stop_wait, wake_wait):
+                waiter.cancel()
+            if self._wake.is_set():
+                self.interval = self.min_interval
+
+
+# ─── Runner ───────────────────────────────────────────────────────────────
+
+def build_sources(config: Config) -> list[Source]:
+    """Every queue Alfred reads, skipping projects whose credentials aren't set."""
+    from alfred.tools.firestore import InboxQueue
+    from alfred.tools.supabase import SupabaseQueue
+
+    sources: list[Source] = []
+    projects = {
+        "deepops": (config.supabase_url, config.supabase_service_key),
+        "ab": (config.ab_supabase_url, config.ab_supabase_service_key),
+    }
+    for project, (url, key) in projects.items():
+        if not (url and key):
+            logger.warning(f"{project}: Supabase credentials not set; skipping its queues")
+            continue
+        window = config.supabase_write_window_ms / 1000
+        sources.append(SupabaseQueue(f"{project}:research_requests", url, key, "research_requests",
+                                     write_window=window))
+        sources.append(SupabaseQueue(f"{project}:meetings", url, key, "meetings", fixed_type="meeting_transcript",
+                                     write_window=window))
+
+    if config.firebase_admin_credentials and config.firebase_uid:
+        sources.append(InboxQueue("thesis:inbox_messages", config.firebase_admin_credentials, config.firebase_uid))
+    else:
+        logger.warning("FIREBASE_ADMIN_CREDENTIALS / FIREBASE_UID not set; skipping inbox_messages")
+    return sources
+
+
+def _can_listen(source: Source) -> bool:
+    return callable(getattr(source, "listen", None))
+
+
+class Runner:
+    def __init__(self, config: Config, sources: list[Source], workflows: Iterable[Workflow],
+                 journal: WorkJournal | None = None):
+        self.config = config
+        self.dispatcher = Dispatcher(workflows, {s.name: s for s in sources}, config, journal)
+        self.pollers = {
+            source.name: Poller(source, self.dispatcher, config, pushed=config.push and _can_listen(source))
+            for source in sources
+        }
+        self._stop = asyncio.Event()
+
+    def stop(self) -> None:
+        if not self._stop.is_set():
+            logger.info("Shutdown requested")
+            self._stop.set()
+
+    async def _subscribe(self, stream: EventStream) -> list[Callable[[], Awaitable[None]]]:
+        unsubscribes = []
+        for name, poller in self.pollers.items():
+            if not _can_listen(poller.source):
+                continue
+            try:
+                unsubscribes.append(await poller.source.listen(stream.publisher(name)))
+                logger.info(f"{name}: listening for pushes")
+            except Exception:
+                # Polling still covers this source, just at reconcile pace
+                logger.exception(f"{name}: could not subscribe; falling back to polling")
+                poller.max_interval = max(poller.min_interval, self.config.poll_max_seconds)
+        return unsubscribes
+
+    async def _consume(self, stream: EventStream) -> None:
+        async for source_name in stream:
+            self.pollers[source_name].wake()
+
+    async def run(self) -> None:
+        lanes = ", ".join(f"{name}×{lane.concurrency}" for name, lane in self.dispatcher.lanes.items())
+        logger.info(f"Alfred up: {len(self.pollers)} source(s), lanes: {lanes or 'none'}, "
+                    f"push {'on' if self.config.push else 'off'}")
+        self.dispatcher.recover()
+        events = None
+        unsubscribes = []
+        if self.config.push:
+            stream = EventStream()
+            unsubscribes = await self._subscribe(stream)
+            events = asyncio.create_task(self._consume(stream), name="events")
+        pollers = [asyncio.create_task(p.run(self._stop), name=f"poll:{name}") for name, p in self.pollers.items()]
+        try:
+            await self._stop.wait()
+        finally:
+            self._stop.set()
+            for unsubscribe in unsubscribes:
+                try:
+                    await unsubscribe()
+                except Exception:
+                    logger.exception("Unsubscribe failed")
+            if events:
+                events.cancel()
+            await asyncio.gather(*pollers, *filter(None, [events]), return_exceptions=True)
+            await self.dispatcher.drain(self.config.shutdown_grace_seconds)
+            for source in self.dispatcher.sources.values():
+                flush = getattr(source, "flush", None)  # sources that batch their status writes
+                if flush:
+                    await flush()
+            logger.info("Alfred stopped")
+
+
+async def _main(config: Config) -> None:
+    ctx = Context(config=config)
+    ctx.router.stats.warm(await ctx.invocations.recent())
+    workflows = [cls(ctx) for cls in load_workflows()]
+    for workflow in workflows:
+        ctx.prompts.get(workflow.name, workflow.prompt_version)  # fail at startup, not on the first item
+    if not workflows:
+        logger.warning("No workflows registered yet; pollers will claim nothing")
+    runner = Runner(config, build_sources(config), workflows, ctx.journal)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, runner.stop)
+    try:
+        await runner.run()
+    finally:
+        logger.info(f"ollama: {ctx.ollama.metrics()}")
+        await ctx.aclose()
+
 
 def main() -> None:
-    raise NotImplementedError(
-        "Phase 4 not started. See harness/README.md + "
-        "docs/handoffs/harness_phase4_2026-05-14.md"
+    config = Config.from_env()
+    logging.basicConfig(
+        level=config.log_level,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     )
+    asyncio.run(_main(config))
 
 
 if __name__ == "__main__":
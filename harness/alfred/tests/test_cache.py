@@ -0,0 +1,82 @@
+"""Tests for the response cache and the gateway's cache/logging path."""
+
+import asyncio
+
+from alfred.invocations import InvocationLog
+from alfred.models.base import Completion
+from alfred.models.cache import ResponseCache, input_text
+from alfred.models.gateway import ModelGateway
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        self.calls += 1
+        return Completion(text=f"answer {self.calls}", model=model, input_tokens=100, output_tokens=20)
+
+
+def ask(gateway, content, *, version="v1", semantic=False):
+    return asyncio.run(gateway.complete(
+        "memo", version, [{"role": "user", "content": content}],
+        provider="claude", model="claude-sonnet-4-6", semantic=semantic,
+    ))
+
+
+def make(tmp_path, **kwargs):
+    client, log = CountingClient(), InvocationLog()
+    cache = ResponseCache(tmp_path / "cache.sqlite", **kwargs)
+    return ModelGateway({"claude": client}, log, cache), client, log
+
+
+def test_normalization_ignores_whitespace_differences():
+    a = input_text([{"role": "user", "content": "Buy  milk\n"}], None, None)
+    b = input_text([{"role": "user", "content": " Buy milk"}], None, None)
+    assert a == b
+
+
+def test_exact_hit_skips_the_provider_and_is_logged(tmp_path):
+    gateway, client, log = make(tmp_path)
+    first = ask(gateway, "summarize this transcript")
+    second = ask(gateway, "summarize   this transcript")
+    assert client.calls == 1
+    assert (first.cache, second.cache) == ("miss", "exact")
+    assert second.text == first.text
+    assert log.cache_counts == {"miss": 1, "exact": 1}
+    assert log.cost > 0 and log.cache_hit_rate == 0.5
+
+
+def test_prompt_version_bump_invalidates(tmp_path):
+    gateway, client, _ = make(tmp_path)
+    ask(gateway, "same input")
+    assert ask(gateway, "same input", version="v2").cache == "miss"
+    assert ask(gateway, "same input", version="v1").cache == "miss"   # v1 entries were purged
+    assert client.calls == 3
+
+
+def test_near_duplicate_hit_uses_embeddings(tmp_path):
+    vectors = {"journal entry one": [1.0, 0.0, 0.0], "journal entry one!": [0.99, 0.05, 0.0],
+               "something else": [0.0, 1.0, 0.0]}
+
+    async def embed(text):
+        return next(v for k, v in vectors.items() if text.endswith(k))
+
+    gateway, client, _ = make(tmp_path, embedder=embed, similarity=0.97)
+    ask(gateway, "journal entry one", semantic=True)
+    assert ask(gateway, "journal entry one!", semantic=True).cache == "semantic"
+    assert ask(gateway, "something else", semantic=True).cache == "miss"
+    assert client.calls == 2
+
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path):
+    gateway, client, _ = make(tmp_path, max_bytes=400)   # ~165 bytes per entry
+    ask(gateway, "a")
+    ask(gateway, "b")
+    ask(gateway, "a")            # touch a so b is least recent
+    ask(gateway, "c")            # pushes the file over max_bytes
+    assert gateway.cache._bytes <= 400
+    calls = client.calls
+    assert ask(gateway, "a").cache == "exact"
+    assert ask(gateway, "b").cache == "miss"
+    assert client.calls == calls + 1
@@ -0,0 +1,96 @@
+"""Tests for alfred.tools.http. The pool tests run against a local stub server."""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from alfred.tools.http import HttpPool, HttpSettings, RetryBudget
+
+
+def test_retry_budget_limits_retries_to_a_fraction_of_traffic():
+    budget = RetryBudget(ratio=0.25, min_per_second=0.0, cap=2.0)
+    budget.tokens = 0.0
+    for _ in range(4):
+        budget.deposit()
+    assert budget.try_spend()          # 4 requests × 0.25 → one retry
+    assert not budget.try_spend()
+
+
+def test_retry_budget_is_capped():
+    budget = RetryBudget(ratio=1.0, min_per_second=0.0, cap=3.0)
+    for _ in range(100):
+        budget.deposit()
+    assert sum(budget.try_spend() for _ in range(10)) == 3
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    failures_left = 0
+    connections = set()
+
+    def do_GET(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        StubHandler.connections.add(self.client_address)
+        if StubHandler.failures_left > 0:
+            StubHandler.failures_left -= 1
+            status, body = 503, b"busy"
+        else:
+            status, body = 200, b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_PUT = do_POST = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StubHandler.connections = set()
+    StubHandler.failures_left = 0
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_pool_reuses_one_connection(stub_url):
+    pytest.importorskip("httpx")
+
+    async def scenario():
+        pool = HttpPool()
+        try:
+            for _ in range(5):
+                response = await pool.request("GET", f"{stub_url}/api/wikis/x")
+                assert response.status_code == 200
+        finally:
+            await pool.aclose()
+
+    asyncio.run(scenario())
+    assert len(StubHandler.connections) == 1
+
+
+def test_pool_retries_idempotent_requests_only(stub_url):
+    pytest.importorskip("httpx")
+
+    async def scenario():
+        pool = HttpPool(HttpSettings(backoff_base=0.01))
+        try:
+            StubHandler.failures_left = 2
+            put = await pool.request("PUT", f"{stub_url}/api/wikis/x", json={})
+            StubHandler.failures_left = 1
+            post = await pool.request("POST", f"{stub_url}/api/inbox", json={})
+            return put.status_code, post.status_code, pool.stats
+        finally:
+            await pool.aclose()
+
+    put, post, stats = asyncio.run(scenario())
+    assert put == 200 and stats["retries"] == 2
+    assert post == 503      # not idempotent: surfaced, not retried
@@ -0,0 +1,209 @@
+"""Tests for the work journal: crash recovery from step checkpoints, duplicate drops, write-back retries."""
+
+import asyncio
+
+from alfred.config import Config
+from alfred.context import Context
+from alfred.journal import COMPLETED, RELEASED, WorkJournal, current_key
+from alfred.runner import Dispatcher
+from alfred.workflows.base import WorkItem, Workflow
+
+
+class Source:
+    def __init__(self, name="q", fail_complete=0):
+        self.name = name
+        self.completed, self.failed, self.released = [], [], []
+        self.fail_complete = fail_complete
+
+    async def complete(self, item, result):
+        if self.fail_complete:
+            self.fail_complete -= 1
+            raise ConnectionError("supabase down")
+        self.completed.append((item.id, result))
+
+    async def fail(self, item, error):
+        self.failed.append((item.id, error))
+
+    async def release(self, item):
+        self.released.append(item.id)
+
+
+class TwoSteps(Workflow):
+    name = "two_steps"
+    handles = ("t",)
+    concurrency = 4
+
+    def __init__(self, ctx, calls, gate=None):
+        super().__init__(ctx)
+        self.calls = calls
+        self.gate = gate
+
+    async def _llm(self, label):
+        self.calls.append(label)
+        return {"label": label}
+
+    async def run(self, item):
+        a = await self.step("a", lambda: self._llm(f"a{item.id}"))
+        if self.gate:
+            await self.gate.wait()
+        b = await self.step("b", lambda: self._llm(f"b{item.id}"))
+        return {"a": a["label"], "b": b["label"]}
+
+
+def context(tmp_path):
+    return Context(Config(cache_path=str(tmp_path / "cache.sqlite"), vector_path=str(tmp_path / "vectors"),
+                          journal_path=str(tmp_path / "journal.sqlite")))
+
+
+def item(i):
+    return WorkItem("q", str(i), "t", {"text": f"entry {i}"})
+
+
+async def drain(dispatcher):
+    while dispatcher.in_flight:
+        await asyncio.sleep(0.001)
+
+
+def test_restart_resumes_unfinished_items_from_their_checkpoints(tmp_path):
+    calls = []
+    ctx = context(tmp_path)
+
+    async def crashed_run():
+        # What a killed process leaves behind: claimed, started, step "a" paid for, "b" never reached
+        for i in range(3):
+            key = ctx.journal.key(item(i))
+            ctx.journal.claim(key, item(i), "two_steps")
+            ctx.journal.start(key)
+            current_key.set(key)
+            await ctx.journal.step("a", lambda i=i: TwoSteps(ctx, calls)._llm(f"a{i}"))
+            current_key.set(None)
+
+    asyncio.run(crashed_run())
+    ctx.journal.close()
+
+    ctx = context(tmp_path)
+    source = Source()
+    dispatcher = Dispatcher([TwoSteps(ctx, calls)], {"q": source}, Config(), ctx.journal)
+
+    async def restart():
+        dispatcher.recover()
+        await drain(dispatcher)
+
+    asyncio.run(restart())
+    assert sorted(calls) == ["a0", "a1", "a2", "b0", "b1", "b2"]      # no step paid for twice
+    assert sorted(source.completed) == [(str(i), {"a": f"a{i}", "b": f"b{i}"}) for i in range(3)]
+    assert dispatcher.stats["resumed"] == 3
+    assert ctx.journal.pending() == []
+
+
+def test_duplicate_deliveries_are_dropped(tmp_path):
+    calls = []
+    ctx = context(tmp_path)
+    source = Source()
+
+    async def scenario():
+        release = asyncio.Event()
+        dispatcher = Dispatcher([TwoSteps(ctx, calls, release)], {"q": source}, Config(), ctx.journal)
+        dispatcher.submit(item(1))
+        dispatcher.submit(item(1))                       # redelivered while running
+        await asyncio.sleep(0.01)
+        release.set()
+        await drain(dispatcher)
+        dispatcher.submit(item(1))                       # redelivered after completing
+        await drain(dispatcher)
+        dispatcher.submit(WorkItem("q", "1", "t", {"text": "entry 1, edited"}))   # new payload: new work
+        await drain(dispatcher)
+        return dispatcher
+
+    dispatcher = asyncio.run(scenario())
+    assert calls == ["a1", "b1", "a1", "b1"]
+    assert dispatcher.stats["duplicates"] == 2
+    assert [result for _, result in source.completed] == [{"a": "a1", "b": "b1"}] * 3
+
+
+def test_outcome_that_never_reached_the_source_is_written_back_without_rerunning(tmp_path):
+    calls = []
+    ctx = context(tmp_path)
+    source = Source(fail_complete=1)
+
+    async def first():
+        dispatcher = Dispatcher([TwoSteps(ctx, calls)], {"q": source}, Config(), ctx.journal)
+        dispatcher.submit(item(7))
+        await drain(dispatcher)
+
+    async def second():
+        journal = WorkJournal(tmp_path / "journal.sqlite")       # as a restarted process opens it
+        dispatcher = Dispatcher([TwoSteps(ctx, calls)], {"q": source}, Config(), journal)
+        dispatcher.recover()
+        await drain(dispatcher)
+
+    asyncio.run(first())
+    assert source.completed == [] and ctx.journal.state(ctx.journal.key(item(7))) == COMPLETED
+    asyncio.run(second())
+    assert source.completed == [("7", {"a": "a7", "b": "b7"})]
+    assert calls == ["a7", "b7"]
+
+
+def test_cancelled_item_is_released_and_keeps_its_checkpoints(tmp_path):
+    calls = []
+    ctx = context(tmp_path)
+    source = Source()
+
+    async def scenario():
+        dispatcher = Dispatcher([TwoSteps(ctx, calls, asyncio.Event())], {"q": source}, Config(), ctx.journal)
+        dispatcher.submit(item(2))
+        await asyncio.sleep(0.01)
+        await dispatcher.drain(0)                     # shutdown mid-run
+        return dispatcher
+
+    asyncio.run(scenario())
+    key = ctx.journal.key(item(2))
+    assert source.released == ["2"] and ctx.journal.state(key) == RELEASED
+    assert ctx.journal.checkpoints(key) == 1 and ctx.journal.pending() == []
+
+
+def test_redelivery_with_new_queue_bookkeeping_resumes_the_same_entry(tmp_path):
+    calls = []
+    ctx = context(tmp_path)
+    source = Source()
+
+    def delivery(claimed_at):   # what a Firestore claim hands back: the doc as the last claim left it
+        return WorkItem("q", "3", "t", {"text": "entry 3", "status": "processing", "claimed_at": claimed_at})
+
+    async def scenario():
+        dispatcher = Dispatcher([TwoSteps(ctx, calls, asyncio.Event())], {"q": source}, Config(), ctx.journal)
+        dispatcher.submit(delivery("2026-10-17T09:00"))
+        await asyncio.sleep(0.01)
+        await dispatcher.drain(0)
+        dispatcher = Dispatcher([TwoSteps(ctx, calls)], {"q": source}, Config(), ctx.journal)
+        dispatcher.submit(delivery("2026-10-17T09:05"))
+        await drain(dispatcher)
+
+    asyncio.run(scenario())
+    assert ctx.journal.key(delivery("a")) == ctx.journal.key(delivery("b"))
+    assert calls == ["a3", "b3"]                          # step "a" came from the checkpoint
+    assert source.completed == [("3", {"a": "a3", "b": "b3"})]
+
+
+def test_old_completed_and_recorded_items_are_pruned_with_their_steps(tmp_path):
+    calls = []
+    ctx = context(tmp_path)
+    source = Source()
+
+    async def scenario():
+        dispatcher = Dispatcher([TwoSteps(ctx, calls)], {"q": source}, Config(), ctx.journal)
+        dispatcher.submit(item(4))                        # written back
+        await drain(dispatcher)
+        source.fail_complete = 1
+        dispatcher.submit(item(5))                        # completed, write-back still owed
+        await drain(dispatcher)
+
+    asyncio.run(scenario())
+    ctx.journal._conn.execute("UPDATE items SET updated_at = 0")
+    ctx.journal.close()
+
+    journal = WorkJournal(tmp_path / "journal.sqlite", retention=86400)
+    recorded, owed = journal.key(item(4)), journal.key(item(5))
+    assert journal.state(recorded) is None and journal.checkpoints(recorded) == 0
+    assert journal.state(owed) == COMPLETED and journal.checkpoints(owed) == 2
+    assert [key for key, *_ in journal.pending()] == [owed]
@@ -0,0 +1,214 @@
+"""Tests for OllamaScheduler: against a fake client, and end-to-end against a fake Ollama server."""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from alfred.models.base import Chunk, Completion
+from alfred.models.ollama import OllamaClient, OllamaScheduler
+from alfred.tools.http import HttpPool
+
+
+class FakeOllama:
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.complete_calls = 0
+        self.embed_calls = []
+
+    async def complete(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        self.complete_calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return Completion(text=messages[-1]["content"].upper(), model=model, output_tokens=10)
+
+    async def stream(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        for word in ("one ", "two ", "three"):
+            await asyncio.sleep(0)
+            yield Chunk(word)
+        yield Chunk("", done=True, output_tokens=3)
+
+    async def embed(self, texts, *, model):
+        self.embed_calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+def user(text):
+    return [{"role": "user", "content": text}]
+
+
+def test_in_flight_is_capped_and_queue_depth_reported():
+    fake = FakeOllama()
+    scheduler = OllamaScheduler(fake, max_in_flight=2)
+
+    async def scenario():
+        tasks = [asyncio.create_task(scheduler.complete(user(f"todo {i}"))) for i in range(6)]
+        await asyncio.sleep(0.005)
+        depth = scheduler.queue_depth
+        results = await asyncio.gather(*tasks)
+        return depth, results
+
+    depth, results = asyncio.run(scenario())
+    assert fake.peak == 2
+    assert depth == 4
+    assert [r.text for r in results] == [f"TODO {i}" for i in range(6)]
+    assert scheduler.tokens_per_second > 0
+
+
+def test_identical_concurrent_requests_share_one_call():
+    fake = FakeOllama()
+    scheduler = OllamaScheduler(fake)
+
+    async def scenario():
+        return await asyncio.gather(*(scheduler.complete(user("same")) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert fake.complete_calls == 1
+    assert scheduler.stats["coalesced"] == 4
+    assert {r.text for r in results} == {"SAME"}
+
+
+def test_embeds_within_the_window_go_out_as_one_batch():
+    fake = FakeOllama()
+    scheduler = OllamaScheduler(fake, window=0.01)
+
+    async def scenario():
+        return await asyncio.gather(scheduler.embed(["a"]), scheduler.embed(["bb", "ccc"]), scheduler.embed(["dddd"]))
+
+    results = asyncio.run(scenario())
+    assert fake.embed_calls == [["a", "bb", "ccc", "dddd"]]
+    assert results == [[[1.0]], [[2.0], [3.0]], [[4.0]]]
+
+
+def test_stream_yields_text_and_counts_tokens():
+    scheduler = OllamaScheduler(FakeOllama())
+
+    async def scenario():
+        return [chunk.text async for chunk in scheduler.stream(user("count"))]
+
+    assert "".join(asyncio.run(scenario())) == "one two three"
+    assert scheduler.metrics()["in_flight"] == 0
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/api/embed":
+            self._json({"embeddings": [[1.0, 0.0] for _ in body["input"]]})
+            return
+        with FakeOllamaHandler.lock:
+            FakeOllamaHandler.active += 1
+            FakeOllamaHandler.peak = max(FakeOllamaHandler.peak, FakeOllamaHandler.active)
+        time.sleep(0.05)
+        with FakeOllamaHandler.lock:
+            FakeOllamaHandler.active -= 1
+        text = body["messages"][-1]["content"]
+        if body["stream"]:
+            lines = [{"message": {"content": word}, "done": False} for word in text.split()]
+            lines.append({"done": True, "eval_count": len(lines)})
+            payload = "".join(json.dumps(line) + "\n" for line in lines).encode()
+            self._send(payload, "application/x-ndjson")
+        else:
+            self._json({"message": {"content": text}, "prompt_eval_count": 5, "eval_count": 7})
+
+    def _json(self, data):
+        self._send(json.dumps(data).encode(), "application/json")
+
+    def _send(self, payload, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_against_fake_ollama_server():
+    pytest.importorskip("httpx")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    FakeOllamaHandler.peak = 0
+
+    async def scenario():
+        pool = HttpPool()
+        scheduler = OllamaScheduler(OllamaClient(pool, f"http://127.0.0.1:{server.server_port}"), max_in_flight=2)
+        try:
+            replies = await asyncio.gather(*(scheduler.complete(user(f"item {i}")) for i in range(5)))
+            streamed = [chunk.text async for chunk in scheduler.stream(user("a streamed reply"))]
+            vectors = await asyncio.gather(scheduler.embed(["x"]), scheduler.embed(["y"]))
+            return replies, streamed, vectors, scheduler.metrics()
+        finally:
+            await pool.aclose()
+
+    try:
+        replies, streamed, vectors, metrics = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+    assert [r.text for r in replies] == [f"item {i}" for i in range(5)]
+    assert streamed == ["a", "streamed", "reply", ""]
+    assert vectors == [[[1.0, 0.0]], [[1.0, 0.0]]]
+    assert FakeOllamaHandler.peak <= 2
+    assert metrics["embed_batches"] == 1 and metrics["tokens_per_second"] > 0
+
+
+class SlowOllamaHandler(BaseHTTPRequestHandler):
+    """A daemon that generates slower than the client waits, or hasn't pulled the model."""
+    protocol_version = "HTTP/1.1"
+    requests = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        SlowOllamaHandler.requests += 1
+        if body["model"] == "missing":
+            payload = b'{"error": "model not found"}'
+            self.send_response(404)
+        else:
+            time.sleep(0.3)
+            payload = json.dumps({"message": {"content": "late"}, "done": True}).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_timeouts_and_error_statuses_are_unavailable_and_never_retried():
+    pytest.importorskip("httpx")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    SlowOllamaHandler.requests = 0
+
+    async def scenario():
+        pool = HttpPool()
+        client = OllamaClient(pool, f"http://127.0.0.1:{server.server_port}", read_timeout=0.1)
+        try:
+            slow = await client.complete(user("hi"))
+            missing = await client.complete(user("hi"), model="missing")
+            streamed = [chunk async for chunk in client.stream(user("hi"))]
+            return slow, missing, streamed, pool.stats["retries"]
+        finally:
+            await pool.aclose()
+
+    try:
+        slow, missing, streamed, retries = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+    assert slow is None and missing is None and streamed == []
+    assert SlowOllamaHandler.requests == 3 and retries == 0
@@ -0,0 +1,89 @@
+"""Tests for the prompt registry and Claude prompt-cache accounting."""
+
+import asyncio
+
+import pytest
+
+from alfred.invocations import InvocationLog
+from alfred.models.base import Completion, SystemPrompt
+from alfred.models.claude import SONNET, ClaudeClient, cost_estimate
+from alfred.models.gateway import ModelGateway
+from alfred.prompts import PromptError, PromptRegistry
+
+CRM_V2 = """---
+model: sonnet
+variables: [contact]
+---
+# Prompt: crm_rollup v2
+
+Update the contact's wiki page from the journal entry.
+
+Contact: {{contact}}
+"""
+
+
+def write(root, workflow, name, text):
+    (root / workflow).mkdir(parents=True, exist_ok=True)
+    (root / workflow / name).write_text(text)
+
+
+def test_every_shipped_prompt_loads():
+    registry = PromptRegistry().load()
+    prompt = registry.get("meeting_actions", "v1")
+    assert isinstance(prompt.render(), SystemPrompt)
+    assert prompt.render() is prompt.render()           # static prompts are built once
+    assert registry.versions("meeting_actions") == ["v1"]
+
+
+def test_static_prefix_is_split_from_the_rendered_tail(tmp_path):
+    write(tmp_path, "crm_rollup", "v2.md", CRM_V2)
+    prompt = PromptRegistry(tmp_path).load().get("crm_rollup", "v2")
+    system = prompt.render(contact="Sarah Chen")
+    assert system.startswith("# Prompt: crm_rollup v2") and system.endswith("Contact: Sarah Chen\n")
+    assert system[:system.stable] == prompt.prefix and "{{" not in system
+    assert prompt.model == "sonnet"
+    with pytest.raises(PromptError):
+        prompt.render()
+
+
+@pytest.mark.parametrize("name, text", [
+    ("v1.md", "---\nmodel: gpt\n---\nhi\n"),
+    ("v1.md", "---\ncolor: red\n---\nhi\n"),
+    ("v1.md", "Hello {{name}}\n"),                           # undeclared variable
+    ("v1.md", "---\nvariables: [name]\n---\nHello\n"),       # declared but unused
+    ("v1.md", "---\nmodel: [\n---\nhi\n"),
+    ("draft.md", "hi\n"),
+])
+def test_invalid_prompts_fail_the_load(tmp_path, name, text):
+    write(tmp_path, "todo_extract", "v1.md", "fine\n")
+    write(tmp_path, "crm_rollup", name, text)
+    with pytest.raises(PromptError, match="crm_rollup"):
+        PromptRegistry(tmp_path).load()
+
+
+def test_stable_prefix_gets_a_cache_breakpoint():
+    kwargs = ClaudeClient._kwargs([], SONNET, SystemPrompt("instructions\n", "Contact: Sarah\n"), 100)
+    assert kwargs["system"] == [
+        {"type": "text", "text": "instructions\n", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": "Contact: Sarah\n"},
+    ]
+    assert ClaudeClient._kwargs([], SONNET, "ad hoc", 100)["system"] == "ad hoc"
+
+
+class CachingClaude:
+    async def complete(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        return Completion(text="ok", model=model, input_tokens=2100, output_tokens=50,
+                          cache_read_tokens=2000)
+
+
+def test_cached_input_tokens_are_logged_and_priced():
+    rows = []
+    log = InvocationLog()
+    log.listeners.append(rows.append)
+    gateway = ModelGateway({"claude": CachingClaude()}, log)
+    asyncio.run(gateway.complete("todo_extract", "v1", [{"role": "user", "content": "x"}],
+                                 provider="claude", model=SONNET, system=SystemPrompt("instructions")))
+    [row] = rows
+    assert (row.input_token_count, row.cache_read_token_count, row.cache_write_token_count) == (2100, 2000, 0)
+    assert row.cost_estimate == pytest.approx(cost_estimate(SONNET, 100, 50) + 2000 * 0.3 / 1_000_000)
+    assert row.cost_estimate < cost_estimate(SONNET, 2100, 50)
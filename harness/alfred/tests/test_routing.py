@@ -1 +1,185 @@
-"""Tests for alfred.models.routing. Phase 4 scaffold — see ../../README.md."""
+"""Tests for alfred.models.routing."""
+
+import asyncio
+
+import pytest
+
+from alfred.invocations import Invocation, InvocationLog
+from alfred.models.base import Chunk, Completion
+from alfred.models.claude import SONNET
+from alfred.models.gateway import ModelGateway
+from alfred.models.ollama import DEFAULT_MODEL
+from alfred.models.routing import (
+    HEDGE, LOCAL, LOCAL_UNAVAILABLE, PREMIUM, REMOTE, SCHEMA_MISS, SKIP_LOCAL, Router, RoutingPolicy, TokenBudget,
+    TokenBudgetExceeded, replay,
+)
+
+
+class FakeClient:
+    def __init__(self, text, delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+
+    async def complete(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return Completion(text=self.text, model=model, input_tokens=50, output_tokens=50)
+
+    async def stream(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        self.calls += 1
+        yield Chunk(self.text)
+        yield Chunk("", done=True, input_tokens=50, output_tokens=50)
+
+
+class BrokenDaemon:
+    """A local tier whose calls raise instead of answering: a read timeout, a dropped connection."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        self.calls += 1
+        raise TimeoutError("read timed out")
+
+    async def stream(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        self.calls += 1
+        raise ConnectionError("connection reset by peer")
+        yield
+
+
+def make(local_text='{"ok": true}', local_delay=0.0, remote_delay=0.0, **policy):
+    log = InvocationLog()
+    clients = {"ollama": FakeClient(local_text, local_delay), "claude": FakeClient('{"ok": true}', remote_delay)}
+    router = Router(ModelGateway(clients, log), RoutingPolicy(**{"min_samples": 5, **policy}))
+    log.listeners.append(router.stats.observe)
+    return router, clients, log
+
+
+def history(workflow, *, local_ok, n, local_ms=20_000, remote_ms=3_000, remote_cost=0.01):
+    """n items: a local call each, escalated to Sonnet when it wasn't ok."""
+    rows = []
+    for i in range(n):
+        rows.append(Invocation(workflow, DEFAULT_MODEL, "v1", 100, 100, 0.0, latency_ms=local_ms))
+        if i >= local_ok * n:
+            rows.append(Invocation(workflow, SONNET, "v1", 100, 100, remote_cost, SCHEMA_MISS, latency_ms=remote_ms))
+    return rows
+
+
+def test_static_matrix_until_enough_samples():
+    router, _, _ = make()
+    assert router.plan("todo_extract").first == LOCAL
+    assert router.plan("todo_extract").fallback == REMOTE
+    assert router.plan("memo", "opus").first == PREMIUM
+
+
+def test_low_local_success_skips_local_tier():
+    router, _, _ = make()
+    router.stats.warm(history("crm_rollup", local_ok=0.2, n=20))
+    # break-even: 0.002·20 / (0.01 + 0.002·3) = 2.5 → any rate loses; 0.2 < threshold
+    assert router.plan("crm_rollup").first == REMOTE and router.plan("crm_rollup").reason == SKIP_LOCAL
+
+    router.stats.warm(history("todo_extract", local_ok=0.95, n=20, local_ms=1_000))
+    assert router.plan("todo_extract").first == LOCAL
+
+
+def test_schema_miss_escalates_and_is_logged():
+    router, clients, log = make(local_text="not json")
+
+    def valid(text):
+        return text.startswith("{")
+
+    result = asyncio.run(router.complete("todo_extract", "v1", [{"role": "user", "content": "x"}], validate=valid))
+    assert result.model == SONNET
+    assert clients["ollama"].calls == 1 and clients["claude"].calls == 1
+    assert router.stats.local_success_rate("todo_extract") == 0.0
+
+
+def test_tight_deadline_hedges_and_takes_the_first_valid_answer():
+    router, clients, _ = make(local_delay=0.5, remote_delay=0.01)
+    router.stats.warm(history("dev_brief", local_ok=0.9, n=20, local_ms=100, remote_ms=100))
+    # p95 local + p95 remote > deadline, but local median fits
+    plan = router.plan("dev_brief", deadline=0.15)
+    assert plan.hedge_after == pytest.approx(0.1) and plan.reason == HEDGE
+
+    result = asyncio.run(router.complete("dev_brief", "v1", [{"role": "user", "content": "x"}], deadline=0.15))
+    assert result.model == SONNET
+    assert clients["ollama"].calls == 1 and clients["claude"].calls == 1
+
+
+def test_token_budget_raises_before_the_call():
+    router, clients, _ = make()
+    budget = TokenBudget("todo_extract", limit=500)
+    messages = [{"role": "user", "content": "x" * 400}]
+    asyncio.run(router.complete("todo_extract", "v1", messages, max_tokens=100, budget=budget))
+    assert budget.used == 100
+    with pytest.raises(TokenBudgetExceeded):
+        asyncio.run(router.complete("todo_extract", "v1", messages, max_tokens=400, budget=budget))
+    assert clients["ollama"].calls == 1
+
+
+def test_replay_compares_policy_with_history():
+    rows = [inv.row() for inv in history("crm_rollup", local_ok=0.2, n=40)]
+    report = replay(rows, RoutingPolicy(min_samples=10))
+    assert report["items"] == 40
+    assert report["decisions"] == {"local_first": 11, "remote": 29}   # 10 to learn, then one probe in 20 skips
+    assert report["policy_latency_ms"] < report["actual_latency_ms"]
+    assert report["policy_cost"] == pytest.approx(report["actual_cost"], rel=0.3)
+
+
+def run_items(router, workflow, n, *, local_up=True):
+    """Route n items and log what would happen: remote on skip or when the daemon is down."""
+    plans = []
+    for _ in range(n):
+        plan = router.plan(workflow)
+        plans.append(plan.first)
+        if plan.first == LOCAL and local_up:
+            router.stats.observe(Invocation(workflow, DEFAULT_MODEL, "v1", 100, 100, 0.0, latency_ms=1_000))
+        else:
+            reason = plan.reason if plan.first == REMOTE else LOCAL_UNAVAILABLE
+            router.stats.observe(Invocation(workflow, SONNET, "v1", 100, 100, 0.01, reason, latency_ms=3_000))
+    return plans
+
+
+def test_ollama_outage_is_not_a_quality_miss_and_routing_recovers():
+    router, _, _ = make(probe_every=10)
+    router.stats.warm(history("todo_extract", local_ok=1.0, n=50, local_ms=1_000))
+    router.stats.warm([Invocation("todo_extract", SONNET, "v1", 100, 100, 0.01, latency_ms=3_000)])
+
+    outage = run_items(router, "todo_extract", 60, local_up=False)
+    assert outage[:3] == [LOCAL] * 3 and outage[3] == REMOTE          # down after three unanswered attempts
+    assert outage.count(LOCAL) == 3 + 5                               # then only probes go local
+    assert router.stats.local_success_rate("todo_extract") == 1.0     # downtime isn't counted as bad answers
+
+    back = run_items(router, "todo_extract", 20)
+    assert LOCAL in back[:10] and back[-10:] == [LOCAL] * 10          # the first probe that lands reopens local
+    assert router.plan("todo_extract").reason is None
+
+
+def test_skipped_local_tier_is_still_probed():
+    router, _, _ = make(probe_every=5)
+    router.stats.warm(history("crm_rollup", local_ok=0.2, n=20))
+    plans = [router.plan("crm_rollup") for _ in range(10)]
+    assert [p.first for p in plans].count(LOCAL) == 2
+    assert all(p.reason == SKIP_LOCAL for p in plans if p.first == REMOTE)
+
+
+def test_local_tier_errors_escalate_as_unavailable_instead_of_failing_the_item():
+    rows = []
+    log = InvocationLog()
+    local, remote = BrokenDaemon(), FakeClient('{"action_items": []}')
+    router = Router(ModelGateway({"ollama": local, "claude": remote}, log))
+    log.listeners += [router.stats.observe, rows.append]
+    messages = [{"role": "user", "content": "x"}]
+
+    async def scenario():
+        plain = await router.complete("todo_extract", "v1", messages)
+        structured, value = await router.complete_structured("meeting_actions", "v1", messages, schema=None)
+        return plain, structured, value
+
+    plain, structured, value = asyncio.run(scenario())
+    assert plain.model == SONNET and structured.model == SONNET and value == {"action_items": []}
+    assert local.calls == 2 and remote.calls == 2
+    assert [r.escalation_reason for r in rows] == [LOCAL_UNAVAILABLE, LOCAL_UNAVAILABLE]
+    assert router.stats.local_unanswered == 2                       # counted toward availability
+    assert router.stats.local_attempts("todo_extract") == 0          # not as a quality miss
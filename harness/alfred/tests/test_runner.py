@@ -0,0 +1,226 @@
+"""Tests for alfred.runner. Fake in-memory sources and workflows; no network."""
+
+import asyncio
+from dataclasses import replace
+
+from alfred.config import Config
+from alfred.context import Context
+from alfred.runner import Dispatcher, EventStream, Poller, Runner
+from alfred.workflows.base import WorkItem, Workflow
+
+CONFIG = Config(poll_min_seconds=0.01, poll_max_seconds=0.08, poll_batch=5, lane_backlog=10,
+                shutdown_grace_seconds=0.05)
+
+
+class FakeSource:
+    def __init__(self, name, items=()):
+        self.name = name
+        self.queue = list(items)
+        self.completed, self.failed, self.released = [], [], []
+        self.claims = 0
+
+    def add(self, type_, n=1):
+        for _ in range(n):
+            self.queue.append(WorkItem(self.name, str(len(self.queue) + self.claims * 1000), type_, {}))
+
+    async def claim(self, types, limit):
+        self.claims += 1
+        taken = [i for i in self.queue if i.type in types][:limit]
+        for item in taken:
+            self.queue.remove(item)
+        return taken
+
+    async def complete(self, item, result):
+        self.completed.append((item, result))
+
+    async def fail(self, item, error):
+        self.failed.append((item, error))
+
+    async def release(self, item):
+        self.released.append(item)
+
+
+class Sleeper(Workflow):
+    seconds = 0.0
+    finished: list
+
+    async def run(self, item):
+        await asyncio.sleep(self.seconds)
+        self.finished.append(item.type)
+        return {"ok": True}
+
+
+def context(tmp_path):
+    """A Context whose cache, journal and vector index live under tmp_path, not the live runner's files."""
+    return Context(config=replace(CONFIG, cache_path=str(tmp_path / "cache.sqlite"),
+                                  journal_path=str(tmp_path / "journal.sqlite"),
+                                  vector_path=str(tmp_path / "vectors")))
+
+
+def make(name, handles, seconds, tmp_path, concurrency=1, finished=None):
+    cls = type(name, (Sleeper,), {"name": name, "handles": handles, "seconds": seconds,
+                                  "concurrency": concurrency, "finished": finished})
+    return cls(context(tmp_path))
+
+
+def test_slow_lane_does_not_block_fast_lane(tmp_path):
+    async def scenario():
+        finished = []
+        source = FakeSource("q")
+        source.add("memo", 2)
+        source.add("todo", 6)
+        workflows = [make("memo", ("memo",), 0.3, tmp_path, finished=finished),
+                     make("todo_extract", ("todo",), 0.0, tmp_path, concurrency=2, finished=finished)]
+        runner = Runner(CONFIG, [source], workflows)
+        task = asyncio.create_task(runner.run())
+        await asyncio.sleep(0.15)
+        # Both memos claimed, one running; every todo already done
+        assert finished == ["todo"] * 6
+        await asyncio.sleep(0.6)
+        runner.stop()
+        await task
+        return finished, source
+
+    finished, source = asyncio.run(scenario())
+    assert finished.count("memo") == 2
+    assert len(source.completed) == 8 and not source.failed
+
+
+def test_poller_backs_off_when_idle_and_resets_on_work(tmp_path):
+    async def scenario():
+        source = FakeSource("q")
+        dispatcher = Dispatcher([make("todo_extract", ("todo",), 0.0, tmp_path, finished=[])], {"q": source}, CONFIG)
+        poller = Poller(source, dispatcher, CONFIG)
+        intervals = []
+        for _ in range(4):
+            await poller.poll_once()
+            intervals.append(poller.interval)
+        source.add("todo", 1)
+        await poller.poll_once()
+        intervals.append(poller.interval)
+        source.add("todo", 5)
+        full_page_delay = await poller.poll_once()
+        await dispatcher.drain(1)
+        return intervals, full_page_delay
+
+    intervals, full_page_delay = asyncio.run(scenario())
+    assert intervals[:4] == [0.02, 0.04, 0.08, 0.08]  # doubles up to poll_max_seconds
+    assert intervals[4] == 0.01                       # work arrived: back to the minimum
+    assert full_page_delay == 0.0                     # a full page polls again at once
+
+
+def test_full_lane_stops_claiming_its_type(tmp_path):
+    async def scenario():
+        source = FakeSource("q")
+        source.add("memo", 15)
+        config = Config(poll_batch=5, lane_backlog=4)
+        dispatcher = Dispatcher([make("memo", ("memo",), 10, tmp_path, finished=[])], {"q": source}, config)
+        poller = Poller(source, dispatcher, config)
+        await poller.poll_once()
+        await poller.poll_once()
+        claimed = dispatcher.lanes["memo"].pending
+        await dispatcher.drain(0)
+        return claimed, source
+
+    claimed, source = asyncio.run(scenario())
+    assert claimed == 4                   # the page was capped at the lane's room; the second poll claimed nothing
+    assert len(source.released) == 4      # cancelled at shutdown → handed back, not failed
+    assert not source.failed
+
+
+def test_claims_never_push_a_nearly_full_lane_past_its_backlog(tmp_path):
+    async def scenario():
+        source = FakeSource("q")
+        source.add("memo", 3)
+        config = Config(poll_batch=20, lane_backlog=4)
+        dispatcher = Dispatcher([make("memo", ("memo",), 10, tmp_path, finished=[]),
+                                 make("todo_extract", ("todo",), 10, tmp_path, finished=[])], {"q": source}, config)
+        poller = Poller(source, dispatcher, config)
+        await poller.poll_once()                 # memo lane: 1 slot left; todo lane: all 4
+        source.add("memo", 11)
+        await poller.poll_once()
+        pending = {name: lane.pending for name, lane in dispatcher.lanes.items()}
+        await dispatcher.drain(0)
+        return pending
+
+    assert asyncio.run(scenario()) == {"memo": 4, "todo_extract": 0}
+
+
+def test_workflow_error_marks_item_failed(tmp_path):
+    class Boom(Workflow):
+        name = "boom"
+        handles = ("boom",)
+
+        async def run(self, item):
+            raise RuntimeError("schema miss")
+
+    async def scenario():
+        source = FakeSource("q")
+        source.add("boom")
+        dispatcher = Dispatcher([Boom(context(tmp_path))], {"q": source}, CONFIG)
+        await Poller(source, dispatcher, CONFIG).poll_once()
+        await dispatcher.drain(1)
+        return source
+
+    source = asyncio.run(scenario())
+    assert [e for _, e in source.failed] == ["RuntimeError: schema miss"]
+
+
+class ListeningSource(FakeSource):
+    def __init__(self, name):
+        super().__init__(name)
+        self.notify = None
+        self.unsubscribed = False
+
+    async def listen(self, notify):
+        self.notify = notify
+
+        async def unsubscribe():
+            self.unsubscribed = True
+        return unsubscribe
+
+
+def test_push_wakes_poller_long_before_reconcile_interval(tmp_path):
+    async def scenario():
+        finished = []
+        source = ListeningSource("inbox")
+        config = Config(poll_min_seconds=5, reconcile_seconds=60, push=True, shutdown_grace_seconds=1)
+        runner = Runner(config, [source], [make("todo_extract", ("todo",), 0.0, tmp_path, finished=finished)])
+        task = asyncio.create_task(runner.run())
+        await asyncio.sleep(0.05)          # initial poll found nothing; next one is ≥5s away
+        source.add("todo", 2)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, source.notify)   # listeners call back from their own thread
+        await asyncio.sleep(0.05)
+        done_before_stop = list(finished)
+        runner.stop()
+        await task
+        return done_before_stop, source, runner
+
+    done, source, runner = asyncio.run(scenario())
+    assert done == ["todo", "todo"]
+    assert source.unsubscribed
+    assert runner.pollers["inbox"].max_interval == 60
+
+
+def test_event_stream_collapses_bursts():
+    async def scenario():
+        stream = EventStream()
+        publish = stream.publisher("q")
+        for _ in range(5):
+            publish()
+        await asyncio.sleep(0)
+        received = []
+
+        async def consume():
+            async for name in stream:
+                received.append(name)
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        publish()
+        await asyncio.sleep(0.01)
+        consumer.cancel()
+        return received
+
+    assert asyncio.run(scenario()) == ["q", "q"]
@@ -0,0 +1,112 @@
+"""Tests for streaming schema validation and its routing path."""
+
+import asyncio
+
+import pytest
+
+from alfred.invocations import InvocationLog
+from alfred.models.base import Chunk
+from alfred.models.claude import SONNET
+from alfred.models.gateway import ModelGateway
+from alfred.models.routing import SCHEMA_MISS, Router, TokenBudget
+from alfred.models.structured import SchemaViolation, StreamingValidator
+
+# Shaped like pydantic's model_json_schema() output
+SCHEMA = {
+    "type": "object",
+    "properties": {"action_items": {"type": "array", "items": {"$ref": "#/$defs/ActionItem"}}},
+    "required": ["action_items"],
+    "additionalProperties": False,
+    "$defs": {
+        "ActionItem": {
+            "type": "object",
+            "properties": {
+                "task": {"type": "string"},
+                "owner": {"anyOf": [{"type": "string"}, {"type": "null"}]},
+                "priority": {"enum": ["high", "medium", "low"]},
+            },
+            "required": ["task", "priority"],
+        },
+    },
+}
+
+GOOD = ('```json\n{"action_items": [{"task": "Send deck", "owner": "Lori", "priority": "high"}, '
+        '{"task": "Book room", "owner": null, "priority": "low"}]}\n```')
+
+
+def feed_all(validator, text, step=3):
+    for i in range(0, len(text), step):
+        validator.feed(text[i:i + step])
+
+
+def test_items_are_emitted_as_they_close():
+    seen = []
+    validator = StreamingValidator(SCHEMA, emit=("action_items", "*"), on_item=seen.append)
+    feed_all(validator, GOOD[:GOOD.index("Book")])
+    assert seen == [{"task": "Send deck", "owner": "Lori", "priority": "high"}]
+    feed_all(validator, GOOD[GOOD.index("Book"):])
+    assert len(seen) == 2
+    assert validator.close()["action_items"][1]["owner"] is None
+
+
+@pytest.mark.parametrize("prefix, where", [
+    ('{"action_items": [{"task": 42', "action_items/0/task"),
+    ('{"action_items": [{"task": "x", "priority": "urg', "action_items/0/priority"),
+    ('{"summary"', "<root>"),
+    ('Here are the action items:', "<root>"),
+    ('{"action_items": [{"task": "x"}', "action_items/0"),
+    ('{"action_items": [{"task": "x", "priority": "low"},]', "action_items/1"),
+])
+def test_violation_raised_at_the_first_impossible_token(prefix, where):
+    validator = StreamingValidator(SCHEMA)
+    with pytest.raises(SchemaViolation) as excinfo:
+        validator.feed(prefix)
+    assert str(excinfo.value).startswith(where)
+
+
+def test_truncated_output_fails_on_close():
+    validator = StreamingValidator(SCHEMA)
+    validator.feed('{"action_items": [')
+    with pytest.raises(SchemaViolation):
+        validator.close()
+
+
+class StreamingClient:
+    def __init__(self, text):
+        self.text = text
+        self.pulled = 0
+
+    async def stream(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        for i in range(0, len(self.text), 4):
+            self.pulled += 1
+            yield Chunk(self.text[i:i + 4])
+        yield Chunk("", done=True, input_tokens=100, output_tokens=self.pulled)
+
+
+def test_bad_local_stream_is_aborted_and_escalated():
+    bad = '{"action_items": [{"task": "Send deck", "owner": "Lori", "priority": "high"}, {"task": 7' + " " * 4000
+    local, remote = StreamingClient(bad), StreamingClient(GOOD)
+    log = InvocationLog()
+    router = Router(ModelGateway({"ollama": local, "claude": remote}, log))
+    log.listeners.append(router.stats.observe)
+    seen = []
+    budget = TokenBudget("meeting_actions", limit=10_000)
+
+    completion, value = asyncio.run(router.complete_structured(
+        "meeting_actions", "v1", [{"role": "user", "content": "transcript"}], schema=SCHEMA,
+        emit=("action_items", "*"), on_item=seen.append, budget=budget,
+    ))
+    assert local.pulled < 25                      # cut off at the bad token, not after 4k chars
+    assert completion.model == SONNET and len(value["action_items"]) == 2
+    assert [item["task"] for item in seen] == ["Send deck", "Book room"]   # "Send deck" not repeated
+    assert budget.used > 0
+    assert router.stats.local_success_rate("meeting_actions") == 0.0
+
+
+def test_escalation_reason_is_schema_miss():
+    rows = []
+    log = InvocationLog()
+    log.listeners.append(rows.append)
+    router = Router(ModelGateway({"ollama": StreamingClient('{"nope": 1}'), "claude": StreamingClient(GOOD)}, log))
+    asyncio.run(router.complete_structured("meeting_actions", "v1", [{"role": "user", "content": "t"}], schema=SCHEMA))
+    assert [r.escalation_reason for r in rows] == [None, SCHEMA_MISS]
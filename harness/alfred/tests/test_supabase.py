@@ -0,0 +1,256 @@
+"""Tests for SupabaseQueue's batched claims and status writes.
+
+The in-memory project stands in for PostgREST (each request atomic, like one
+statement). The last test runs sql/alfred_queue.sql against a real Postgres
+when ALFRED_TEST_DATABASE_URL points at a scratch database.
+"""
+
+import asyncio
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from alfred.tools import supabase
+from alfred.tools.supabase import COMPLETED, FAILED, IN_PROGRESS, PENDING, SupabaseQueue
+from alfred.workflows.base import WorkItem
+
+SQL = Path(__file__).resolve().parents[2] / "sql" / "alfred_queue.sql"
+
+
+class APIError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class Query:
+    def __init__(self, project, table):
+        self.project = project
+        self.rows = project.tables[table]
+        self.filters = []
+        self.values = None
+        self.ordering = None
+        self.count = None
+
+    def select(self, columns):
+        self.columns = columns
+        return self
+
+    def update(self, values):
+        self.values = values
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column):
+        self.ordering = column
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def execute(self):
+        with self.project.lock:
+            self.project.requests.append("update" if self.values is not None else "select")
+            if self.project.down:
+                raise ConnectionError("supabase down")
+            rows = [row for row in self.rows if all(f(row) for f in self.filters)]
+            if self.ordering:
+                rows.sort(key=lambda row: row[self.ordering])
+            rows = rows[:self.count] if self.count is not None else rows
+            if self.values is not None:
+                for row in rows:
+                    row.update(self.values)
+                return Result([dict(row) for row in rows])
+            return Result([{"id": row["id"]} if self.columns == "id" else dict(row) for row in rows])
+
+
+class Project:
+    """research_requests in one project; `functions` says whether sql/alfred_queue.sql is installed."""
+
+    def __init__(self, rows, functions=True):
+        self.tables = {"research_requests": [dict(row) for row in rows]}
+        self.functions = functions
+        self.lock = threading.Lock()
+        self.requests = []
+        self.down = False
+
+    def table(self, name):
+        return Query(self, name)
+
+    def rpc(self, function, params):
+        project = self
+
+        class Call:
+            def execute(self):
+                if not project.functions:
+                    raise APIError("PGRST202")
+                with project.lock:
+                    project.requests.append(function)
+                    return Result(getattr(project, function)(**params))
+        return Call()
+
+    def alfred_claim_items(self, p_table, p_limit, p_type_field=None, p_types=None):
+        rows = [row for row in self.tables[p_table]
+                if row["status"] == PENDING and (p_type_field is None or row[p_type_field] in p_types)]
+        rows = sorted(rows, key=lambda row: row["created_at"])[:p_limit]
+        for row in rows:
+            row["status"] = IN_PROGRESS
+        return [dict(row) for row in rows]
+
+    def alfred_finish_items(self, p_table, p_rows):
+        updates = {row["id"]: row for row in p_rows}
+        for row in self.tables[p_table]:
+            if row["id"] in updates:
+                row.update({k: v for k, v in updates[row["id"]].items() if k != "id"})
+        return len(updates)
+
+    def status(self, row_id):
+        return next(row["status"] for row in self.tables["research_requests"] if row["id"] == row_id)
+
+
+def rows(types):
+    return [{"id": f"r{i}", "type": type_, "status": PENDING, "payload": {"n": i},
+             "created_at": f"2026-10-17T00:{i:02d}"} for i, type_ in enumerate(types)]
+
+
+def queue(monkeypatch, project, name="deepops:research_requests"):
+    monkeypatch.setattr(supabase, "client", lambda url, key: project)
+    return SupabaseQueue(name, "https://deepops.test", "key", "research_requests", write_window=0.01)
+
+
+def test_claim_is_one_rpc_call_for_the_whole_batch(monkeypatch):
+    project = Project(rows(["memo", "fundamentals", "memo", "memo", "memo"]))
+    q = queue(monkeypatch, project)
+    items = asyncio.run(q.claim({"memo"}, 3))
+    assert [item.id for item in items] == ["r0", "r2", "r3"]
+    assert project.requests == ["alfred_claim_items"]
+    assert [project.status(f"r{i}") for i in range(5)] == [IN_PROGRESS, PENDING, IN_PROGRESS, IN_PROGRESS, PENDING]
+
+
+def test_without_the_functions_claims_are_two_requests_and_never_overlap(monkeypatch):
+    project = Project(rows(["memo"] * 30), functions=False)
+    runners = [queue(monkeypatch, project, f"deepops:{n}") for n in range(3)]
+
+    async def claim_all():
+        claimed, rounds = [], 0
+        while True:
+            rounds += 1
+            batches = await asyncio.gather(*(q.claim({"memo"}, 5) for q in runners))
+            if not any(batches):
+                return claimed, rounds
+            claimed += [item.id for batch in batches for item in batch]
+
+    claimed, rounds = asyncio.run(claim_all())
+    assert sorted(claimed) == sorted(f"r{i}" for i in range(30))    # every row once, none twice
+    assert project.requests.count("select") == 3 * rounds and project.requests.count("update") <= 3 * rounds
+    assert not any(q.rpc for q in runners)
+
+
+def test_status_writes_in_one_window_share_a_request(monkeypatch):
+    project = Project(rows(["memo"] * 4))
+    q = queue(monkeypatch, project)
+
+    async def scenario():
+        items = await q.claim({"memo"}, 4)
+        project.requests.clear()
+        await asyncio.gather(q.complete(items[0], {"memo": "a"}), q.complete(items[1], {"memo": "b"}),
+                             q.fail(items[2], "budget exceeded"), q.release(items[3]))
+
+    asyncio.run(scenario())
+    assert project.requests == ["alfred_finish_items"]
+    assert [project.status(f"r{i}") for i in range(4)] == [COMPLETED, COMPLETED, FAILED, PENDING]
+    assert project.tables["research_requests"][1]["result"] == {"memo": "b"}
+
+
+def test_without_the_functions_identical_writes_are_one_update(monkeypatch):
+    project = Project(rows(["memo"] * 6), functions=False)
+    q = queue(monkeypatch, project)
+
+    async def scenario():
+        items = await q.claim({"memo"}, 6)
+        project.requests.clear()
+        await asyncio.gather(*(q.release(item) for item in items[:5]), q.complete(items[5], {"memo": "x"}))
+
+    asyncio.run(scenario())
+    assert project.requests == ["update", "update"]
+    assert [project.status(f"r{i}") for i in range(6)] == [PENDING] * 5 + [COMPLETED]
+
+
+def test_failed_batch_raises_in_every_writer(monkeypatch):
+    project = Project(rows(["memo"] * 2))
+    q = queue(monkeypatch, project)
+
+    async def scenario():
+        items = [WorkItem(q.name, row["id"], "memo", {}, row) for row in project.tables["research_requests"]]
+        project.functions, project.down = False, True
+        return await asyncio.gather(*(q.complete(item, {}) for item in items), return_exceptions=True)
+
+    assert [type(e) for e in asyncio.run(scenario())] == [ConnectionError, ConnectionError]
+
+
+DATABASE_URL = os.environ.get("ALFRED_TEST_DATABASE_URL")
+
+
+@pytest.mark.skipif(not DATABASE_URL, reason="set ALFRED_TEST_DATABASE_URL to a scratch Postgres database")
+def test_queue_functions_against_postgres():
+    psycopg = pytest.importorskip("psycopg")
+    from psycopg.types.json import Jsonb
+
+    admin = psycopg.connect(DATABASE_URL, autocommit=True)
+    admin.execute("""
+        do $$ begin
+          if not exists (select from pg_roles where rolname = 'anon') then create role anon; end if;
+          if not exists (select from pg_roles where rolname = 'authenticated') then create role authenticated; end if;
+          if not exists (select from pg_roles where rolname = 'service_role') then create role service_role; end if;
+        end $$;
+        create table public.research_requests (
+          id bigint generated always as identity primary key,
+          type text not null,
+          status text not null default 'pending',
+          payload jsonb,
+          result jsonb,
+          error text,
+          completed_at timestamptz,
+          created_at timestamptz not null default clock_timestamp()
+        );
+        insert into public.research_requests (type) values ('memo'), ('memo'), ('fundamentals'), ('memo'), ('memo');
+    """)
+    try:
+        admin.execute(SQL.read_text())
+        claim = "select alfred_claim_items('research_requests', %s, 'type', array['memo'])"
+        holder = psycopg.connect(DATABASE_URL)                      # a runner mid-claim, transaction open
+        held = holder.execute(claim, [2]).fetchone()[0]
+        other = admin.execute(claim, [10]).fetchone()[0]            # skips the locked rows instead of waiting
+        holder.commit()
+        assert [row["id"] for row in held] == [1, 2] and [row["id"] for row in other] == [4, 5]
+        assert admin.execute(claim, [10]).fetchone()[0] == []
+
+        finished = admin.execute("select alfred_finish_items('research_requests', %s)", [Jsonb([
+            {"id": 1, "status": "completed", "result": {"memo": "done"}, "completed_at": "2026-10-17T00:00:00Z"},
+            {"id": 2, "status": "pending"},
+        ])]).fetchone()[0]
+        assert finished == 2
+        assert admin.execute("select id, status, result from public.research_requests where id <= 2 order by id"
+                             ).fetchall() == [(1, "completed", {"memo": "done"}), (2, "pending", None)]
+        holder.close()
+    finally:
+        admin.execute("drop function if exists public.alfred_claim_items(text, integer, text, text[]);"
+                      "drop function if exists public.alfred_finish_items(text, jsonb);"
+                      "drop table public.research_requests;")
+        admin.close()
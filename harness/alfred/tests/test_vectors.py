@@ -0,0 +1,100 @@
+"""Tests for the embedded vector index: filters, incremental inserts, persistence, IVF at scale."""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from alfred.vectors import Passage, VectorIndex
+
+
+def axis(i, dim=8):
+    v = np.zeros(dim, dtype=np.float32)
+    v[i % dim] = 1.0
+    return v
+
+
+JOURNAL = [
+    Passage("daily_logs/2026-01-05#0", "Sarah is stuck on ETL", "journal", "2026-01-05", ("Sarah Chen",)),
+    Passage("daily_logs/2026-02-10#0", "Marco on BCI markets", "journal", "2026-02-10", ("Marco",)),
+    Passage("conversations/w1#3", "Sarah wants a pipeline demo", "transcript", "2026-03-01", ("Sarah Chen", "Marco")),
+    Passage("insights/i9", "Infra pain is everywhere", "note"),
+]
+
+
+def test_filters_narrow_results_and_survive_reopen(tmp_path):
+    index = VectorIndex(tmp_path)
+    index.add(JOURNAL, [axis(0), axis(1), axis(0) + 0.1 * axis(1), axis(0) + 0.5 * axis(2)])
+
+    assert [h.passage.ref for h in index.search(axis(0), k=2)] == ["daily_logs/2026-01-05#0", "conversations/w1#3"]
+    assert [h.passage.ref for h in index.search(axis(0), contact="sarah  chen")] == [
+        "daily_logs/2026-01-05#0", "conversations/w1#3"]
+    assert [h.passage.ref for h in index.search(axis(0), source="transcript")] == ["conversations/w1#3"]
+    assert {h.passage.ref for h in index.search(axis(0), since="2026-02-01")} == {
+        "daily_logs/2026-02-10#0", "conversations/w1#3"}
+    assert "insights/i9" not in {h.passage.ref for h in index.search(axis(0), until="2026-12-31")}
+    assert index.search(axis(0), contact="nobody") == [] and index.search(axis(0), source="email") == []
+    index.close()
+
+    reopened = VectorIndex(tmp_path)
+    hit = reopened.search(axis(0), k=1, contact="Marco")[0]
+    assert hit.passage == JOURNAL[2] and hit.score == pytest.approx(0.995, abs=1e-3)
+
+
+def test_unchanged_refs_are_skipped_and_changed_ones_superseded(tmp_path):
+    embedded = []
+
+    async def embedder(texts):
+        embedded.extend(texts)
+        return [axis(len(t)) for t in texts]
+
+    index = VectorIndex(tmp_path, embedder=embedder)
+    assert asyncio.run(index.index(JOURNAL)) == 4
+    assert asyncio.run(index.index(JOURNAL)) == 0
+    edited = Passage("insights/i9", "Infra pain", "note", contacts=("Sarah Chen",))
+    assert asyncio.run(index.index([*JOURNAL[:3], edited])) == 1
+    assert len(embedded) == 5 and len(index) == 4
+
+    refs = [h.passage.ref for h in index.search(axis(0), k=10, contact="Sarah Chen")]
+    assert sorted(refs) == ["conversations/w1#3", "daily_logs/2026-01-05#0", "insights/i9"]
+    [hit] = asyncio.run(index.related("Infra pain", k=1))
+    assert hit.passage == edited
+
+
+def test_crash_between_vector_append_and_commit_is_repaired_on_open(tmp_path):
+    index = VectorIndex(tmp_path)
+    index.add(JOURNAL[:2], [axis(0), axis(1)])
+    index.close()
+    with (tmp_path / "vectors.f32").open("ab") as f:
+        f.write(axis(2).tobytes())  # a row whose metadata never committed
+    reopened = VectorIndex(tmp_path)
+    reopened.add(JOURNAL[2:3], [axis(3)])
+    assert reopened.search(axis(3), k=1)[0].passage == JOURNAL[2]
+
+
+def test_ivf_over_100k_chunks_is_fast_and_accurate(tmp_path):
+    rng = np.random.default_rng(7)
+    dim, n = 128, 100_000
+    topics = rng.normal(size=(400, dim))
+    vectors = (topics[rng.integers(0, 400, n)] + 0.6 * rng.normal(size=(n, dim))).astype(np.float32)
+    index = VectorIndex(tmp_path)
+    for start in range(0, n, 20_000):  # incremental: trains at the first batch, retrains as it doubles
+        index.add([Passage(f"c{i}", "", "transcript", "2026-05-01", (f"p{i % 500}",))
+                   for i in range(start, start + 20_000)], vectors[start:start + 20_000])
+    assert index._centroids is not None and index._trained_n == 80_000
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[:50] + 0.3 * rng.normal(size=(50, dim)).astype(np.float32)
+    latencies, recall = [], []
+    for query in queries:
+        started = time.perf_counter()
+        hits = index.search(query, k=10)
+        latencies.append(time.perf_counter() - started)
+        exact = set(np.argsort(-(unit @ query))[:10].tolist())
+        recall.append(len(exact & {int(h.passage.ref[1:]) for h in hits}) / 10)
+    assert np.mean(recall) >= 0.9
+    assert np.median(latencies) < 0.05  # a few ms on a laptop; loose for shared CI
+
+    hits = index.search(queries[0], k=5, contact="p3")
+    assert len(hits) == 5 and all(h.passage.contacts == ("p3",) for h in hits)
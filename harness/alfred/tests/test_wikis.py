@@ -0,0 +1,186 @@
+"""Tests for WikiClient's write-behind path against an in-memory stand-in for /api/wikis."""
+
+import asyncio
+import itertools
+
+import pytest
+
+from alfred.tools.wikis import WikiClient, WikiError
+
+
+class Response:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+        self.text = str(data)
+
+    def json(self):
+        return self.data
+
+
+class FakeWikis:
+    """Enough of the Website route: 404 for unknown slugs, 412 on a stale If-Match."""
+
+    def __init__(self, pages):
+        self.clock = itertools.count(1)
+        self.pages = {slug: self._stamp({"slug": slug, "title": slug, "surface": "crm", "contentMd": text})
+                      for slug, text in pages.items()}
+        self.calls = []
+        self.idempotent = []
+
+    def _stamp(self, wiki):
+        return {**wiki, "updatedAt": f"2026-10-17T00:00:{next(self.clock):02d}Z"}
+
+    def edit(self, slug, content):
+        """Someone else (Lori, another process) writes the page."""
+        self.pages[slug] = self._stamp({**self.pages[slug], "contentMd": content})
+
+    async def request(self, method, url, *, json=None, headers=None, idempotent=None, **kwargs):
+        await asyncio.sleep(0)
+        slug = url.rsplit("/", 1)[1]
+        self.calls.append((method, slug, (headers or {}).get("If-Match")))
+        self.idempotent.append(idempotent)
+        wiki = self.pages.get(slug)
+        if wiki is None:
+            return Response(404, {"error": "wiki not found"})
+        if method == "GET":
+            return Response(200, {"wiki": wiki})
+        if "If-Match" in headers and headers["If-Match"].strip('"') != wiki["updatedAt"]:
+            return Response(412, {"error": "conflict", "wiki": wiki})
+        fields = {k: v for k, v in json.items() if k in ("contentMd", "title", "surface", "updatedBy")}
+        self.pages[slug] = self._stamp({**wiki, **fields})
+        return Response(200, {"wiki": self.pages[slug]})
+
+
+def append(line):
+    return lambda text: f"{text}\n{line}"
+
+
+def client(fake):
+    return WikiClient(fake, "https://example.test/api/wikis", "secret", window=0.01)
+
+
+def test_burst_of_updates_to_one_page_is_one_put():
+    fake = FakeWikis({"sarah": "# Sarah"})
+    wikis = client(fake)
+
+    async def scenario():
+        return await asyncio.gather(
+            wikis.update("sarah", append("- met 10/1"), workflow="crm_rollup"),
+            wikis.update("sarah", append("- owes deck"), workflow="meeting_actions"),
+            wikis.update("sarah", append("- met 10/2"), workflow="crm_rollup"),
+        )
+
+    results = asyncio.run(scenario())
+    assert [m for m, _, _ in fake.calls] == ["GET", "PUT"]
+    assert fake.pages["sarah"]["contentMd"] == "# Sarah\n- met 10/1\n- owes deck\n- met 10/2"
+    assert fake.pages["sarah"]["updatedBy"] == "agent:crm_rollup,meeting_actions"
+    assert all(r == fake.pages["sarah"] for r in results)
+    assert wikis.stats["coalesced"] == 2
+
+
+def test_no_op_writes_are_confirmed_with_a_get_and_not_sent():
+    fake = FakeWikis({"sarah": "# Sarah"})
+    wikis = client(fake)
+
+    async def scenario():
+        await wikis.update("sarah", "# Sarah\n- met", workflow="crm_rollup")
+        await wikis.update("sarah", lambda text: text, workflow="crm_rollup")
+        await wikis.update("sarah", "# Sarah\n- met", workflow="crm_rollup")
+
+    asyncio.run(scenario())
+    assert [m for m, _, _ in fake.calls] == ["GET", "PUT", "GET", "GET"]
+    assert wikis.stats["skipped"] == 2
+
+
+def test_write_matching_a_stale_cached_page_is_still_sent():
+    fake = FakeWikis({"sarah": "# Sarah"})
+    wikis = client(fake)
+
+    async def scenario():
+        await wikis.update("sarah", "# Sarah\n- met", workflow="crm_rollup")
+        fake.edit("sarah", "# Sarah Chen")                     # Lori rewrites the page
+        return await wikis.update("sarah", "# Sarah\n- met", workflow="crm_rollup")
+
+    wiki = asyncio.run(scenario())
+    assert fake.pages["sarah"]["contentMd"] == "# Sarah\n- met" and wiki == fake.pages["sarah"]
+    assert [m for m, _, _ in fake.calls] == ["GET", "PUT", "GET", "PUT"]
+    assert wikis.stats["skipped"] == 0
+
+
+def test_conflicting_write_is_reapplied_on_the_current_page():
+    fake = FakeWikis({"sarah": "# Sarah"})
+    wikis = client(fake)
+
+    async def scenario():
+        await wikis.get("sarah")
+        fake.edit("sarah", "# Sarah Chen")      # lands after our read
+        await wikis.update("sarah", append("- met 10/1"), workflow="crm_rollup")
+
+    asyncio.run(scenario())
+    assert fake.pages["sarah"]["contentMd"] == "# Sarah Chen\n- met 10/1"
+    assert [m for m, _, _ in fake.calls] == ["GET", "PUT", "PUT"]
+    assert wikis.stats["conflicts"] == 1
+
+
+class LossyWikis(FakeWikis):
+    """The first PUT lands but its response is lost; the pool then resends it if allowed to,
+    or always when `resend` (a 502 from a proxy after the origin committed looks the same)."""
+
+    def __init__(self, pages, resend=False):
+        super().__init__(pages)
+        self.resend = resend
+        self.lost = False
+
+    async def request(self, method, url, *, json=None, headers=None, idempotent=None, **kwargs):
+        response = await super().request(method, url, json=json, headers=headers, idempotent=idempotent)
+        if method != "PUT" or self.lost:
+            return response
+        self.lost = True
+        if idempotent is False and not self.resend:
+            raise ConnectionError("connection reset by peer")
+        return await super().request(method, url, json=json, headers=headers, idempotent=idempotent)
+
+
+def test_write_whose_response_was_lost_is_not_applied_twice():
+    fake = LossyWikis({"sarah": "# Sarah"})
+    wikis = client(fake)
+
+    async def scenario():
+        return await wikis.update("sarah", append("- met 10/1"), workflow="crm_rollup")
+
+    wiki = asyncio.run(scenario())
+    assert fake.pages["sarah"]["contentMd"] == "# Sarah\n- met 10/1" and wiki == fake.pages["sarah"]
+    assert [m for m, _, _ in fake.calls] == ["GET", "PUT", "GET"]     # not resent; a GET found it landed
+    assert fake.idempotent[1] is False
+    assert wikis.stats["conflicts"] == 0
+
+
+def test_conflict_carrying_our_own_write_counts_as_landed():
+    fake = LossyWikis({"sarah": "# Sarah"}, resend=True)
+    wikis = client(fake)
+
+    async def scenario():
+        return await wikis.update("sarah", append("- met 10/1"), workflow="crm_rollup")
+
+    wiki = asyncio.run(scenario())
+    assert fake.pages["sarah"]["contentMd"] == "# Sarah\n- met 10/1" and wiki == fake.pages["sarah"]
+    assert [m for m, _, _ in fake.calls] == ["GET", "PUT", "PUT"]   # the resend got 412 with our write
+    assert wikis.stats["conflicts"] == 0
+
+
+def test_missing_page_fails_every_waiter_and_flush_drains():
+    fake = FakeWikis({"sarah": "# Sarah"})
+    wikis = WikiClient(fake, "https://example.test/api/wikis", "secret", window=60)
+
+    async def scenario():
+        missing = [asyncio.create_task(wikis.update("nobody", "x", workflow="crm_rollup")) for _ in range(2)]
+        present = asyncio.create_task(wikis.update("sarah", append("- met"), workflow="crm_rollup"))
+        await asyncio.sleep(0)
+        await wikis.flush()             # doesn't wait out the 60s window
+        assert present.done() and present.result()["contentMd"] == "# Sarah\n- met"
+        for task in missing:
+            with pytest.raises(WikiError):
+                await task
+
+    asyncio.run(scenario())
@@ -1 +1,177 @@
-"""Tests for alfred.workflows.*. Phase 4 scaffold — see ../../README.md."""
+"""Tests for alfred.workflows.*."""
+
+import asyncio
+import json
+import re
+
+from alfred.config import Config
+from alfred.context import Context
+from alfred.models.base import Chunk, Completion
+from alfred.workflows.base import WorkItem
+from alfred.workflows.meeting_actions import MeetingActions, merge_action_items
+
+
+class FakeOllama:
+    """Streams one action item per 'ACTION <owner>: <task>' line in the excerpt."""
+
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def stream(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.02)
+            items = [{"task": task, "owner": owner, "due": None, "priority": "medium"}
+                     for owner, task in re.findall(r"ACTION (\w+): (.+)", messages[-1]["content"])]
+            text = json.dumps({"action_items": items})
+            for i in range(0, len(text), 16):
+                yield Chunk(text[i:i + 16])
+            yield Chunk("", done=True, input_tokens=len(messages[-1]["content"]) // 4, output_tokens=len(text) // 4)
+        finally:
+            self.active -= 1
+
+
+def transcript(edit=None):
+    lines = []
+    for i in range(400):
+        speaker = ("Lori", "Sam", "Priya")[i % 3]
+        lines.append(f"{speaker}: point {i} about the fund raise, the deck, timing and the data room review.")
+        if i % 50 == 25:
+            lines.append(f"ACTION {speaker}: send the updated deck version {i}")
+    if edit is not None:
+        lines[edit] = "Sam: actually let's revisit the hiring plan next week instead."
+    return "\n".join(lines)
+
+
+def run(ctx, text):
+    item = WorkItem("deepops:meetings", "m1", "meeting_transcript", {"transcript": text})
+    return asyncio.run(MeetingActions(ctx).run(item))
+
+
+def test_merge_collapses_items_seen_in_overlapping_chunks():
+    merged = merge_action_items([
+        [{"task": "Send the deck to Acme", "owner": "Lori", "due": None, "priority": "medium"}],
+        [{"task": "send deck to Acme Capital", "owner": None, "due": "Friday", "priority": "high"},
+         {"task": "Book the offsite", "owner": "Sam", "due": None, "priority": "low"}],
+    ])
+    assert len(merged) == 2
+    assert merged[0] == {"task": "send deck to Acme Capital", "owner": "Lori", "due": "Friday",
+                         "priority": "high", "chunks": [0, 1]}
+
+
+def test_long_meeting_maps_in_parallel_on_the_local_tier_and_reruns_from_cache(tmp_path):
+    ctx = Context(Config(cache_path=str(tmp_path / "cache.sqlite"), vector_path=str(tmp_path / "vectors"),
+                         journal_path=str(tmp_path / "journal.sqlite"), ollama_max_in_flight=4))
+    fake = ctx.ollama.client = FakeOllama()
+
+    result = run(ctx, transcript())
+    assert result["chunks"] > 4 and result["escalated_chunks"] == 0
+    assert fake.peak == 4                                 # chunks ran concurrently, capped by the scheduler
+    tasks = [item["task"] for item in result["action_items"]]
+    assert len(tasks) == 8 and len(set(tasks)) == 8       # overlap duplicates merged away
+
+    first_calls = fake.calls
+    run(ctx, transcript(edit=200))
+    assert fake.calls - first_calls <= 2                  # only the edited chunk (and its overlap successor)
+    asyncio.run(ctx.aclose())
+
+
+class FakeTodos:
+    def __init__(self, ollama):
+        self.ollama = ollama
+        self.rows = {}
+        self.calls_when_written = []
+
+    async def add(self, todo):
+        self.calls_when_written.append(self.ollama.calls)
+        self.rows.setdefault(todo["dedupe_key"], dict(todo))
+
+    async def settle(self, dedupe_key, values):
+        row = self.rows.get(dedupe_key)
+        if row and row.get("provisional"):
+            row.update(values, provisional=False)
+
+
+def test_action_items_reach_ops_todos_as_they_close_and_only_once(tmp_path):
+    ctx = Context(Config(cache_path=str(tmp_path / "cache.sqlite"), vector_path=str(tmp_path / "vectors"),
+                         journal_path=str(tmp_path / "journal.sqlite"), ollama_max_in_flight=2))
+    fake = ctx.ollama.client = FakeOllama()
+    todos = ctx.todos = FakeTodos(fake)
+
+    result = run(ctx, transcript())
+    assert len(todos.rows) == len(result["action_items"]) == 8
+    assert len(todos.calls_when_written) == 8                       # overlap duplicates weren't sent
+    assert todos.calls_when_written[0] < result["chunks"]           # first todo landed while chunks were pending
+    assert {row["source_id"] for row in todos.rows.values()} == {"m1"}
+    assert not any(row["provisional"] for row in todos.rows.values())
+
+    run(ctx, transcript())                                         # re-run from cache: same keys
+    assert len(todos.rows) == 8
+    asyncio.run(ctx.aclose())
+
+
+class RatedOllama(FakeOllama):
+    """Like FakeOllama, but 'ACTION <owner> <priority>: <task>'; owner 'nobody' is None."""
+
+    async def stream(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        items = [{"task": task, "owner": None if owner == "nobody" else owner, "due": None, "priority": priority}
+                 for owner, priority, task in re.findall(r"ACTION (\w+) (\w+): (.+)", messages[-1]["content"])]
+        yield Chunk(json.dumps({"action_items": items}))
+        yield Chunk("", done=True, input_tokens=50, output_tokens=50)
+
+
+def test_streamed_todo_rows_are_settled_with_fields_a_later_chunk_merged_in(tmp_path):
+    ctx = Context(Config(cache_path=str(tmp_path / "cache.sqlite"), vector_path=str(tmp_path / "vectors"),
+                         journal_path=str(tmp_path / "journal.sqlite")))
+    fake = ctx.ollama.client = RatedOllama()
+    todos = ctx.todos = FakeTodos(fake)
+    lines = [f"Sam: point {i} about the fund raise, the deck, timing and the data room review." for i in range(400)]
+    lines[25] = "ACTION nobody medium: send the deck to Acme"
+    lines[375] = "ACTION Lori high: send the deck to Acme Capital"
+
+    result = run(ctx, "\n".join(lines))
+    assert result["chunks"] > 1 and len(result["action_items"]) == 1
+    assert len(todos.calls_when_written) == 1                       # inserted once as it streamed, then settled
+    [row] = todos.rows.values()
+    assert (row["owner"], row["priority"], row["provisional"]) == ("Lori", "high", False)
+    assert row["task"] == "send the deck to Acme Capital"
+    asyncio.run(ctx.aclose())
+
+
+class TruncatingOllama(FakeOllama):
+    """Streams one complete action item, then stops mid-document."""
+
+    async def stream(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        self.calls += 1
+        yield Chunk('{"action_items": [{"task": "call the printer", "owner": "Sam", "due": null, '
+                    '"priority": "low"}, {"task": "bo')
+        yield Chunk("", done=True, input_tokens=50, output_tokens=50)
+
+
+class EmptyClaude:
+    async def complete(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        return Completion(text='{"action_items": []}', model=model, input_tokens=50, output_tokens=10)
+
+    async def stream(self, messages, *, model, system=None, max_tokens=1024, format=None):
+        yield Chunk('{"action_items": []}')
+        yield Chunk("", done=True, input_tokens=50, output_tokens=10)
+
+
+def test_rows_streamed_by_an_aborted_attempt_are_retracted(tmp_path):
+    ctx = Context(Config(cache_path=str(tmp_path / "cache.sqlite"), vector_path=str(tmp_path / "vectors"),
+                         journal_path=str(tmp_path / "journal.sqlite")))
+    fake = ctx.ollama.client = TruncatingOllama()
+    ctx.models.clients["claude"] = EmptyClaude()
+    todos = ctx.todos = FakeTodos(fake)
+
+    result = run(ctx, "Sam: ACTION call the printer about the banners.")
+    assert result["action_items"] == [] and result["escalated_chunks"] == 1
+    [row] = todos.rows.values()
+    assert (row["task"], row["status"], row["provisional"]) == ("call the printer", "retracted", False)
+    asyncio.run(ctx.aclose())
@@ -1 +1,114 @@
-"""Tool stub: firestore. Phase 4 scaffold — see ../../README.md."""
+"""Website Firestore R/W via firebase-admin.
+
+`users/{uid}/inbox_messages` is written by the Telegram router for the thesis
+and lordas sources with status 'queued' and a `kind` (freeform | research |
+development | backtest) that serves as the dispatch type. Alfred moves a
+message through queued → processing → done | failed, claiming each one in a
+transaction so overlapping runners can't both take it.
+
+Claims are oldest-first by `created_at`, ordered server-side; the composite
+indexes this needs are in the repo's firestore.indexes.json. Messages queued
+before the router wrote `kind` are freeform: when freeform is being claimed,
+a second page without the `kind` filter picks them up.
+
+firebase-admin is synchronous; calls run on a worker thread.
+
+In push mode, listen() keeps an on_snapshot listener on queued messages and
+calls `notify` (from firebase-admin's watch thread) whenever one appears.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Collection
+
+from alfred.workflows.base import WorkItem
+
+QUEUED = "queued"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+
+@functools.lru_cache(maxsize=None)
+def client(credentials_path: str):
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(credentials_path))
+    return firestore.client()
+
+
+class InboxQueue:
+    """users/{uid}/inbox_messages as a work queue keyed on `kind`."""
+
+    def __init__(self, name: str, credentials_path: str, uid: str):
+        self.name = name
+        self.credentials_path = credentials_path
+        self.uid = uid
+
+    def _collection(self):
+        return client(self.credentials_path).collection("users").document(self.uid).collection("inbox_messages")
+
+    def _item(self, doc_id: str, data: dict[str, Any]) -> WorkItem:
+        return WorkItem(source=self.name, id=doc_id, type=data.get("kind") or "freeform", payload=data, record=data)
+
+    async def claim(self, types: Collection[str], limit: int) -> list[WorkItem]:
+        return await asyncio.to_thread(self._claim, sorted(types), limit)
+
+    def _claim(self, types: list[str], limit: int) -> list[WorkItem]:
+        from firebase_admin import firestore
+
+        db = client(self.credentials_path)
+        queued = self._collection().where("status", "==", QUEUED)
+        snaps = list(queued.where("kind", "in", types[:30]).order_by("created_at").limit(limit).stream())
+        if "freeform" in types:
+            # A missing field can't be filtered on; scan the oldest queued page for kind-less messages
+            snaps += [snap for snap in queued.order_by("created_at").limit(limit).stream()
+                      if not snap.to_dict().get("kind")]
+            snaps = sorted(snaps, key=lambda snap: snap.get("created_at"))[:limit]
+
+        @firestore.transactional
+        def take(transaction, ref):
+            snap = ref.get(transaction=transaction)
+            if not snap.exists or snap.get("status") != QUEUED:
+                return None
+            transaction.update(ref, {"status": PROCESSING, "claimed_at": firestore.SERVER_TIMESTAMP})
+            return snap.to_dict()
+
+        claimed = []
+        for snap in snaps:
+            data = take(db.transaction(), snap.reference)
+            if data is not None:
+                claimed.append(self._item(snap.id, data))
+        return claimed
+
+    async def listen(self, notify: Callable[[], None]) -> Callable[[], Awaitable[None]]:
+        """Call `notify` whenever a message is queued; returns an async unsubscribe."""
+        def on_snapshot(_snapshots, changes, _read_time):
+            if any(change.type.name in ("ADDED", "MODIFIED") for change in changes):
+                notify()
+
+        query = self._collection().where("status", "==", QUEUED)
+        watch = await asyncio.to_thread(query.on_snapshot, on_snapshot)
+
+        async def unsubscribe() -> None:
+            await asyncio.to_thread(watch.unsubscribe)
+        return unsubscribe
+
+    async def complete(self, item: WorkItem, result: dict[str, Any]) -> None:
+        from firebase_admin import firestore
+        await asyncio.to_thread(self._set, item, {
+            "status": DONE, "result": result, "completed_at": firestore.SERVER_TIMESTAMP,
+        })
+
+    async def fail(self, item: WorkItem, error: str) -> None:
+        await asyncio.to_thread(self._set, item, {"status": FAILED, "error": error[:2000]})
+
+    async def release(self, item: WorkItem) -> None:
+        await asyncio.to_thread(self._set, item, {"status": QUEUED})
+
+    def _set(self, item: WorkItem, values: dict[str, Any]) -> None:
+        self._collection().document(item.id).update(values)
@@ -0,0 +1,172 @@
+"""Shared HTTP layer for every tool and the Ollama client.
+
+One HttpPool is created at runner startup and injected everywhere through
+Context, so connections (and TLS sessions) to the Website, Wave, Polygon and
+Ollama are opened once and kept alive instead of per request.
+
+- One httpx.AsyncClient per host: per-host connection limits, and one HTTP/2
+  connection multiplexes concurrent requests when `h2` is installed
+  (HTTP/1.1 keep-alive otherwise).
+- Connect/read/write/pool timeouts on every request.
+- Retries with jittered exponential backoff on transport errors and
+  429/502/503/504 (honoring Retry-After), for idempotent requests only.
+- A retry budget: retries may add at most `ratio` extra load on top of
+  recent traffic (plus a small floor), so an outage degrades into fast
+  failures instead of a retry storm.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class RetryBudget:
+    """Token bucket for retries: each request deposits `ratio` tokens, each retry spends one.
+
+    `min_per_second` refills independently of traffic so a quiet client can
+    still retry its occasional failure. Tokens are capped so a long quiet
+    stretch can't bank an unbounded burst.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, cap: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.cap = cap
+        self.tokens = cap
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.cap, self.tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def deposit(self) -> None:
+        self._refill()
+        self.tokens = min(self.cap, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+@dataclass(frozen=True)
+class HttpSettings:
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    max_connections_per_host: int = 10
+    keepalive_expiry: float = 60.0
+    max_retries: int = 3
+    backoff_base: float = 0.25
+    backoff_cap: float = 8.0
+
+
+class HttpPool:
+    """Pooled keep-alive clients, one per host, with retries under a shared budget."""
+
+    def __init__(self, settings: HttpSettings = HttpSettings(), budget: RetryBudget | None = None):
+        self.settings = settings
+        self.budget = budget or RetryBudget()
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self._clients: dict[str, Any] = {}
+        self.stats = {"requests": 0, "retries": 0, "budget_exhausted": 0}
+
+    def _client(self, url: str):
+        import httpx
+
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(host)
+        if client is None:
+            s = self.settings
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=httpx.Timeout(s.read_timeout, connect=s.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=s.max_connections_per_host,
+                    max_keepalive_connections=s.max_connections_per_host,
+                    keepalive_expiry=s.keepalive_expiry,
+                ),
+            )
+            self._clients[host] = client
+        return client
+
+    def _delay(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.settings.backoff_cap)
+            except ValueError:
+                pass  # HTTP-date form; fall back to backoff
+        ceiling = min(self.settings.backoff_cap, self.settings.backoff_base * 2 ** attempt)
+        return random.uniform(ceiling / 2, ceiling)
+
+    async def request(self, method: str, url: str, *, idempotent: bool | None = None, **kwargs):
+        """Send a request, retrying idempotent ones within the retry budget.
+
+        Pass idempotent=True for a POST the server dedupes (e.g. inbox
+        messages with a dedupe_key). Returns the final httpx.Response —
+        status checking is the caller's job.
+        """
+        import httpx
+
+        method = method.upper()
+        retryable = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        client = self._client(url)
+        self.stats["requests"] += 1
+        self.budget.deposit()
+
+        attempt = 0
+        while True:
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if not self._may_retry(retryable, attempt):
+                    raise
+                logger.warning(f"{method} {url}: {type(e).__name__}; retrying")
+                delay = self._delay(attempt, None)
+            else:
+                if response.status_code not in RETRY_STATUSES or not self._may_retry(retryable, attempt):
+                    return response
+                logger.warning(f"{method} {url}: HTTP {response.status_code}; retrying")
+                delay = self._delay(attempt, response.headers.get("retry-after"))
+                await response.aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[Any]:
+        """Open a streamed response on the pooled connection. Never retried:
+        part of the body may already have been consumed by the caller.
+        """
+        self.stats["requests"] += 1
+        self.budget.deposit()
+        async with self._client(url).stream(method.upper(), url, **kwargs) as response:
+            yield response
+
+    def _may_retry(self, retryable: bool, attempt: int) -> bool:
+        if not retryable or attempt >= self.settings.max_retries:
+            return False
+        if not self.budget.try_spend():
+            self.stats["budget_exhausted"] += 1
+            return False
+        self.stats["retries"] += 1
+        return True
+
+    async def aclose(self) -> None:
+        clients, self._clients = list(self._clients.values()), {}
+        await asyncio.gather(*(c.aclose() for c in clients), return_exceptions=True)
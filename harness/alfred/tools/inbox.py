@@ -1 +1,49 @@
-"""Tool stub: inbox. Phase 4 scaffold — see ../../README.md."""
+"""POST /api/inbox for outbound Telegram alerts.
+
+Payload contract is Website lib/inbox/types.ts: source, kind, severity,
+title, optional body/link/dedupe_key. Messages with a dedupe_key are safe
+to retry — the router drops repeats.
+"""
+
+from __future__ import annotations
+
+from alfred.tools.http import HttpPool
+
+SOURCES = ("armstrong", "alamo-bernal", "thesis", "lordas")
+KINDS = ("alert", "signal", "info", "digest_item")
+SEVERITIES = ("critical", "warn", "info")
+
+
+class InboxError(RuntimeError):
+    pass
+
+
+class InboxClient:
+    def __init__(self, http: HttpPool, url: str, secret: str | None):
+        self.http = http
+        self.url = url
+        self.secret = secret
+
+    async def send(self, source: str, kind: str, severity: str, title: str, *,
+                   body: str | None = None, link: str | None = None, dedupe_key: str | None = None) -> dict:
+        if source not in SOURCES or kind not in KINDS or severity not in SEVERITIES:
+            raise ValueError(f"invalid inbox message: source={source!r} kind={kind!r} severity={severity!r}")
+        if not self.secret:
+            raise InboxError("INBOX_SHARED_SECRET not set")
+
+        payload = {"source": source, "kind": kind, "severity": severity, "title": title}
+        for key, value in (("body", body), ("link", link), ("dedupe_key", dedupe_key)):
+            if value is not None:
+                payload[key] = value
+
+        response = await self.http.request(
+            "POST", self.url, json=payload,
+            headers={"x-inbox-secret": self.secret},
+            idempotent=dedupe_key is not None,
+        )
+        if response.status_code != 200:
+            raise InboxError(f"inbox HTTP {response.status_code}: {response.text[:200]}")
+        data = response.json()
+        if not data.get("ok"):
+            raise InboxError(f"inbox HTTP 200: {data.get('error', response.text[:200])}")
+        return data
@@ -1 +1,43 @@
-"""Tool stub: polygon. Phase 4 scaffold — see ../../README.md."""
+"""Polygon.io market data for memo workflows (mirrors DeepOps core/ usage).
+
+API key auth against https://api.polygon.io. Read-only; no broker access.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from alfred.tools.http import HttpPool
+
+POLYGON_API = "https://api.polygon.io"
+
+
+class PolygonError(RuntimeError):
+    pass
+
+
+class PolygonClient:
+    def __init__(self, http: HttpPool, api_key: str | None):
+        self.http = http
+        self.api_key = api_key
+
+    async def _get(self, path: str, **params) -> dict[str, Any]:
+        if not self.api_key:
+            raise PolygonError("POLYGON_API_KEY not set")
+        response = await self.http.request(
+            "GET", f"{POLYGON_API}{path}", params={**params, "apiKey": self.api_key},
+        )
+        if response.status_code != 200:
+            raise PolygonError(f"Polygon {path}: HTTP {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    async def ticker_details(self, ticker: str) -> dict[str, Any]:
+        return (await self._get(f"/v3/reference/tickers/{ticker.upper()}")).get("results", {})
+
+    async def daily_bars(self, ticker: str, start: str, end: str) -> list[dict[str, Any]]:
+        """Adjusted daily OHLCV bars between YYYY-MM-DD dates, oldest first."""
+        data = await self._get(
+            f"/v2/aggs/ticker/{ticker.upper()}/range/1/day/{start}/{end}",
+            adjusted="true", sort="asc", limit=50000,
+        )
+        return data.get("results", [])
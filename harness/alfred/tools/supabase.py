@@ -1 +1,233 @@
-"""Tool stub: supabase. Phase 4 scaffold — see ../../README.md."""
+"""DeepOps + AB Supabase R/W (whitelisted tables).
+
+Queue tables (`research_requests`, `meetings`) move through
+pending → in_progress → completed | failed. Alfred only claims rows whose
+type a registered workflow handles, so rows owned by the DeepOps research
+daemon (fundamentals, backtest, ...) are never touched.
+
+supabase-py is synchronous; every call runs on a worker thread so the
+runner's event loop never blocks on PostgREST. Both projects' queues and the
+invocation log share one client, and so one HTTP connection pool, per project.
+
+Claims and status writes are batched:
+
+- claim() takes up to `limit` rows in one call to the alfred_claim_items RPC
+  (sql/alfred_queue.sql: `FOR UPDATE SKIP LOCKED`, so overlapping runners
+  neither double-claim nor block). Until that function is installed in a
+  project it falls back to two requests per batch: select the oldest pending
+  ids, then one update conditional on `status = pending` that returns only
+  the rows this runner won;
+- complete/fail/release writes arriving within `write_window` seconds are sent
+  together: one alfred_finish_items call, or without it one update per
+  distinct set of values (a shutdown's releases are a single request).
+
+In push mode, listen() subscribes to Supabase realtime postgres_changes for
+pending rows. The table has to be in the project's `supabase_realtime`
+publication (a dashboard setting — the harness never alters schema, so no
+LISTEN/NOTIFY triggers).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Collection
+
+from alfred.workflows.base import WorkItem
+
+logger = logging.getLogger(__name__)
+
+# Tables the harness may read or write. Anything else is a bug.
+TABLES = frozenset({"research_requests", "meetings", "ops_todos", "harness_invocations"})
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+FAILED = "failed"
+
+CLAIM_RPC = "alfred_claim_items"
+FINISH_RPC = "alfred_finish_items"
+_MISSING_FUNCTION = "PGRST202"  # PostgREST: no such function in the schema cache
+
+
+@functools.lru_cache(maxsize=None)
+def client(url: str, key: str):
+    """One supabase-py client per project, reused by every queue on it."""
+    from supabase import create_client
+    return create_client(url, key)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class SupabaseQueue:
+    """A pending-status queue table in one Supabase project.
+
+    `fixed_type` is for tables whose rows are all one kind of work (meetings →
+    meeting transcripts) rather than carrying a type column.
+    """
+
+    def __init__(self, name: str, url: str, key: str, table: str,
+                 type_field: str = "type", fixed_type: str | None = None, *, write_window: float = 0.05):
+        if table not in TABLES:
+            raise ValueError(f"{table!r} is not a whitelisted harness table")
+        self.name = name
+        self.url = url
+        self.key = key
+        self.table = table
+        self.type_field = type_field
+        self.fixed_type = fixed_type
+        self.write_window = write_window  # seconds status writes wait to share a request
+        self.rpc = True                   # cleared once the project turns out not to have the functions
+        self.stats = {"claimed": 0, "writes": 0, "requests": 0}
+        self._writes: list[tuple[Any, dict[str, Any], asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def _table(self):
+        self.stats["requests"] += 1
+        return client(self.url, self.key).table(self.table)
+
+    def _call(self, function: str, params: dict[str, Any]) -> tuple[bool, Any]:
+        """(True, data) from an RPC, or (False, None) if the project doesn't have it."""
+        if not self.rpc:
+            return False, None
+        self.stats["requests"] += 1
+        try:
+            return True, client(self.url, self.key).rpc(function, params).execute().data
+        except Exception as e:
+            if getattr(e, "code", None) != _MISSING_FUNCTION:
+                raise
+            logger.warning(f"{self.name}: {function} is not installed (sql/alfred_queue.sql); "
+                           "using conditional updates")
+            self.rpc = False
+            return False, None
+
+    def _item(self, row: dict[str, Any]) -> WorkItem:
+        payload = row.get("payload") if isinstance(row.get("payload"), dict) else row
+        return WorkItem(
+            source=self.name,
+            id=str(row["id"]),
+            type=self.fixed_type or row[self.type_field],
+            payload=payload,
+            record=row,
+        )
+
+    async def claim(self, types: Collection[str], limit: int) -> list[WorkItem]:
+        if self.fixed_type and self.fixed_type not in types:
+            return []
+        return await asyncio.to_thread(self._claim, sorted(types), limit)
+
+    def _claim(self, types: list[str], limit: int) -> list[WorkItem]:
+        typed = not self.fixed_type
+        ok, rows = self._call(CLAIM_RPC, {"p_table": self.table, "p_limit": limit,
+                                          "p_type_field": self.type_field if typed else None,
+                                          "p_types": types if typed else None})
+        if not ok:
+            rows = self._claim_conditional(types, limit)
+        self.stats["claimed"] += len(rows)
+        return [self._item(row) for row in rows]
+
+    def _claim_conditional(self, types: list[str], limit: int) -> list[dict[str, Any]]:
+        query = self._table().select("id").eq("status", PENDING)
+        if not self.fixed_type:
+            query = query.in_(self.type_field, types)
+        ids = [row["id"] for row in query.order("created_at").limit(limit).execute().data]
+        if not ids:
+            return []
+        # Only one claimer can move a row out of pending; rows another runner took in between aren't returned
+        rows = (
+            self._table().update({"status": IN_PROGRESS})
+            .in_("id", ids).eq("status", PENDING)
+            .execute().data
+        )
+        order = {row_id: i for i, row_id in enumerate(ids)}
+        return sorted(rows, key=lambda row: order[row["id"]])
+
+    async def listen(self, notify: Callable[[], None]) -> Callable[[], Awaitable[None]]:
+        """Call `notify` whenever a row becomes pending; returns an async unsubscribe."""
+        from supabase import acreate_client
+
+        realtime = await acreate_client(self.url, self.key)
+        channel = realtime.channel(f"alfred:{self.name}")
+        channel.on_postgres_changes(
+            "*", schema="public", table=self.table, filter=f"status=eq.{PENDING}",
+            callback=lambda _payload: notify(),
+        )
+        await channel.subscribe()
+
+        async def unsubscribe() -> None:
+            await realtime.remove_channel(channel)
+        return unsubscribe
+
+    # ── batched status writes ──
+
+    async def complete(self, item: WorkItem, result: dict[str, Any]) -> None:
+        await self._write(item, {"status": COMPLETED, "result": result, "completed_at": _now()})
+
+    async def fail(self, item: WorkItem, error: str) -> None:
+        await self._write(item, {"status": FAILED, "error": error[:2000]})
+
+    async def release(self, item: WorkItem) -> None:
+        """Hand an unfinished item back to the queue (shutdown mid-run)."""
+        await self._write(item, {"status": PENDING})
+
+    async def _write(self, item: WorkItem, values: dict[str, Any]) -> None:
+        """Returns once the batch this write joined has landed; raises if it didn't."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._writes.append((item.record.get("id", item.id), values, future))
+        self.stats["writes"] += 1
+        if self._timer is None:
+            self._timer = loop.call_later(self.write_window, self._flush)
+        await future
+
+    def _flush(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        writes, self._writes = self._writes, []
+        if writes:
+            task = asyncio.ensure_future(self._send(writes))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, writes: list[tuple[Any, dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            errors = await asyncio.to_thread(self._apply, {row_id: values for row_id, values, _ in writes})
+        except Exception as e:
+            errors = {row_id: e for row_id, _, _ in writes}
+        for row_id, _, future in writes:
+            if future.done():
+                continue
+            if row_id in errors:
+                future.set_exception(errors[row_id])
+            else:
+                future.set_result(None)
+
+    def _apply(self, latest: dict[Any, dict[str, Any]]) -> dict[Any, Exception]:
+        """Write each row's latest values; returns the rows whose write failed."""
+        ok, _ = self._call(FINISH_RPC, {"p_table": self.table,
+                                        "p_rows": [{"id": row_id, **values} for row_id, values in latest.items()]})
+        if ok:
+            return {}
+        groups: dict[str, tuple[dict[str, Any], list[Any]]] = {}
+        for row_id, values in latest.items():
+            groups.setdefault(json.dumps(values, sort_keys=True, default=str), (values, []))[1].append(row_id)
+        errors: dict[Any, Exception] = {}
+        for values, ids in groups.values():
+            try:
+                self._table().update(values).in_("id", ids).execute()
+            except Exception as e:
+                errors.update(dict.fromkeys(ids, e))
+        return errors
+
+    async def flush(self) -> None:
+        """Send pending status writes now and wait for them to land."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,55 @@
+"""ops_todos in DeepOps Supabase: action items workflows extract for Lori.
+
+Rows are upserted on `dedupe_key` with duplicates ignored, so a retried or
+re-run item never adds a todo twice and never overwrites one Lori has since
+edited or closed. A workflow that streams items can insert them as
+`provisional` and settle() them once its output is final: settling only
+touches rows still provisional, so it can't clobber an edit either. Without
+Supabase credentials add() and settle() are no-ops (local runs, tests). The
+table's DDL is sql/ops_todos.sql.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+PRIORITIES = ("high", "medium", "low")
+
+
+class OpsTodos:
+    def __init__(self, supabase_url: str | None = None, supabase_key: str | None = None):
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+
+    async def add(self, todo: dict[str, Any]) -> None:
+        """Insert one todo: dedupe_key, task, priority, source, source_id, workflow; optional owner,
+        due, provisional."""
+        if todo.get("priority") not in PRIORITIES:
+            raise ValueError(f"invalid todo priority: {todo.get('priority')!r}")
+        if not (self.supabase_url and self.supabase_key):
+            return
+        await asyncio.to_thread(self._upsert, todo)
+
+    async def settle(self, dedupe_key: str, values: dict[str, Any]) -> None:
+        """Write final `values` onto a provisional row and mark it final; a settled row is left alone."""
+        if "priority" in values and values["priority"] not in PRIORITIES:
+            raise ValueError(f"invalid todo priority: {values['priority']!r}")
+        if not (self.supabase_url and self.supabase_key):
+            return
+        await asyncio.to_thread(self._settle, dedupe_key, values)
+
+    def _upsert(self, todo: dict[str, Any]) -> None:
+        from alfred.tools.supabase import client
+        (
+            client(self.supabase_url, self.supabase_key).table("ops_todos")
+            .upsert(todo, on_conflict="dedupe_key", ignore_duplicates=True).execute()
+        )
+
+    def _settle(self, dedupe_key: str, values: dict[str, Any]) -> None:
+        from alfred.tools.supabase import client
+        (
+            client(self.supabase_url, self.supabase_key).table("ops_todos")
+            .update({**values, "provisional": False})
+            .eq("dedupe_key", dedupe_key).eq("provisional", True).execute()
+        )
@@ -1 +1,47 @@
-"""Tool stub: wave. Phase 4 scaffold — see ../../README.md."""
+"""Wave API client (port of Website app/api/webhooks/wave + admin/wave-backfill).
+
+Bearer-token auth with WAVE_API_TOKEN against https://api.wave.co/v1.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from alfred.tools.http import HttpPool
+
+WAVE_API = "https://api.wave.co/v1"
+
+# Shorter than this is a failed/empty recording, same cutoff as the backfill route
+MIN_TRANSCRIPT_CHARS = 100
+
+
+class WaveError(RuntimeError):
+    pass
+
+
+class WaveClient:
+    def __init__(self, http: HttpPool, token: str | None):
+        self.http = http
+        self.token = token
+
+    async def _get(self, path: str, **params) -> dict[str, Any]:
+        if not self.token:
+            raise WaveError("WAVE_API_TOKEN not set")
+        response = await self.http.request(
+            "GET", f"{WAVE_API}{path}", params=params or None,
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        if response.status_code != 200:
+            raise WaveError(f"Wave {path}: HTTP {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    async def sessions(self, limit: int = 50) -> list[dict[str, Any]]:
+        return (await self._get("/sessions", limit=limit)).get("sessions", [])
+
+    async def transcript(self, session_id: str) -> str | None:
+        """Session transcript as text, or None if Wave has nothing usable yet."""
+        data = await self._get(f"/sessions/{session_id}/transcript")
+        text = data.get("transcript") or ""
+        if len(text) < MIN_TRANSCRIPT_CHARS and data.get("segments"):
+            text = "\n".join(f"{s['speaker']}: {s['text']}" for s in data["segments"])
+        return text if len(text) >= MIN_TRANSCRIPT_CHARS else None
@@ -1 +1,222 @@
-"""Tool stub: wikis. Phase 4 scaffold — see ../../README.md."""
+"""Website wikis API: GET/PUT /api/wikis/<slug>, authed with INBOX_SHARED_SECRET.
+
+PUT replaces the page: title, contentMd, surface, updatedBy, agentVersion,
+pinned (all optional server-side; missing fields keep their current value).
+Agent writes are stamped `updatedBy: 'agent:<workflow>'`. An unconditional
+PUT is idempotent, so the shared HTTP pool retries it on transient failures;
+a conditional one isn't retried (see below).
+
+A page's version is its `updatedAt`, returned as the ETag. A PUT sent with
+`If-Match: "<updatedAt>"` is refused with 412 (and the current page) if anyone
+has written since.
+
+Workflows should write through update(), the write-behind path:
+
+- the last-known content and version of every slug read or written is kept,
+  so an update doesn't need a GET first;
+- updates to one slug arriving within `window` seconds become one PUT, their
+  edits applied in arrival order;
+- a write that leaves content, title and surface unchanged isn't sent, once
+  a GET confirms the cached copy it was compared against is still current
+  (otherwise the edits are re-applied to the page the GET returned);
+- every PUT is conditional on the version its edits were applied to. On 412
+  the edits are re-applied to the page the server returned and sent again,
+  so neither a concurrent workflow's write nor Lori's own edit is lost.
+  A resent PUT whose first attempt landed but lost its response would hit
+  412 on our own write, and re-applying would append twice. So conditional
+  PUTs aren't retried by the pool. If the response is lost, a GET decides
+  whether the write landed. A 412 page that already holds exactly what we
+  sent, stamped as ours, counts as landed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Callable
+from urllib.parse import quote
+
+from alfred.tools.http import HttpPool
+
+Edit = Callable[[str], str]  # current contentMd → new contentMd
+
+
+class WikiError(RuntimeError):
+    pass
+
+
+def _landed(wiki: dict[str, Any] | None, content: str, workflow: str) -> bool:
+    """Whether `wiki` is our own write of `content`, whose response we never saw."""
+    return wiki is not None and wiki.get("contentMd") == content and wiki.get("updatedBy") == f"agent:{workflow}"
+
+
+class WikiConflict(WikiError):
+    """The page changed since the version a conditional PUT was based on."""
+
+    def __init__(self, message: str, current: dict[str, Any] | None):
+        super().__init__(message)
+        self.current = current
+
+
+@dataclass
+class _Pending:
+    edits: list[Edit] = field(default_factory=list)
+    workflows: list[str] = field(default_factory=list)
+    fields: dict[str, str] = field(default_factory=dict)  # agent_version/title/surface, last one wins
+    waiters: list[asyncio.Future] = field(default_factory=list)
+
+
+class WikiClient:
+    def __init__(self, http: HttpPool, base_url: str, secret: str | None, *, window: float = 0.25,
+                 max_conflicts: int = 3):
+        self.http = http
+        self.base_url = base_url.rstrip("/")
+        self.secret = secret
+        self.window = window                # seconds updates to one slug wait for company
+        self.max_conflicts = max_conflicts  # 412 retries per write before giving up
+        self.stats = {"updates": 0, "puts": 0, "coalesced": 0, "skipped": 0, "conflicts": 0, "bytes_sent": 0}
+        self._pages: dict[str, dict[str, Any]] = {}  # slug → last wiki seen
+        self._pending: dict[str, _Pending] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def _url(self, slug: str) -> str:
+        return f"{self.base_url}/" + "/".join(quote(part, safe="") for part in slug.split("/"))
+
+    def _headers(self) -> dict[str, str]:
+        if not self.secret:
+            raise WikiError("INBOX_SHARED_SECRET not set")
+        return {"x-inbox-secret": self.secret}
+
+    async def get(self, slug: str) -> dict[str, Any] | None:
+        response = await self.http.request("GET", self._url(slug), headers=self._headers())
+        if response.status_code == 404:
+            self._pages.pop(slug, None)
+            return None
+        if response.status_code != 200:
+            raise WikiError(f"GET {slug}: HTTP {response.status_code}: {response.text[:200]}")
+        wiki = self._pages[slug] = response.json()["wiki"]
+        return wiki
+
+    async def put(self, slug: str, content_md: str, *, workflow: str, agent_version: str | None = None,
+                  title: str | None = None, surface: str | None = None,
+                  if_match: str | None = None) -> dict[str, Any]:
+        """Replace the page now. With if_match (an updatedAt), raises WikiConflict if it's stale."""
+        body: dict[str, Any] = {"contentMd": content_md, "updatedBy": f"agent:{workflow}"}
+        for key, value in (("agentVersion", agent_version), ("title", title), ("surface", surface)):
+            if value is not None:
+                body[key] = value
+        headers = self._headers()
+        if if_match is not None:
+            headers["If-Match"] = f'"{if_match}"'
+        self.stats["puts"] += 1
+        self.stats["bytes_sent"] += len(content_md.encode())
+        response = await self.http.request("PUT", self._url(slug), json=body, headers=headers,
+                                           idempotent=if_match is None)
+        if response.status_code == 412:
+            current = response.json().get("wiki")
+            if current is not None:
+                self._pages[slug] = current
+            raise WikiConflict(f"PUT {slug}: page changed since {if_match}", current)
+        if response.status_code != 200:
+            raise WikiError(f"PUT {slug}: HTTP {response.status_code}: {response.text[:200]}")
+        wiki = self._pages[slug] = response.json()["wiki"]
+        return wiki
+
+    # ── write-behind ──
+
+    async def update(self, slug: str, edit: Edit | str, *, workflow: str, agent_version: str | None = None,
+                     title: str | None = None, surface: str | None = None) -> dict[str, Any]:
+        """Apply `edit` (a function of the current contentMd, or the new contentMd) to the page.
+
+        Returns the page once the write it was coalesced into has landed (or
+        been skipped as a no-op). The write goes ahead even if the caller is
+        cancelled while waiting.
+        """
+        loop = asyncio.get_running_loop()
+        self.stats["updates"] += 1
+        pending = self._pending.get(slug)
+        if pending is None:
+            pending = self._pending[slug] = _Pending()
+            self._timers[slug] = loop.call_later(self.window, self._flush, slug)
+        else:
+            self.stats["coalesced"] += 1
+        pending.edits.append(edit if callable(edit) else (lambda _, text=edit: text))
+        pending.workflows.append(workflow)
+        for key, value in (("agent_version", agent_version), ("title", title), ("surface", surface)):
+            if value is not None:
+                pending.fields[key] = value
+        future = loop.create_future()
+        pending.waiters.append(future)
+        return await future
+
+    def _flush(self, slug: str) -> None:
+        timer = self._timers.pop(slug, None)
+        if timer:
+            timer.cancel()
+        pending = self._pending.pop(slug, None)
+        if pending:
+            task = asyncio.ensure_future(self._write(slug, pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _write(self, slug: str, pending: _Pending) -> None:
+        try:
+            async with self._locks.setdefault(slug, asyncio.Lock()):  # one write per slug at a time
+                wiki = await self._apply(slug, pending)
+        except Exception as e:
+            for future in pending.waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future in pending.waiters:
+            if not future.done():
+                future.set_result(wiki)
+
+    async def _apply(self, slug: str, pending: _Pending) -> dict[str, Any]:
+        wiki = self._pages.get(slug)
+        confirmed = wiki is None  # a cached page may be behind someone else's write
+        if wiki is None:
+            wiki = await self.get(slug)
+        workflow = ",".join(dict.fromkeys(pending.workflows))
+        for _ in range(self.max_conflicts + 1):
+            if wiki is None:
+                raise WikiError(f"PUT {slug}: wiki not found")
+            content = wiki.get("contentMd", "")
+            for edit in pending.edits:
+                content = edit(content)
+            title, surface = pending.fields.get("title"), pending.fields.get("surface")
+            if content == wiki.get("contentMd", "") and title in (None, wiki.get("title")) \
+                    and surface in (None, wiki.get("surface")):
+                if not confirmed:
+                    current, confirmed = await self.get(slug), True
+                    if current is None or current.get("updatedAt") != wiki.get("updatedAt"):
+                        wiki = current  # changed under us: re-apply the edits to what's there now
+                        continue
+                self.stats["skipped"] += 1
+                return wiki
+            try:
+                return await self.put(slug, content, workflow=workflow, title=title, surface=surface,
+                                      agent_version=pending.fields.get("agent_version"),
+                                      if_match=wiki.get("updatedAt"))
+            except WikiConflict as conflict:
+                if _landed(conflict.current, content, workflow):
+                    return conflict.current
+                self.stats["conflicts"] += 1
+                wiki, confirmed = conflict.current, True
+            except WikiError:
+                raise
+            except Exception:  # no response: the PUT may have landed anyway
+                current = await self.get(slug)
+                if not _landed(current, content, workflow):
+                    raise
+                return current
+        raise WikiError(f"PUT {slug}: still conflicting after {self.max_conflicts} retries")
+
+    async def flush(self) -> None:
+        """Send every pending update now and wait for all writes to land."""
+        for slug in list(self._pending):
+            self._flush(slug)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
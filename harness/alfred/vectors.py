@@ -0,0 +1,311 @@
+"""Embedded vector index for semantic retrieval over journal entries,
+transcripts and notes: the "related prior context" crm_rollup pulls for
+each contact (see VECTOR_DATABASE_PLAN.md, "Metadata stored with each vector").
+
+Everything lives in one local directory:
+
+- vectors.f32   append-only float32 rows, unit length, memory-mapped for search
+- index.sqlite  one row per chunk (ref, source, date, contacts, text, IVF list)
+                plus the IVF centroids, so assignments and centroids change in
+                one transaction
+
+Search is exact until the index holds min_train rows; after that it is IVF:
+the query is scored against ~sqrt(n) spherical k-means centroids and only the
+nprobe closest lists are scanned. Filters (contact, source, date range) are
+evaluated on in-memory columns before any vector is read, and when they leave
+at most exact_limit rows the search is exact over just those rows — a
+rollup for one contact never depends on which lists happened to be probed.
+
+Inserts are incremental: new rows go to the nearest existing centroid, and
+the centroids are retrained once the index has doubled since the last
+training. Re-adding a ref whose text or metadata changed supersedes the old
+row; re-adding an unchanged ref is a no-op (and isn't re-embedded).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Sequence
+
+import numpy as np
+
+BatchEmbedder = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+_ASSIGN_BLOCK = 16_384  # rows scored against the centroids at a time while retraining
+
+
+@dataclass(frozen=True)
+class Passage:
+    ref: str                          # stable chunk id, e.g. "daily_logs/2026-05-01#0"
+    text: str
+    source: str                       # "journal" | "transcript" | "note" | "synthesis" | ...
+    date: str | None = None           # YYYY-MM-DD
+    contacts: tuple[str, ...] = ()    # people mentioned in this chunk
+
+    def digest(self) -> str:
+        body = json.dumps([self.text, self.source, self.date, sorted(self.contacts)])
+        return hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class Hit:
+    passage: Passage
+    score: float  # cosine similarity to the query
+
+
+def _contact_key(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+def _day(value: str | date | None) -> int:
+    """'2026-05-01' → 20260501; no date → 0, which no date filter matches."""
+    if value is None:
+        return 0
+    text = value.isoformat() if isinstance(value, date) else value
+    return int(text[:10].replace("-", ""))
+
+
+def _unit(rows: np.ndarray) -> np.ndarray:
+    return rows / np.maximum(np.linalg.norm(rows, axis=-1, keepdims=True), 1e-12)
+
+
+class VectorIndex:
+    def __init__(self, path: str | Path, *, embedder: BatchEmbedder | None = None, nprobe: int = 8,
+                 min_train: int = 2048, exact_limit: int = 4096, seed: int = 0):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder
+        self.nprobe = nprobe
+        self.min_train = min_train      # rows before IVF replaces exact search
+        self.exact_limit = exact_limit  # filtered rows at or below which search is exact anyway
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path / "index.sqlite", check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                ref TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                source TEXT NOT NULL,
+                date TEXT,
+                contacts TEXT NOT NULL,
+                text TEXT NOT NULL,
+                list INTEGER NOT NULL,
+                live INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+        """)
+        self._load()
+
+    # ── state ──
+
+    def _load(self) -> None:
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        self.dim: int | None = int(meta["dim"]) if "dim" in meta else None
+        self._trained_n = int(meta.get("trained_n", 0))
+        self._centroids = (np.frombuffer(meta["centroids"], dtype=np.float32).reshape(-1, self.dim)
+                           if "centroids" in meta else None)
+        rows = self._conn.execute(
+            "SELECT id, ref, digest, source, date, contacts, list, live FROM chunks ORDER BY id"
+        ).fetchall()
+        n = len(rows)
+        self._sources: dict[str, int] = {}
+        self._contacts: dict[str, list[int]] = {}
+        self._refs: dict[str, tuple[int, str]] = {}  # live ref → (id, digest)
+        self._source = np.array([self._source_code(r[3]) for r in rows], dtype=np.int16)
+        self._date = np.array([_day(r[4]) for r in rows], dtype=np.int32)
+        self._list = np.array([r[6] for r in rows], dtype=np.int32)
+        self._live = np.array([bool(r[7]) for r in rows], dtype=bool)
+        for id, ref, digest, _, _, contacts, _, live in rows:
+            if live:
+                self._refs[ref] = (id, digest)
+                for name in json.loads(contacts):
+                    self._contacts.setdefault(_contact_key(name), []).append(id)
+        # Vectors are appended before their rows commit; drop any a crash left without a row
+        vectors = self.path / "vectors.f32"
+        vectors.touch()
+        if self.dim and vectors.stat().st_size > n * self.dim * 4:
+            with vectors.open("r+b") as f:
+                f.truncate(n * self.dim * 4)
+        self._map(n)
+
+    def _map(self, n: int) -> None:
+        if n and self.dim:
+            self._vectors = np.memmap(self.path / "vectors.f32", dtype=np.float32, mode="r", shape=(n, self.dim))
+        else:
+            self._vectors = np.empty((0, self.dim or 0), dtype=np.float32)
+
+    def _source_code(self, source: str) -> int:
+        return self._sources.setdefault(source, len(self._sources))
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    # ── insert ──
+
+    def changed(self, passages: Iterable[Passage]) -> list[Passage]:
+        """The passages that aren't already indexed as-is."""
+        return [p for p in passages if self._refs.get(p.ref, (None, None))[1] != p.digest()]
+
+    def add(self, passages: Sequence[Passage], vectors: Sequence[Sequence[float]] | np.ndarray) -> int:
+        """Index passages with their embeddings; returns how many rows were written."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(passages) != len(vectors):
+            raise ValueError(f"{len(passages)} passages but {len(vectors)} vectors")
+        if not len(passages):
+            return 0
+        if self.dim is not None and vectors.shape[1] != self.dim:
+            raise ValueError(f"index holds {self.dim}-d vectors, got {vectors.shape[1]}-d")
+        with self._lock:
+            fresh = {}  # ref → position; a ref repeated within one batch keeps its last version
+            for i, p in enumerate(passages):
+                if self._refs.get(p.ref, (None, None))[1] != p.digest():
+                    fresh[p.ref] = i
+            if not fresh:
+                return 0
+            keep = sorted(fresh.values())
+            batch = [passages[i] for i in keep]
+            rows = _unit(vectors[keep])
+            start = len(self._live)
+            ids = range(start, start + len(batch))
+            lists = (np.argmax(rows @ self._centroids.T, axis=1).astype(np.int32) if self._centroids is not None
+                     else np.full(len(batch), -1, dtype=np.int32))
+            superseded = [self._refs[p.ref][0] for p in batch if p.ref in self._refs]
+
+            with (self.path / "vectors.f32").open("ab") as f:
+                f.write(rows.tobytes())
+            self._conn.execute("BEGIN")
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._conn.execute("INSERT INTO meta VALUES ('dim', ?)", (self.dim,))
+            self._conn.executemany(
+                "INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)",
+                [(id, p.ref, p.digest(), p.source, p.date, json.dumps(list(p.contacts)), p.text, int(list_))
+                 for id, p, list_ in zip(ids, batch, lists)],
+            )
+            self._conn.executemany("UPDATE chunks SET live = 0 WHERE id = ?", [(id,) for id in superseded])
+            self._conn.execute("COMMIT")
+
+            for id in superseded:
+                self._live[id] = False
+                for ids_ in self._contacts.values():
+                    if id in ids_:
+                        ids_.remove(id)
+            self._source = np.concatenate([self._source, [self._source_code(p.source) for p in batch]]).astype(np.int16)
+            self._date = np.concatenate([self._date, [_day(p.date) for p in batch]]).astype(np.int32)
+            self._list = np.concatenate([self._list, lists])
+            self._live = np.concatenate([self._live, np.ones(len(batch), dtype=bool)])
+            for id, p in zip(ids, batch):
+                self._refs[p.ref] = (id, p.digest())
+                for name in p.contacts:
+                    self._contacts.setdefault(_contact_key(name), []).append(id)
+            self._map(len(self._live))
+            if len(self) >= self.min_train and len(self) >= 2 * self._trained_n:
+                self._train()
+        return len(batch)
+
+    async def index(self, passages: Sequence[Passage]) -> int:
+        """Embed and add whatever isn't indexed yet; unchanged passages cost no embedding call."""
+        pending = self.changed(passages)
+        if not pending:
+            return 0
+        return self.add(pending, await self.embedder([p.text for p in pending]))
+
+    def _train(self, iterations: int = 10) -> None:
+        """Spherical k-means on a sample of live rows, then reassign every row. Caller holds the lock."""
+        live = np.flatnonzero(self._live)
+        nlist = max(1, int(np.sqrt(len(live))))
+        sample = np.sort(self._rng.choice(live, size=min(len(live), 64 * nlist), replace=False))
+        x = np.asarray(self._vectors[sample])
+        centroids = x[self._rng.choice(len(x), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(x @ centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            counts = np.bincount(assign, minlength=nlist)
+            nonempty = counts > 0
+            starts = (np.cumsum(counts) - counts)[nonempty]
+            centroids[nonempty] = _unit(np.add.reduceat(x[order], starts, axis=0))  # empty lists keep theirs
+        lists = np.concatenate([
+            np.argmax(self._vectors[i:i + _ASSIGN_BLOCK] @ centroids.T, axis=1)
+            for i in range(0, len(self._live), _ASSIGN_BLOCK)
+        ]).astype(np.int32)
+
+        self._conn.execute("BEGIN")
+        self._conn.executemany("UPDATE chunks SET list = ? WHERE id = ?", zip(lists.tolist(), range(len(lists))))
+        self._conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                               [("centroids", centroids.astype(np.float32).tobytes()), ("trained_n", len(live))])
+        self._conn.execute("COMMIT")
+        self._centroids, self._list, self._trained_n = centroids.astype(np.float32), lists, len(live)
+
+    # ── search ──
+
+    def search(self, vector: Sequence[float] | np.ndarray, k: int = 8, *, contact: str | None = None,
+               source: str | Iterable[str] | None = None, since: str | date | None = None,
+               until: str | date | None = None, nprobe: int | None = None) -> list[Hit]:
+        """Top-k live passages by cosine similarity, best first, among those matching every filter.
+
+        since/until are inclusive and exclude undated passages.
+        """
+        if not len(self) or k <= 0:
+            return []
+        query = _unit(np.asarray(vector, dtype=np.float32))
+        if query.shape[0] != self.dim:
+            raise ValueError(f"index holds {self.dim}-d vectors, got {query.shape[0]}-d")
+        with self._lock:
+            mask = self._live.copy()
+            if contact is not None:
+                named = np.zeros_like(mask)
+                named[self._contacts.get(_contact_key(contact), [])] = True
+                mask &= named
+            if source is not None:
+                names = [source] if isinstance(source, str) else list(source)
+                mask &= np.isin(self._source, [self._sources[s] for s in names if s in self._sources])
+            if since is not None:
+                mask &= self._date >= _day(since)
+            if until is not None:
+                mask &= (self._date <= _day(until)) & (self._date > 0)
+            candidates = self._candidates(mask, query, k, nprobe or self.nprobe)
+            if not len(candidates):
+                return []
+            scores = np.asarray(self._vectors[candidates]) @ query
+            if len(candidates) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                candidates, scores = candidates[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            ranked = [(int(candidates[i]), float(scores[i])) for i in order]
+            rows = {row[0]: row for row in self._conn.execute(
+                f"SELECT id, ref, text, source, date, contacts FROM chunks WHERE id IN ({','.join('?' * len(ranked))})",
+                [id for id, _ in ranked],
+            )}
+        hits = []
+        for id, score in ranked:
+            _, ref, text, source_, date_, contacts = rows[id]
+            hits.append(Hit(Passage(ref, text, source_, date_, tuple(json.loads(contacts))), score))
+        return hits
+
+    def _candidates(self, mask: np.ndarray, query: np.ndarray, k: int, nprobe: int) -> np.ndarray:
+        """Row ids to score: all allowed rows, or those in the closest lists (widened until k are found)."""
+        if self._centroids is None or np.count_nonzero(mask) <= self.exact_limit:
+            return np.flatnonzero(mask)
+        nearest = np.argsort(-(self._centroids @ query))
+        while True:
+            candidates = np.flatnonzero(mask & np.isin(self._list, nearest[:nprobe]))
+            if len(candidates) >= k or nprobe >= len(nearest):
+                return candidates
+            nprobe *= 2
+
+    async def related(self, text: str, k: int = 8, **filters) -> list[Hit]:
+        """search() for the passages closest in meaning to `text`."""
+        return self.search((await self.embedder([text]))[0], k, **filters)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1 +1,26 @@
-"""Phase 4 scaffold — see ../../README.md"""
+"""Workflow registry. A workflow module registers its class with @register once
+the workflow ships; the runner only claims queue items whose `type` a
+registered workflow handles, so unshipped types stay queued untouched.
+"""
+
+from __future__ import annotations
+
+import importlib
+
+from alfred.workflows.base import Workflow
+
+MODULES = ("meeting_actions", "crm_rollup", "memo", "dev_brief", "investor_draft", "todo_extract")
+
+WORKFLOWS: list[type[Workflow]] = []
+
+
+def register(cls: type[Workflow]) -> type[Workflow]:
+    WORKFLOWS.append(cls)
+    return cls
+
+
+def load() -> list[type[Workflow]]:
+    """Import every workflow module (registering what has shipped) and return the registry."""
+    for module in MODULES:
+        importlib.import_module(f"alfred.workflows.{module}")
+    return list(WORKFLOWS)
@@ -1,6 +1,77 @@
 """Workflow abstract base class. Every workflow defines: name, default model,
-prompt_version, and a run(payload) method. Logged uniformly via the harness's
+prompt_version, and a run(item) method. Logged uniformly via the harness's
 observability contract.
 
-Phase 4 scaffold — implementation TBD. See README.md.
+The runner dispatches a claimed queue item to the workflow whose `handles`
+contains the item's `type`, at most `concurrency` at a time per workflow.
 """
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, ClassVar, Mapping
+
+from alfred.context import Context
+from alfred.models.base import Completion
+from alfred.models.routing import TokenBudget
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    """One claimed queue item, normalized across Supabase and Firestore sources."""
+    source: str                   # runner source name, e.g. "deepops:research_requests"
+    id: str                       # row id / document id within that source
+    type: str                     # dispatch key
+    payload: Mapping[str, Any]
+    record: Mapping[str, Any] = field(default_factory=dict, repr=False)  # the raw row/document
+
+    @property
+    def key(self) -> str:
+        return f"{self.source}:{self.id}"
+
+
+class Workflow(ABC):
+    name: ClassVar[str]
+    handles: ClassVar[tuple[str, ...]] = ()
+    model: ClassVar[str] = "ollama"   # starting tier: "ollama" | "sonnet" | "opus"
+    prompt_version: ClassVar[str] = "v1"
+    concurrency: ClassVar[int] = 1
+    token_budget: ClassVar[int | None] = None  # per item; exceeding it raises, never truncates
+    output_schema: ClassVar[dict | None] = None  # JSON Schema (e.g. a pydantic model_json_schema())
+    emit: ClassVar[tuple | None] = None          # path of items to hand on as they close, e.g. ("items", "*")
+
+    def __init__(self, ctx: Context):
+        self.ctx = ctx
+
+    def prompt(self, **values: str) -> str:
+        """prompts/<name>/<prompt_version>.md, from the registry, with its {{variables}} filled in."""
+        return self.ctx.prompts.get(self.name, self.prompt_version).render(**values)
+
+    def budget(self) -> TokenBudget | None:
+        """A fresh per-item budget; pass it to every complete() call the item makes."""
+        return TokenBudget(self.name, self.token_budget) if self.token_budget else None
+
+    async def complete(self, messages: list[dict[str, str]], *, budget: TokenBudget | None = None,
+                       **kwargs: Any) -> Completion:
+        """Call the model through the router at this workflow's tier and prompt version."""
+        return await self.ctx.router.complete(
+            self.name, self.prompt_version, messages, model=self.model, budget=budget, **kwargs,
+        )
+
+    async def complete_structured(self, messages: list[dict[str, str]], *,
+                                  on_item: Callable[[Any], None] | None = None,
+                                  budget: TokenBudget | None = None, **kwargs: Any) -> tuple[Completion, Any]:
+        """Stream against output_schema; returns (completion, parsed output)."""
+        return await self.ctx.router.complete_structured(
+            self.name, self.prompt_version, messages, schema=self.output_schema, emit=self.emit,
+            on_item=on_item, model=self.model, budget=budget, **kwargs,
+        )
+
+    async def step(self, name: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run an expensive step at most once per item; a re-run after a crash gets the journaled result."""
+        return await self.ctx.journal.step(name, fn)
+
+    @abstractmethod
+    async def run(self, item: WorkItem) -> dict[str, Any]:
+        """Process one item. The returned dict is persisted as the item's result."""
@@ -1 +1,225 @@
-"""Workflow stub: meeting_actions. Phase 4 scaffold — see ../../README.md."""
+"""4a: Wave transcript → action items, as a map-reduce over transcript chunks.
+
+An hour-long meeting doesn't fit the local 8B model's context, so instead
+of escalating the whole transcript to Claude:
+
+- map: the transcript is split into overlapping, content-defined chunks
+  (alfred.chunking) and every chunk is extracted concurrently on the local
+  tier — the Ollama scheduler decides how many actually run at once. A
+  chunk the local model botches escalates on its own, not the meeting.
+- reduce: per-chunk lists are merged, collapsing the same item found in two
+  chunks (always the case for items in an overlap) into one.
+
+Every action item is written to ops_todos as a provisional row as soon as
+it closes in the model's stream, before the rest of the meeting is
+extracted. An item that is the same task as one already written (an
+overlap) isn't written again. After the reduce pass each provisional row is
+settled with its merged fields (owner, due date, priority a later chunk
+added), items never streamed (chunks from the journal) are inserted as
+final, and rows the final list doesn't contain (streamed by a local attempt
+that was then aborted and escalated) are settled as retracted.
+
+Each chunk is its own cached model call, so re-running a meeting after a
+transcript edit only pays for the chunks whose text changed. Each chunk is
+also a journaled step, so a run cut short by a crash resumes with the chunks
+it already extracted, whatever the response cache has evicted since.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import re
+from typing import Any, Callable
+
+from alfred.chunking import TextChunk, chunk_text
+from alfred.models.routing import LOCAL, TokenBudget
+from alfred.tools.todos import OpsTodos
+from alfred.workflows import register
+from alfred.workflows.base import WorkItem, Workflow
+
+ACTION_ITEMS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action_items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "task": {"type": "string"},
+                    "owner": {"type": ["string", "null"]},
+                    "due": {"type": ["string", "null"]},
+                    "priority": {"enum": ["high", "medium", "low"]},
+                },
+                "required": ["task", "priority"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["action_items"],
+    "additionalProperties": False,
+}
+
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2}
+SAME_TASK = 0.6  # word-set Jaccard at or above which two tasks are one item
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("a an and the to of for on in with by at about from up".split())
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def _words(task: str) -> frozenset[str]:
+    return frozenset(_WORD.findall(task.lower())) - _STOPWORDS
+
+
+def _same(a: dict[str, Any], b: dict[str, Any]) -> bool:
+    if a.get("owner") and b.get("owner") and a["owner"].lower() != b["owner"].lower():
+        return False
+    wa, wb = a["_words"], b["_words"]
+    if {w for w in wa if w.isdigit()} != {w for w in wb if w.isdigit()}:
+        return False  # different amounts, versions or dates are different tasks
+    return bool(wa and wb) and len(wa & wb) / len(wa | wb) >= SAME_TASK
+
+
+def merge_action_items(per_chunk: list[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """Reduce: one list in transcript order, near-identical items merged.
+
+    A merged item keeps the most specific task text (the longest), the first
+    owner and due date anyone stated, the highest priority, and every chunk
+    it was found in.
+    """
+    merged: list[dict[str, Any]] = []
+    for chunk_index, items in enumerate(per_chunk):
+        for item in items:
+            candidate = {**item, "chunks": [chunk_index], "_words": _words(item["task"])}
+            match = next((m for m in merged if _same(m, candidate)), None)
+            if match is None:
+                merged.append(candidate)
+                continue
+            if len(candidate["task"]) > len(match["task"]):
+                match["task"], match["_words"] = candidate["task"], candidate["_words"]
+            match["owner"] = match.get("owner") or candidate.get("owner")
+            match["due"] = match.get("due") or candidate.get("due")
+            if PRIORITY_RANK[candidate["priority"]] > PRIORITY_RANK[match["priority"]]:
+                match["priority"] = candidate["priority"]
+            if chunk_index not in match["chunks"]:
+                match["chunks"].append(chunk_index)
+    return [{k: v for k, v in m.items() if k != "_words"} for m in merged]
+
+
+def _fields(action: dict[str, Any]) -> dict[str, Any]:
+    return {"task": action["task"], "owner": action.get("owner"), "due": action.get("due"),
+            "priority": action["priority"]}
+
+
+class _TodoWriter:
+    """Streams one meeting's distinct action items to ops_todos as provisional rows, in the
+    background, then settles them against the merged list."""
+
+    def __init__(self, todos: OpsTodos, item: WorkItem, workflow: str):
+        self.todos = todos
+        self.item = item
+        self.workflow = workflow
+        self.written: list[dict[str, Any]] = []  # streamed items, with their _words and _key
+        self.tasks: list[asyncio.Task] = []
+
+    def _row(self, action: dict[str, Any], key: str, provisional: bool) -> dict[str, Any]:
+        return {"dedupe_key": key, **_fields(action), "source": self.item.source, "source_id": self.item.id,
+                "workflow": self.workflow, "provisional": provisional}
+
+    def _key(self, words: frozenset[str]) -> str:
+        return f"{self.item.key}:{_digest(' '.join(sorted(words)))}"
+
+    def add(self, action: dict[str, Any]) -> None:
+        candidate = {**action, "_words": _words(action["task"])}
+        if any(_same(written, candidate) for written in self.written):
+            return
+        candidate["_key"] = self._key(candidate["_words"])
+        self.written.append(candidate)
+        self.tasks.append(asyncio.ensure_future(self.todos.add(self._row(action, candidate["_key"], True))))
+
+    async def settle(self, action_items: list[dict[str, Any]]) -> None:
+        """Finalize every row against the merged items; raise the first write that failed."""
+        await self._wait(self.tasks)  # settling a row before its insert lands would miss it
+        writes, settled = [], set()
+        for action in action_items:
+            candidate = {**action, "_words": _words(action["task"])}
+            row = next((w for w in self.written if w["_key"] not in settled and _same(w, candidate)), None)
+            if row is None:
+                writes.append(self.todos.add(self._row(action, self._key(candidate["_words"]), False)))
+            else:
+                settled.add(row["_key"])
+                writes.append(self.todos.settle(row["_key"], _fields(action)))
+        writes += [self.todos.settle(w["_key"], {"status": "retracted"})
+                   for w in self.written if w["_key"] not in settled]
+        await self._wait(writes)
+
+    @staticmethod
+    async def _wait(writes) -> None:
+        for result in await asyncio.gather(*writes, return_exceptions=True):
+            if isinstance(result, BaseException):
+                raise result
+
+
+@register
+class MeetingActions(Workflow):
+    name = "meeting_actions"
+    handles = ("meeting_transcript",)
+    model = "ollama"
+    prompt_version = "v1"
+    concurrency = 2
+    token_budget = 150_000
+    output_schema = ACTION_ITEMS_SCHEMA
+    emit = ("action_items", "*")
+
+    chunk_tokens = 1000       # sized for llama3.1:8b's context with prompt + output headroom
+    max_chunk_tokens = 1500
+    overlap_tokens = 150
+    max_output_tokens = 512
+
+    async def run(self, item: WorkItem) -> dict[str, Any]:
+        transcript = await self._transcript(item)
+        chunks = chunk_text(transcript, target_tokens=self.chunk_tokens, max_tokens=self.max_chunk_tokens,
+                            overlap_tokens=self.overlap_tokens)
+        system = self.prompt()
+        budget = self.budget()
+        todos = _TodoWriter(self.ctx.todos, item, self.name)
+        try:
+            async with asyncio.TaskGroup() as group:  # one chunk failing cancels the rest
+                tasks = [
+                    group.create_task(self.step(f"chunk:{_digest(chunk.text)}",
+                                                functools.partial(self._extract, chunk, system, budget, todos.add)))
+                    for chunk in chunks
+                ]
+        except ExceptionGroup as errors:
+            await asyncio.gather(*todos.tasks, return_exceptions=True)
+            raise errors.exceptions[0]
+        results = [task.result() for task in tasks]
+        action_items = merge_action_items([items for _, items in results])
+        await todos.settle(action_items)
+        return {
+            "action_items": action_items,
+            "chunks": len(chunks),
+            "escalated_chunks": sum(model != LOCAL.model for model, _ in results),
+            "prompt_version": self.prompt_version,
+        }
+
+    async def _transcript(self, item: WorkItem) -> str:
+        transcript = item.payload.get("transcript")
+        if not transcript and item.payload.get("wave_session_id"):
+            transcript = await self.ctx.wave.transcript(item.payload["wave_session_id"])
+        if not transcript:
+            raise ValueError(f"{item.key}: meeting has no transcript")
+        return transcript
+
+    async def _extract(self, chunk: TextChunk, system: str, budget: TokenBudget | None,
+                       on_item: Callable[[dict[str, Any]], None]) -> tuple[str, list[dict[str, Any]]]:
+        completion, value = await self.complete_structured(
+            [{"role": "user", "content": chunk.text}], system=system,
+            max_tokens=self.max_output_tokens, budget=budget, on_item=on_item,
+        )
+        return completion.model, value["action_items"]
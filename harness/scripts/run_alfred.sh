@@ -1,8 +1,9 @@
 #!/usr/bin/env bash
-# launchd entry point for the Alfred harness. Stub — Phase 4 wires this up.
-# When implemented:
+# launchd entry point for the Alfred harness.
 #   1. cd into harness/
 #   2. activate venv (.venv/bin/activate)
-#   3. exec python -m alfred.runner
-echo "Phase 4 not started. See harness/README.md + docs/handoffs/harness_phase4_2026-05-14.md"
-exit 1
+#   3. exec python -m alfred.runner  (SIGTERM from launchd → graceful shutdown)
+set -euo pipefail
+cd "$(dirname "$0")/.."
+source .venv/bin/activate
+exec python -m alfred.runner
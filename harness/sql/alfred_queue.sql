@@ -0,0 +1,84 @@
+-- Bulk queue functions for Alfred's Supabase queues (research_requests, meetings).
+--
+-- Apply by hand in the SQL editor of each project Alfred reads (DeepOps, AB).
+-- The harness never runs DDL: until these exist it falls back to a
+-- conditional PostgREST update per claim and one update per distinct status
+-- write (alfred/tools/supabase.py). Creates functions only; no table changes.
+
+-- Atomically claim up to p_limit pending rows, oldest first, and return them
+-- (already moved to in_progress) as a jsonb array. Rows another transaction
+-- holds are skipped rather than waited on, so overlapping runners never
+-- claim the same row and never block each other.
+create or replace function public.alfred_claim_items(
+  p_table text,
+  p_limit integer,
+  p_type_field text default null,
+  p_types text[] default null
+) returns jsonb
+language plpgsql
+as $$
+declare
+  type_filter text := '';
+  claimed jsonb;
+begin
+  if p_table not in ('research_requests', 'meetings') then
+    raise exception 'alfred_claim_items: % is not an Alfred queue table', p_table;
+  end if;
+  if p_type_field is not null then
+    type_filter := format(' and %I = any($2)', p_type_field);
+  end if;
+  execute format(
+    'with picked as (
+       select id from public.%1$I
+        where status = ''pending''%2$s
+        order by created_at
+        limit $1
+        for update skip locked
+     ), claimed as (
+       update public.%1$I as t
+          set status = ''in_progress''
+         from picked
+        where t.id = picked.id
+       returning t.*
+     )
+     select coalesce(jsonb_agg(to_jsonb(claimed.*) order by claimed.created_at), ''[]''::jsonb)
+       from claimed',
+    p_table, type_filter)
+  into claimed
+  using p_limit, p_types;
+  return claimed;
+end;
+$$;
+
+-- Apply a batch of status writes in one statement. p_rows is a jsonb array of
+-- {"id", "status", and optionally "result", "error", "completed_at"}; a key
+-- left out keeps the row's current value. Returns the number of rows updated.
+create or replace function public.alfred_finish_items(p_table text, p_rows jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  updated integer;
+begin
+  if p_table not in ('research_requests', 'meetings') then
+    raise exception 'alfred_finish_items: % is not an Alfred queue table', p_table;
+  end if;
+  execute format(
+    'update public.%1$I as t
+        set status = r.status,
+            result = coalesce(r.result, t.result),
+            error = coalesce(r.error, t.error),
+            completed_at = coalesce(r.completed_at, t.completed_at)
+       from jsonb_populate_recordset(null::public.%1$I, $1) as r
+      where t.id = r.id',
+    p_table)
+  using p_rows;
+  get diagnostics updated = row_count;
+  return updated;
+end;
+$$;
+
+revoke execute on function public.alfred_claim_items(text, integer, text, text[]) from public, anon, authenticated;
+revoke execute on function public.alfred_finish_items(text, jsonb) from public, anon, authenticated;
+grant execute on function public.alfred_claim_items(text, integer, text, text[]) to service_role;
+grant execute on function public.alfred_finish_items(text, jsonb) to service_role;
@@ -0,0 +1,30 @@
+-- harness_invocations: one row per LLM call (alfred/invocations.py).
+--
+-- Apply by hand in the DeepOps project's SQL editor. The harness never runs
+-- DDL; if the table is missing or lacks a column, InvocationLog's inserts
+-- fail (logged, not raised) and the router has no history to warm from.
+-- Safe to re-run: an existing table from before the cache and latency
+-- columns gains them without touching its rows.
+
+create table if not exists public.harness_invocations (
+  id bigint generated always as identity primary key,
+  workflow text not null,
+  model text not null,
+  prompt_version text not null,
+  input_token_count integer not null default 0,   -- includes prompt-cache reads and writes
+  output_token_count integer not null default 0,
+  cost_estimate numeric(12, 6) not null default 0,
+  escalation_reason text,                          -- null when the first tier answered
+  created_at timestamptz not null default now()
+);
+
+-- Response cache (exact | semantic | miss), routing latency, Claude prompt caching
+alter table public.harness_invocations add column if not exists cache_status text;
+alter table public.harness_invocations add column if not exists latency_ms integer not null default 0;
+alter table public.harness_invocations add column if not exists cache_read_token_count integer not null default 0;
+alter table public.harness_invocations add column if not exists cache_write_token_count integer not null default 0;
+
+-- InvocationLog.recent() reads the latest rows to warm routing stats at startup
+create index if not exists harness_invocations_created_at_idx on public.harness_invocations (created_at desc);
+
+alter table public.harness_invocations enable row level security;  -- service role only
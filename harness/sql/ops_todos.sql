@@ -0,0 +1,28 @@
+-- ops_todos: action items Alfred extracts (alfred/tools/todos.py).
+--
+-- Apply by hand in the DeepOps project's SQL editor; the harness never runs
+-- DDL. Alfred inserts, ignoring rows whose dedupe_key already exists, and
+-- updates only rows it marked provisional (streamed before the workflow's
+-- output was final), so status and edits are Lori's to change. Safe to
+-- re-run on a table created before the provisional column.
+
+create table if not exists public.ops_todos (
+  id bigint generated always as identity primary key,
+  dedupe_key text not null unique,          -- <source>:<item id>:<task digest>
+  task text not null,
+  owner text,
+  due text,                                 -- as stated in the source ("Friday", "end of Q3")
+  priority text not null check (priority in ('high', 'medium', 'low')),
+  status text not null default 'open',     -- 'retracted': streamed, then not in the final output
+  source text not null,                     -- runner source, e.g. deepops:meetings
+  source_id text not null,
+  workflow text not null,
+  created_at timestamptz not null default now()
+);
+
+-- Streamed items stay provisional until the run settles them; hide these from the list
+alter table public.ops_todos add column if not exists provisional boolean not null default false;
+
+create index if not exists ops_todos_status_idx on public.ops_todos (status, created_at desc);
+
+alter table public.ops_todos enable row level security;  -- service role only
@@ -33,7 +33,8 @@ function rowToWiki(id: string, data: FirebaseFirestore.DocumentData): Wiki {
     pinned: !!data.pinned,
     archived: !!data.archived,
     createdAt: tsToIso(data.createdAt, now),
-    updatedAt: tsToIso(data.updatedAt, now),
+    // No stored updatedAt → a stable '' version, so If-Match writes to the page can still succeed
+    updatedAt: tsToIso(data.updatedAt, ''),
   }
 }
 
@@ -85,6 +86,15 @@ export interface UpsertWikiAdminInput {
   agentVersion?: string
   pinned?: boolean
   sourceRefs?: Wiki['sourceRefs']
+  /** Optimistic concurrency: only write if the stored updatedAt still equals this. */
+  ifUpdatedAt?: string
+}
+
+/** Thrown by upsertWikiAdmin when ifUpdatedAt no longer matches; carries the current page. */
+export class WikiConflictError extends Error {
+  constructor(public readonly current: Wiki | null) {
+    super('wiki was updated since ifUpdatedAt')
+  }
 }
 
 export async function upsertWikiAdmin(uid: string, input: UpsertWikiAdminInput): Promise<Wiki> {
@@ -92,25 +102,34 @@ export async function upsertWikiAdmin(uid: string, input: UpsertWikiAdminInput):
   if (!v.ok) throw new Error(v.error)
   const docId = slugToDocId(input.slug)
   const ref = wikiCol(uid).doc(docId)
-  const existing = await ref.get()
-  const now = isoNow()
 
-  const next: Wiki = {
-    slug: input.slug,
-    title: input.title.trim(),
-    contentMd: input.contentMd,
-    surface: input.surface,
-    sourceRefs: input.sourceRefs ?? (existing.exists ? (existing.data() as Wiki).sourceRefs ?? [] : []),
-    backlinks: existing.exists ? (existing.data() as Wiki).backlinks ?? [] : [],
-    updatedBy: input.updatedBy ?? 'lori',
-    agentVersion: input.agentVersion,
-    pinned: input.pinned ?? (existing.exists ? !!(existing.data() as Wiki).pinned : false),
-    archived: existing.exists ? !!(existing.data() as Wiki).archived : false,
-    createdAt: existing.exists ? (existing.data() as Wiki).createdAt : now,
-    updatedAt: now,
-  }
+  const next = await adminDb.runTransaction(async (tx) => {
+    const existing = await tx.get(ref)
+    const now = isoNow()
+
+    if (input.ifUpdatedAt !== undefined) {
+      const current = existing.exists ? rowToWiki(existing.id, existing.data()!) : null
+      if (!current || current.updatedAt !== input.ifUpdatedAt) throw new WikiConflictError(current)
+    }
 
-  await ref.set(next, { merge: true })
+    const next: Wiki = {
+      slug: input.slug,
+      title: input.title.trim(),
+      contentMd: input.contentMd,
+      surface: input.surface,
+      sourceRefs: input.sourceRefs ?? (existing.exists ? (existing.data() as Wiki).sourceRefs ?? [] : []),
+      backlinks: existing.exists ? (existing.data() as Wiki).backlinks ?? [] : [],
+      updatedBy: input.updatedBy ?? 'lori',
+      agentVersion: input.agentVersion,
+      pinned: input.pinned ?? (existing.exists ? !!(existing.data() as Wiki).pinned : false),
+      archived: existing.exists ? !!(existing.data() as Wiki).archived : false,
+      createdAt: existing.exists ? (existing.data() as Wiki).createdAt : now,
+      updatedAt: now,
+    }
+
+    tx.set(ref, next, { merge: true })
+    return next
+  })
   await syncBacklinksAdmin(uid, input.slug, input.contentMd)
   return next
 }
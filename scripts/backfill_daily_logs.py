@@ -18,190 +18,24 @@ Prerequisites:
 
 import os
 import sys
-import math
+import json
+import time
+import random
 import logging
 import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
 
 from dotenv import load_dotenv
 load_dotenv(Path(__file__).parent / ".env")
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.api_core import exceptions as gcp_exceptions
 
-logger = logging.getLogger(__name__)
-
-# ─── Reward Function (Python port of lib/reward.ts) ─────────────────────
-
-REWARD_FLOOR = 0.05
-
-NERVOUS_SYSTEM_GATE = {
-    "regulated": 1.0,
-    "slightly_spiked": 0.7,
-    "spiked": 0.3,
-}
-
-TRAINING_SCORE = {
-    "strength": 1.0,
-    "yoga": 0.8,
-    "vo2": 1.0,
-    "zone2": 0.9,
-    "rest": 0.5,
-    "none": 0.2,
-}
-
-BODY_FELT_SCORE = {
-    "open": 1.0,
-    "neutral": 0.6,
-    "tense": 0.2,
-}
-
-NS_STATE_ENERGY_SCORE = {
-    "regulated": 1.0,
-    "slightly_spiked": 0.5,
-    "spiked": 0.1,
-}
-
-# Default project allocation (matches SEED_PROJECTS in constants.ts)
-THESIS_ALLOCATION = {
-    "armstrong": 0.6,
-    "manifold": 0.15,
-    "deep_tech": 0.05,
-    "jobs": 0.01,
-    "learning": 0.19,
-}
-
-
-def clamp(val, lo, hi):
-    return max(lo, min(hi, val))
-
-
-def floor_val(val):
-    return max(val, REWARD_FLOOR)
-
-
-def compute_ge(log):
-    sleep_target = 7.5
-    sleep_score = floor_val(clamp((log.get("sleepHours", 0) or 0) / sleep_target, 0, 1) if sleep_target > 0 else 0)
-
-    types = log.get("trainingTypes", []) or []
-    if not types:
-        t = log.get("trainingType")
-        types = [t] if t and t != "none" else []
-    training = floor_val(max((TRAINING_SCORE.get(t, 0.2) for t in types), default=0.2))
-
-    body = floor_val(BODY_FELT_SCORE.get(log.get("bodyFelt", "neutral"), 0.6))
-    ns = floor_val(NS_STATE_ENERGY_SCORE.get(log.get("nervousSystemState", "regulated"), 1.0))
-
-    return floor_val(
-        math.pow(sleep_score, 0.35) *
-        math.pow(training, 0.2) *
-        math.pow(body, 0.2) *
-        math.pow(ns, 0.25)
-    )
-
-
-def compute_gi(log):
-    problems = log.get("problems", []) or []
-    filled = sum(1 for p in problems if p.get("problem", "").strip())
-    problem_score = 0.1 if filled == 0 else 0.5 if filled == 1 else 0.8 if filled == 2 else 1.0
-    selected_bonus = 0.2 if (log.get("problemSelected", "") or "").strip() else 0
-    return floor_val(clamp(problem_score + selected_bonus, 0, 1))
-
-
-def compute_gvc(log):
-    shipped_base = 0.4 if (log.get("whatShipped", "") or "").strip() else 0.05
-    public_bonus = 0.2 if log.get("publicIteration") else 0
-    focus_target = 6
-    focus_ratio = clamp((log.get("focusHoursActual", 0) or 0) / focus_target, 0, 1) if focus_target > 0 else 0
-    speed_bonus = 0.1 if log.get("speedOverPerfection") else 0
-
-    days_out = log.get("daysSinceLastOutput", 0) or 0
-    recency = 1.0 if days_out == 0 else 0.7 if days_out == 1 else 0.4 if days_out == 2 else 0.1
-
-    raw = (shipped_base + public_bonus) * 0.35 + focus_ratio * 0.35 + recency * 0.2 + speed_bonus
-    return floor_val(clamp(raw, 0, 1))
-
-
-def compute_kappa(log):
-    ask_quota = 2
-    ask_ratio = clamp((log.get("revenueAsksCount", 0) or 0) / ask_quota, 0, 1) if ask_quota > 0 else 0
-    revenue_signal = 1.0 if (log.get("revenueThisSession", 0) or 0) > 0 else 0.2
-    feedback_bonus = 0.15 if log.get("feedbackLoopClosed") else 0
-
-    stream = log.get("revenueStreamType", "one_time")
-    multiplier = 1.15 if stream == "recurring" else 0.9 if stream == "organic" else 1.0
-
-    raw = (ask_ratio * 0.5 + revenue_signal * 0.35 + feedback_bonus) * multiplier
-    return floor_val(clamp(raw, 0, 1))
-
-
-def compute_optionality():
-    """Uses SEED_PROJECTS allocation — static for backfill."""
-    shares = [0.6, 0.15, 0.05, 0.01]  # Armstrong, Manifold, Deep Tech, Jobs
-    total = sum(shares)
-    hhi = sum((s / total) ** 2 for s in shares)
-    backup_bonus = 0.1  # Jobs + Deep Tech are backup/optionality
-    return floor_val(clamp(1 - hhi + backup_bonus, 0, 1))
-
-
-def compute_fragmentation(log):
-    """Simplified: if spine is Armstrong, fragmentation is low."""
-    focus = log.get("focusHoursActual", 0) or 0
-    if focus == 0:
-        return 0
-    spine = (log.get("spineProject", "") or "").lower()
-    # If focusing on the spine project, low fragmentation
-    if spine in ("armstrong", ""):
-        return 0.05  # small divergence (not perfect allocation)
-    return 0.3  # higher divergence if not on spine
-
-
-def compute_theta(log, recent_logs=None):
-    """7-day rolling pillar engagement."""
-    all_logs = list(recent_logs or []) + [log]
-    touched = set()
-    for l in all_logs:
-        for p in (l.get("pillarsTouched", []) or []):
-            touched.add(p)
-    count = len(touched)
-    return 0.0 if count == 0 else 0.33 if count == 1 else 0.67 if count == 2 else 1.0
-
-
-def compute_reward(log, recent_logs=None):
-    ge = compute_ge(log)
-    gi = compute_gi(log)
-    gvc = compute_gvc(log)
-    kappa = compute_kappa(log)
-    optionality = compute_optionality()
-    fragmentation = compute_fragmentation(log)
-    theta = compute_theta(log, recent_logs)
-
-    ns_state = log.get("nervousSystemState", "regulated")
-    gate = NERVOUS_SYSTEM_GATE.get(ns_state, 1.0)
-
-    geo_mean = math.pow(ge * gi * gvc * kappa * optionality, 1 / 5)
-    raw_score = gate * geo_mean - fragmentation * 0.3 + theta * 0.15
-    score = clamp(round(raw_score * 10 * 10) / 10, 0, 10)
-
-    return {
-        "score": score,
-        "delta": None,
-        "components": {
-            "ge": round(ge, 4),
-            "gi": round(gi, 4),
-            "gvc": round(gvc, 4),
-            "kappa": round(kappa, 4),
-            "optionality": round(optionality, 4),
-            "fragmentation": round(fragmentation, 4),
-            "theta": round(theta, 4),
-            "gate": gate,
-        },
-        "computedAt": datetime.utcnow().isoformat() + "Z",
-    }
+from reward import RewardWindow, compute_reward
 
+logger = logging.getLogger(__name__)
 
 # ─── Garmin → DailyLog Inference ────────────────────────────────────────
 
@@ -295,6 +129,138 @@ def infer_daily_log_from_garmin(garmin_data: dict, date_str: str) -> dict:
     }
 
 
+# ─── Bulk Reads ──────────────────────────────────────────────────────────
+
+# Refs per get_all round trip — keeps each batched read a modest request.
+PREFETCH_CHUNK = 300
+
+
+def prefetch_docs(db, uid: str, collection: str, dates: list) -> dict:
+    """Load users/{uid}/{collection}/{date} for every date up front.
+
+    Uses db.get_all over chunked document refs, so a year of days costs a
+    couple of round trips instead of one get() per day. Returns
+    {date: data} for the documents that exist.
+    """
+    coll = db.collection("users").document(uid).collection(collection)
+    docs = {}
+    for i in range(0, len(dates), PREFETCH_CHUNK):
+        refs = [coll.document(d) for d in dates[i:i + PREFETCH_CHUNK]]
+        for doc in db.get_all(refs):
+            if doc.exists:
+                docs[doc.id] = doc.to_dict()
+    return docs
+
+
+# ─── Buffered Writes ─────────────────────────────────────────────────────
+
+# Firestore rejects batched writes with more than 500 operations.
+FIRESTORE_BATCH_LIMIT = 500
+
+# Errors worth retrying a batch commit on: contention and transient outages.
+RETRYABLE_WRITE_ERRORS = (
+    gcp_exceptions.Aborted,
+    gcp_exceptions.DeadlineExceeded,
+    gcp_exceptions.ServiceUnavailable,
+    gcp_exceptions.ResourceExhausted,
+    gcp_exceptions.InternalServerError,
+)
+
+
+class BatchedLogWriter:
+    """Buffers daily logs and commits them as Firestore batched writes.
+
+    Flushes automatically at `batch_size` (capped at the 500-op limit) and
+    retries a batch on contention with jittered exponential backoff. A batch
+    that still fails is counted and skipped so the rest of the backfill runs.
+    """
+
+    def __init__(self, db, uid: str, batch_size: int = FIRESTORE_BATCH_LIMIT, max_retries: int = 5):
+        self.db = db
+        self.collection = db.collection("users").document(uid).collection("daily_logs")
+        self.batch_size = max(1, min(batch_size, FIRESTORE_BATCH_LIMIT))
+        self.max_retries = max_retries
+        self.pending = []
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def add(self, date_str: str, log: dict) -> None:
+        data = dict(log)
+        data["createdAt"] = firestore.SERVER_TIMESTAMP
+        data["updatedAt"] = firestore.SERVER_TIMESTAMP
+        self.pending.append((date_str, data))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        chunk, self.pending = self.pending, []
+        self.flushes += 1
+
+        for attempt in range(self.max_retries + 1):
+            batch = self.db.batch()
+            for date_str, data in chunk:
+                batch.set(self.collection.document(date_str), data, merge=True)
+            try:
+                batch.commit()
+                break
+            except RETRYABLE_WRITE_ERRORS as e:
+                if attempt == self.max_retries:
+                    self.failed += len(chunk)
+                    logger.error(f"Flush {self.flushes}: {len(chunk)} writes failed after {attempt + 1} attempts: {e}")
+                    return
+                delay = min(30.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"Flush {self.flushes}: {e} — retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+        self.written += len(chunk)
+        logger.info(f"Flush {self.flushes}: wrote {len(chunk)} logs ({chunk[0][0]} → {chunk[-1][0]})")
+
+    def close(self) -> None:
+        self.flush()
+
+
+class DryRunLogWriter:
+    """Stands in for BatchedLogWriter under --dry-run: serializes each planned
+    write as one JSON line instead of touching Firestore."""
+
+    def __init__(self, path: str, uid: str):
+        self.path = path
+        self.uid = uid
+        self.file = open(path, "w")
+        self.written = 0
+        self.failed = 0
+
+    def add(self, date_str: str, log: dict) -> None:
+        record = {"path": f"users/{self.uid}/daily_logs/{date_str}", "data": log}
+        self.file.write(json.dumps(record, default=str) + "\n")
+        self.written += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+
+# ─── Reward Window State ─────────────────────────────────────────────────
+
+def load_window(path: str, start_date: datetime) -> RewardWindow:
+    """Resume the theta/delta window saved by a previous run.
+
+    Only valid if that run ended the day before start_date; otherwise the
+    saved window describes other days and the backfill starts fresh.
+    """
+    if not Path(path).exists():
+        return RewardWindow()
+    window = RewardWindow.from_dict(json.loads(Path(path).read_text()))
+    expected = (start_date - timedelta(days=1)).strftime("%Y-%m-%d")
+    if window.last_date != expected:
+        logger.warning(f"Window state in {path} ends {window.last_date}, not {expected} — starting fresh")
+        return RewardWindow()
+    logger.info(f"Resumed reward window from {path} ({len(window.entries)} days)")
+    return window
+
+
 # ─── Main ────────────────────────────────────────────────────────────────
 
 def main():
@@ -303,7 +269,18 @@ def main():
     parser.add_argument("--end", help="End date (YYYY-MM-DD). Defaults to yesterday.")
     parser.add_argument("--range", type=int, default=30, help="Number of days to backfill (default: 30)")
     parser.add_argument("--uid", help="Firebase user ID. Falls back to FIREBASE_UID env var.")
-    parser.add_argument("--dry-run", action="store_true", help="Print what would be written without writing.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Write planned logs to --dry-run-out (JSONL) instead of Firestore.")
+    parser.add_argument("--dry-run-out", default="backfill_dry_run.jsonl",
+                        help="Output file for --dry-run (default: backfill_dry_run.jsonl)")
+    parser.add_argument("--window-state",
+                        help="JSON file holding the 7-day reward window; resumed if it ends the day before --start, "
+                             "and saved after the run")
+    parser.add_argument("--from-store", metavar="ROOT",
+                        help="Read Garmin metrics from a local snapshot_store mirror (e.g. scripts/.snapshots) "
+                             "instead of Firestore")
+    parser.add_argument("--batch-size", type=int, default=FIRESTORE_BATCH_LIMIT,
+                        help=f"Logs per Firestore batch commit (max {FIRESTORE_BATCH_LIMIT}, default: {FIRESTORE_BATCH_LIMIT})")
     parser.add_argument("--skip-existing", action="store_true", default=True,
                         help="Skip dates that already have daily log entries (default: true)")
     parser.add_argument("--overwrite", action="store_true",
@@ -341,88 +318,88 @@ def main():
 
     db = firestore.client()
 
-    # Process each day
+    # Prefetch both collections for the whole range
+    dates = []
     current = start_date
+    while current <= end_date:
+        dates.append(current.strftime("%Y-%m-%d"))
+        current += timedelta(days=1)
+
+    existing_logs = {} if args.overwrite else prefetch_docs(db, uid, "daily_logs", dates)
+    if args.from_store:
+        # Garmin metrics from the local mirror; daily_logs above stay authoritative
+        from snapshot_store import SnapshotStore
+        table = SnapshotStore(uid, args.from_store).table("garmin_metrics")
+        rows = table.span(dates[0], dates[-1]) if dates else slice(0, 0)
+        garmin_metrics = {str(table.dates[i]): table.doc(i) for i in range(rows.start, rows.stop)}
+    else:
+        garmin_metrics = prefetch_docs(db, uid, "garmin_metrics", dates)
+    logger.info(f"Prefetched {len(existing_logs)} daily logs and {len(garmin_metrics)} Garmin days")
+
+    if args.dry_run:
+        writer = DryRunLogWriter(args.dry_run_out, uid)
+    else:
+        writer = BatchedLogWriter(db, uid, batch_size=args.batch_size)
+
+    # Process each day
     created = 0
     skipped = 0
     no_garmin = 0
-    recent_logs = []  # rolling window for theta computation
-
-    while current <= end_date:
-        date_str = current.strftime("%Y-%m-%d")
+    window = load_window(args.window_state, start_date) if args.window_state else RewardWindow()
 
+    for date_str in dates:
         # Check if daily log already exists
-        if not args.overwrite:
-            existing_ref = db.collection("users").document(uid).collection("daily_logs").document(date_str)
-            existing = existing_ref.get()
-            if existing.exists:
-                existing_data = existing.to_dict()
-                recent_logs.append(existing_data)
-                if len(recent_logs) > 7:
-                    recent_logs.pop(0)
-                logger.info(f"SKIP {date_str} — daily log already exists")
-                skipped += 1
-                current += timedelta(days=1)
-                continue
+        existing_data = existing_logs.get(date_str)
+        if existing_data is not None:
+            window.push(existing_data)
+            logger.info(f"SKIP {date_str} — daily log already exists")
+            skipped += 1
+            continue
 
         # Read Garmin data
-        garmin_ref = db.collection("users").document(uid).collection("garmin_metrics").document(date_str)
-        garmin_doc = garmin_ref.get()
-
-        if not garmin_doc.exists:
+        garmin_data = garmin_metrics.get(date_str)
+        if garmin_data is None:
             logger.warning(f"SKIP {date_str} — no Garmin data")
             no_garmin += 1
-            current += timedelta(days=1)
             continue
 
-        garmin_data = garmin_doc.to_dict()
-
         # Build daily log
         log = infer_daily_log_from_garmin(garmin_data, date_str)
 
         # Compute reward with rolling 7-day context
-        reward = compute_reward(log, recent_logs[-7:] if recent_logs else [])
+        reward = compute_reward(log, window=window)
 
         # Compute delta from previous day
-        if recent_logs:
-            prev_score = recent_logs[-1].get("rewardScore", {})
-            if prev_score and prev_score.get("score") is not None:
-                reward["delta"] = round(reward["score"] - prev_score["score"], 1)
+        reward["delta"] = window.delta(reward["score"])
 
         log["rewardScore"] = reward
 
-        if args.dry_run:
-            print(f"\n--- {date_str} ---")
-            print(f"  Sleep: {log['sleepHours']}h  Body: {log['bodyFelt']}  NS: {log['nervousSystemState']}")
-            print(f"  Training: {log['trainingTypes']}")
-            print(f"  GE={reward['components']['ge']:.2f}  GI={reward['components']['gi']:.2f}  "
-                  f"GVC={reward['components']['gvc']:.2f}  K={reward['components']['kappa']:.2f}  "
-                  f"O={reward['components']['optionality']:.2f}")
-            print(f"  Score: {reward['score']}  Delta: {reward['delta']}")
-        else:
-            # Write to Firestore
-            ref = db.collection("users").document(uid).collection("daily_logs").document(date_str)
-            log["createdAt"] = firestore.SERVER_TIMESTAMP
-            log["updatedAt"] = firestore.SERVER_TIMESTAMP
-            ref.set(log, merge=True)
-            logger.info(f"WRITE {date_str} — g*={reward['score']} (GE={reward['components']['ge']:.2f})")
+        writer.add(date_str, log)
+        logger.info(f"{'PLAN' if args.dry_run else 'QUEUE'} {date_str} — g*={reward['score']} "
+                    f"(GE={reward['components']['ge']:.2f})")
 
-        recent_logs.append(log)
-        if len(recent_logs) > 7:
-            recent_logs.pop(0)
+        window.push(log)
 
         created += 1
-        current += timedelta(days=1)
+
+    writer.close()
+    if args.window_state and not args.dry_run:
+        Path(args.window_state).write_text(json.dumps(window.to_dict()))
 
     # Summary
     print(f"\n{'DRY RUN — ' if args.dry_run else ''}Backfill complete:")
     print(f"  Created: {created}")
+    if args.dry_run:
+        print(f"  Planned writes: {args.dry_run_out}")
+    else:
+        print(f"  Written: {writer.written} in {writer.flushes} batch(es)")
+        print(f"  Failed writes: {writer.failed}")
     print(f"  Skipped (existing): {skipped}")
     print(f"  Skipped (no Garmin): {no_garmin}")
     print(f"  Date range: {start_date.strftime('%Y-%m-%d')} → {end_date.strftime('%Y-%m-%d')}")
 
-    if not args.dry_run and created > 0:
-        print(f"\nBackfilled {created} days with conservative defaults.")
+    if not args.dry_run and writer.written > 0:
+        print(f"\nBackfilled {writer.written} days with conservative defaults.")
         print("Manual fields (whatShipped, revenueAsks, etc.) default to empty/zero.")
         print("You can go back and fill in what you remember — the score recomputes on save.")
 
@@ -0,0 +1,114 @@
+"""
+HealthSnapshot Benchmark
+========================
+Memory per day and Firestore payload cost for a long Garmin range, comparing
+the original dict-backed dataclass serialized through asdict() with slotted
+snapshots and their direct to_dict().
+
+Payload cost covers what a range sync does per day: build the write payload
+and check whether the day has metrics for the checkpoint.
+
+Usage:
+    python scripts/bench_snapshots.py [--days 3650] [--repeat 5]
+"""
+
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from dataclasses import MISSING, asdict, field, fields, make_dataclass
+from typing import Callable, List
+
+from garmin_sync import SNAPSHOT_METRICS, HealthSnapshot
+
+# The pre-slots HealthSnapshot: same fields, instance __dict__, asdict() serializer
+LegacySnapshot = make_dataclass("LegacySnapshot", [
+    (f.name, f.type, field(default=f.default) if f.default is not MISSING
+     else field(default_factory=f.default_factory) if f.default_factory is not MISSING
+     else field())
+    for f in fields(HealthSnapshot)
+])
+
+
+def legacy_to_dict(snapshot) -> dict:
+    return {k: v for k, v in asdict(snapshot).items() if v is not None and k != "unavailable"}
+
+
+def synthetic_days(n: int, seed: int = 0) -> List[dict]:
+    """Garmin-shaped days: ints and 1-decimal floats, ~10% of metrics missing."""
+    rng = random.Random(seed)
+    floats = {f.name for f in fields(HealthSnapshot) if "float" in str(f.type)}
+    days = []
+    for i in range(n):
+        day = {"date": f"{2000 + i // 366:04d}-{i % 12 + 1:02d}-{i % 28 + 1:02d}"}
+        for name in SNAPSHOT_METRICS:
+            if rng.random() < 0.1:
+                continue
+            day[name] = round(rng.uniform(10, 90), 1) if name in floats else rng.randint(0, 20000)
+        days.append(day)
+    return days
+
+
+def measure_memory(build: Callable[[List[dict]], object], days: List[dict]) -> int:
+    """Bytes still held after build(), counting the metric values themselves."""
+    raw = json.dumps(days)  # fresh value objects per run, as parsed Garmin responses are
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build(json.loads(raw))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return after - before
+
+
+def best_of(repeat: int, run: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HealthSnapshot memory and serialization")
+    parser.add_argument("--days", type=int, default=3650, help="Days in the synthetic range (default: 3650)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats; best is reported (default: 5)")
+    args = parser.parse_args()
+
+    days = synthetic_days(args.days)
+    legacy = [LegacySnapshot(**d) for d in days]
+    slotted = [HealthSnapshot(**d) for d in days]
+
+    # Same payloads from every representation
+    assert [s.to_dict() for s in slotted] == [legacy_to_dict(s) for s in legacy]
+
+    def legacy_sync():
+        for s in legacy:
+            data = legacy_to_dict(s)
+            any(k not in ("date", "source") for k in legacy_to_dict(s))
+        return data
+
+    def slotted_sync():
+        for s in slotted:
+            data = s.to_dict()
+            s.has_metrics()
+        return data
+
+    n = args.days
+    results = [
+        ("dataclass + asdict", measure_memory(lambda ds: [LegacySnapshot(**d) for d in ds], days),
+         best_of(args.repeat, legacy_sync)),
+        ("slotted dataclass", measure_memory(lambda ds: [HealthSnapshot(**d) for d in ds], days),
+         best_of(args.repeat, slotted_sync)),
+    ]
+
+    print(f"{n:,} days, {len(SNAPSHOT_METRICS)} metrics, best of {args.repeat}\n")
+    print(f"  {'representation':<20} {'bytes/day':>10} {'µs/day':>8}")
+    for name, memory, elapsed in results:
+        print(f"  {name:<20} {memory / n:>10,.0f} {elapsed / n * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
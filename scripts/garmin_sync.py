@@ -10,6 +10,31 @@ Setup:
     3. Copy .env.example to .env and fill in credentials
     4. Run: python garmin_sync.py [--date YYYY-MM-DD] [--range DAYS]
 
+Each day's seven metric endpoints are fetched concurrently by default, so a
+day costs about as long as the slowest endpoint. Tune with --concurrency
+(1 = serial) and --timeout (seconds per call).
+
+With --range > 1, --workers days are fetched in parallel and streamed to
+Firestore in batches of --batch-size, so long backfills keep memory flat
+and only lose the batch in flight if interrupted.
+
+--incremental skips days already synced as final (synced more than
+--settle-hours after the day ended), checking a local checkpoint first and
+Firestore in bulk second. A settled day is final whatever it holds, so days
+the watch wasn't worn are fetched once, not on every run. An interrupted
+backfill resumes where it stopped:
+    python garmin_sync.py --range 365 --incremental
+
+All Garmin calls share one adaptive rate limiter (--rate, --max-rate) and
+retry throttles and transient errors with backoff (--retries). A metric
+that stays throttled is flagged as unavailable rather than written as
+missing, so incremental runs pick the day up again, up to
+--unavailable-runs times once it has settled.
+
+Raw responses are kept in a local compressed cache (--cache). After adding
+a field to HealthSnapshot, re-derive history from disk without Garmin:
+    python garmin_sync.py --range 365 --offline
+
 First run with MFA:
     import garth
     garth.login("your@email.com", "password")  # Will prompt for MFA code
@@ -19,11 +44,20 @@ First run with MFA:
 import os
 import sys
 import logging
+import json
+import zlib
+import sqlite3
+import hashlib
 import argparse
+import queue
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import Optional, List
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, Iterable, Iterator, Optional, List, Set, Tuple
 
 # Load .env file if present
 from dotenv import load_dotenv
@@ -34,10 +68,306 @@ from firebase_admin import credentials, firestore
 
 logger = logging.getLogger(__name__)
 
+# Firestore rejects batched writes with more than 500 operations.
+FIRESTORE_BATCH_LIMIT = 500
+
+# Garmin keeps revising a day (late sleep uploads, HRV, body battery) for a
+# while after it ends. A day synced within this window is still "settling".
+DEFAULT_SETTLE_HOURS = 48
+
+# Settled syncs that may still come back with unavailable metrics before the
+# checkpoint stops retrying the day (an endpoint that never answers for it).
+DEFAULT_UNAVAILABLE_RUNS = 3
+
+
+# ─── Rate Limiting & Retry ────────────────────────────────────────────────
+
+class MetricUnavailable(Exception):
+    """Garmin throttled or kept failing for a metric — its real value is
+    unknown, which is different from Garmin having no data for that day."""
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose refill rate adapts AIMD-style: it creeps up by
+    `increase` calls/sec on every success and is cut by `decrease` on every
+    throttle, so it settles near the highest rate Garmin tolerates."""
+
+    def __init__(
+        self,
+        rate: float = 4.0,
+        min_rate: float = 0.25,
+        max_rate: float = 10.0,
+        burst: float = 7.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, cancel: Optional[threading.Event] = None) -> bool:
+        """Block until a call is allowed. Returns False, without taking a
+        token, if `cancel` is set while waiting."""
+        while True:
+            if cancel is not None and cancel.is_set():
+                return False
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    delay = (1 - self._tokens) / self.rate
+                else:
+                    delay = self._paused_until - now
+            if cancel is None:
+                time.sleep(delay)
+            else:
+                cancel.wait(delay)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+            if retry_after:
+                self._paused_until = max(self._paused_until, self._updated + retry_after)
+                self._updated = self._paused_until
+
+
+class CallWatch:
+    """One day's in-flight Garmin calls: when each started talking to Garmin,
+    and whether it has been given up on.
+
+    Timeouts are measured from start(), after the limiter has let the call
+    through, so time queued behind a throttled limiter never counts. A call
+    that is cancelled (its own timeout, or the whole day finishing) takes no
+    more limiter tokens and makes no further retries.
+    """
+
+    def __init__(self):
+        self.cancel = threading.Event()  # set once the day's results are in
+        self._started: Dict[str, float] = {}
+        self._expired: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def start(self, method: str) -> None:
+        with self._lock:
+            self._started[method] = time.monotonic()
+
+    def stop(self, method: str) -> None:
+        with self._lock:
+            self._started.pop(method, None)
+
+    def elapsed(self, method: str) -> float:
+        """Seconds the current attempt has been in Garmin's hands (0 while queued or backing off)."""
+        with self._lock:
+            started = self._started.get(method)
+        return time.monotonic() - started if started is not None else 0.0
+
+    def expire(self, method: str) -> None:
+        with self._lock:
+            self._expired.add(method)
+
+    def cancelled(self, method: str) -> bool:
+        if self.cancel.is_set():
+            return True
+        with self._lock:
+            return method in self._expired
 
-# ─── Garmin Client ────────────────────────────────────────────────────────
 
 @dataclass
+class CallStats:
+    """Counters for Garmin Connect traffic, shared across worker threads."""
+    calls: int = 0        # requests actually sent
+    retries: int = 0      # re-sends after a throttle or transient error
+    throttles: int = 0    # 429 responses
+    wasted: int = 0       # requests that returned no usable response
+    unavailable: int = 0  # metrics given up on after exhausting retries
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, n in counts.items():
+                setattr(self, name, getattr(self, name) + n)
+
+    def __str__(self) -> str:
+        return (f"{self.calls} calls, {self.retries} retries, {self.throttles} throttled, "
+                f"{self.wasted} wasted, {self.unavailable} metrics unavailable")
+
+
+_TRANSIENT_ERROR_NAMES = {"ConnectionError", "Timeout", "ConnectTimeout", "ReadTimeout", "ChunkedEncodingError"}
+
+
+def classify_error(error: BaseException) -> Tuple[str, Optional[float]]:
+    """Classify a Garmin client error as "throttled", "transient" or "fatal".
+
+    garminconnect wraps garth errors, which wrap requests errors, so walk the
+    cause chain looking for an HTTP status. Also returns the server's
+    Retry-After (seconds) when it sent one.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        inner = getattr(error, "error", None)
+        response = getattr(error, "response", None)
+        if response is None and inner is not None:
+            response = getattr(inner, "response", None)
+        # requests.Response is falsy for error statuses — compare against None
+        status = getattr(response, "status_code", None) if response is not None else None
+
+        if status == 429 or "TooManyRequests" in type(error).__name__:
+            retry_after = None
+            if response is not None:
+                try:
+                    retry_after = float(response.headers.get("Retry-After"))
+                except (TypeError, ValueError, AttributeError):
+                    pass
+            return "throttled", retry_after
+        if status is not None:
+            return ("transient" if status >= 500 else "fatal"), None
+        if type(error).__name__ in _TRANSIENT_ERROR_NAMES or isinstance(error, (ConnectionError, TimeoutError)):
+            return "transient", None
+
+        error = error.__cause__ or error.__context__ or (inner if isinstance(inner, BaseException) else None)
+    return "fatal", None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0, retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with jitter, never shorter than the server's Retry-After."""
+    delay = min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+    return max(delay, retry_after or 0.0)
+
+
+# ─── Response Cache ───────────────────────────────────────────────────────
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / ".garmin_cache.sqlite"
+
+
+class ResponseCache:
+    """On-disk cache of raw Garmin payloads, keyed by endpoint + date.
+
+    Payloads are stored once per content hash as zlib-compressed JSON, so the
+    many identical empty responses cost one row. A payload fetched after its
+    day settled never goes stale (unless `final_ttl` is set); one fetched while
+    the day was still settling expires after `settling_ttl` seconds. Least
+    recently used entries are evicted once blobs exceed `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        max_bytes: int = 512 * 1024 * 1024,
+        settling_ttl: float = 3600,
+        final_ttl: Optional[float] = None,
+        settle_hours: float = DEFAULT_SETTLE_HOURS,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.settling_ttl = settling_ttl
+        self.final_ttl = final_ttl
+        self.settle_seconds = settle_hours * 3600
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                endpoint TEXT NOT NULL,
+                date TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (endpoint, date)
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+        """)
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()[0]
+
+    def _is_fresh(self, date_str: str, fetched_at: float, now: float) -> bool:
+        day_end = (datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=1)).timestamp()
+        if fetched_at >= day_end + self.settle_seconds:
+            return self.final_ttl is None or now - fetched_at < self.final_ttl
+        return now - fetched_at < self.settling_ttl
+
+    def get(self, endpoint: str, date_str: str, ignore_ttl: bool = False) -> Tuple[bool, object]:
+        """Return (hit, payload). A cached empty response is a hit with payload None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.fetched_at, b.data FROM entries e JOIN blobs b ON b.hash = e.hash "
+                "WHERE e.endpoint = ? AND e.date = ?",
+                (endpoint, date_str),
+            ).fetchone()
+            if row is None or not (ignore_ttl or self._is_fresh(date_str, row[0], now)):
+                self.misses += 1
+                return False, None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE endpoint = ? AND date = ?",
+                (now, endpoint, date_str),
+            )
+            self.hits += 1
+        return True, json.loads(zlib.decompress(row[1]))
+
+    def put(self, endpoint: str, date_str: str, payload) -> None:
+        raw = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+        digest = hashlib.sha256(raw).hexdigest()
+        now = time.time()
+        with self._lock:
+            if not self._conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone():
+                data = zlib.compress(raw, 6)
+                self._conn.execute("INSERT INTO blobs (hash, data) VALUES (?, ?)", (digest, data))
+                self._bytes += len(data)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (endpoint, date, hash, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (endpoint, date_str, digest, now, now),
+            )
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until blobs fit in 90% of max_bytes."""
+        target = self.max_bytes * 0.9
+        while self._bytes > target:
+            oldest = self._conn.execute(
+                "SELECT endpoint, date FROM entries ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not oldest:
+                break
+            self._conn.executemany("DELETE FROM entries WHERE endpoint = ? AND date = ?", oldest)
+            self._conn.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM entries)")
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+# ─── Garmin Client ────────────────────────────────────────────────────────
+
+@dataclass(slots=True)
 class HealthSnapshot:
     """A point-in-time health measurement from Garmin."""
     date: str
@@ -67,17 +397,56 @@ class HealthSnapshot:
     respirationRate: Optional[float] = None
     spo2: Optional[float] = None
 
+    # Metrics Garmin throttled or failed on — not persisted as fields
+    unavailable: List[str] = field(default_factory=list)
+
     def to_dict(self):
         """Return dict with None values stripped."""
-        return {k: v for k, v in asdict(self).items() if v is not None}
+        data = {"date": self.date, "source": self.source}
+        for name in SNAPSHOT_METRICS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        return data
+
+    def has_metrics(self) -> bool:
+        """True if at least one metric field came back from Garmin."""
+        return any(getattr(self, name) is not None for name in SNAPSHOT_METRICS)
+
+
+# Metric fields in declaration order — everything but identity and bookkeeping.
+SNAPSHOT_METRICS = tuple(
+    f.name for f in fields(HealthSnapshot) if f.name not in ("date", "source", "unavailable")
+)
 
 
 class GarminClient:
     """Fetches health data from Garmin Connect."""
 
-    def __init__(self, token_dir: str = None):
+    def __init__(
+        self,
+        token_dir: str = None,
+        concurrency: int = 1,
+        call_timeout: float = None,
+        limiter: AdaptiveRateLimiter = None,
+        max_retries: int = 4,
+        cache: ResponseCache = None,
+        offline: bool = False,
+    ):
         self.client = None
         self.token_path = Path(token_dir or (Path(__file__).parent / "garmin_tokens"))
+        # concurrency > 1 fetches a day's metric endpoints on a bounded thread pool
+        self.concurrency = concurrency
+        self.call_timeout = call_timeout
+        # Every call, from every worker thread, goes through one limiter
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.max_retries = max_retries
+        self.stats = CallStats()
+        # offline=True re-derives snapshots from cached payloads only
+        self.cache = cache
+        self.offline = offline
+        if offline and not cache:
+            raise ValueError("offline mode needs a response cache")
 
     def authenticate(self, email: str = None, password: str = None) -> bool:
         from garminconnect import Garmin
@@ -116,85 +485,203 @@ class GarminClient:
         return True
 
     def fetch_day(self, date_str: str) -> HealthSnapshot:
-        if not self.client:
+        if not self.client and not self.offline:
             raise RuntimeError("Not authenticated. Call authenticate() first.")
 
         snapshot = HealthSnapshot(date=date_str)
+        for name, values in self._fetch_metrics(date_str):
+            if values is None:
+                snapshot.unavailable.append(name)
+                continue
+            for key, value in values.items():
+                setattr(snapshot, key, value)
 
-        # Heart rate
-        try:
-            hr_data = self.client.get_heart_rates(date_str)
-            if hr_data:
-                snapshot.restingHeartRate = hr_data.get("restingHeartRate")
-        except Exception:
-            pass
+        if len(snapshot.unavailable) == len(METRIC_ENDPOINTS):
+            raise MetricUnavailable(f"every metric unavailable for {date_str}")
+        return snapshot
 
-        # HRV
-        try:
-            hrv_data = self.client.get_hrv_data(date_str)
-            if hrv_data and hrv_data.get("hrvSummary"):
-                summary = hrv_data["hrvSummary"]
-                snapshot.hrvRmssd = summary.get("lastNightAvg")
-                snapshot.hrvWeeklyAvg = summary.get("weeklyAvg")
-        except Exception:
-            pass
-
-        # Sleep
-        try:
-            sleep_data = self.client.get_sleep_data(date_str)
-            if sleep_data:
-                daily = sleep_data.get("dailySleepDTO", {})
-                scores = daily.get("sleepScores", {})
-                overall = scores.get("overall", {})
-                snapshot.sleepScore = overall.get("value") if isinstance(overall, dict) else overall
-                snapshot.deepSleepMinutes = daily.get("deepSleepSeconds", 0) // 60 if daily.get("deepSleepSeconds") else None
-                snapshot.lightSleepMinutes = daily.get("lightSleepSeconds", 0) // 60 if daily.get("lightSleepSeconds") else None
-                snapshot.remSleepMinutes = daily.get("remSleepSeconds", 0) // 60 if daily.get("remSleepSeconds") else None
-                snapshot.awakeMinutes = daily.get("awakeSleepSeconds", 0) // 60 if daily.get("awakeSleepSeconds") else None
-        except Exception:
-            pass
-
-        # Daily stats
-        try:
-            stats = self.client.get_stats(date_str)
-            if stats:
-                snapshot.steps = stats.get("totalSteps")
-                snapshot.activeCalories = stats.get("activeKilocalories")
-                snapshot.stressLevel = stats.get("averageStressLevel")
-        except Exception:
-            pass
-
-        # Body battery
+    def _fetch_metrics(self, date_str: str) -> List[Tuple[str, Optional[dict]]]:
+        """Run every metric endpoint for a day, serially or on a bounded pool.
+
+        Returns (metric name, fields) pairs. Each metric fails on its own:
+        no data gives empty fields, while a throttle, exhausted retries or a
+        timeout gives None so the metric is marked unavailable.
+        """
+        watch = CallWatch()
+        if self.concurrency <= 1:
+            return [self._fetch_metric(date_str, *metric, watch=watch) for metric in METRIC_ENDPOINTS]
+
+        workers = min(self.concurrency, len(METRIC_ENDPOINTS))
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="garmin-metric")
+        pending = {
+            pool.submit(self._fetch_metric, date_str, *metric, watch=watch): metric
+            for metric in METRIC_ENDPOINTS
+        }
+        # Each call's timeout runs from when the limiter lets it through, so
+        # check the in-flight calls a few times per timeout period.
+        poll = self.call_timeout / 4 if self.call_timeout else None
+        results = []
         try:
-            bb_data = self.client.get_body_battery(date_str)
-            if bb_data and len(bb_data) > 0:
-                day = bb_data[0]
-                snapshot.bodyBatteryCharged = day.get("charged")
-                snapshot.bodyBatteryDrained = day.get("drained")
-                # Morning peak = highest value in the array (capacity you started with)
-                values = day.get("bodyBatteryValuesArray", [])
-                if values:
-                    snapshot.bodyBattery = max(v[1] for v in values if v[1] is not None)
-        except Exception:
-            pass
-
-        # Respiration
+            while pending:
+                done, _ = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results.append(future.result())
+                    del pending[future]
+                if not self.call_timeout:
+                    continue
+                for future, (name, method, _) in list(pending.items()):
+                    if watch.elapsed(method) > self.call_timeout:
+                        logger.warning(f"{date_str} {name}: timed out after {self.call_timeout}s")
+                        watch.expire(method)
+                        self.stats.add(unavailable=1)
+                        results.append((name, None))
+                        del pending[future]
+        finally:
+            # Stragglers still inside a Garmin call finish it, but neither
+            # retry nor take another limiter token; their results are dropped.
+            watch.cancel.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    def _fetch_metric(self, date_str: str, name: str, method: str, parse,
+                      watch: Optional[CallWatch] = None) -> Tuple[str, Optional[dict]]:
         try:
-            resp_data = self.client.get_respiration_data(date_str)
-            if resp_data:
-                snapshot.respirationRate = resp_data.get("avgBreathingRate")
-        except Exception:
-            pass
+            data = self._call(method, date_str, watch)
+        except MetricUnavailable as e:
+            if watch is not None and watch.cancelled(method):
+                return name, None  # already reported as timed out, or the day is done without it
+            logger.warning(f"{date_str} {name}: {e}")
+            self.stats.add(unavailable=1)
+            return name, None
+        except Exception as e:
+            logger.debug(f"{date_str} {name}: {e}")
+            return name, {}
 
-        # SpO2
         try:
-            spo2_data = self.client.get_spo2_data(date_str)
-            if spo2_data:
-                snapshot.spo2 = spo2_data.get("averageSpO2")
-        except Exception:
-            pass
+            return name, parse(data) if data else {}
+        except Exception as e:
+            logger.debug(f"{date_str} {name}: {e}")
+            return name, {}
 
-        return snapshot
+    def _call(self, method: str, date_str: str, watch: Optional[CallWatch] = None):
+        """Return a raw payload from the cache, or from Garmin via _call_garmin."""
+        if self.cache:
+            hit, data = self.cache.get(method, date_str, ignore_ttl=self.offline)
+            if hit:
+                return data
+        if self.offline:
+            raise MetricUnavailable("not in the response cache")
+
+        data = self._call_garmin(method, date_str, watch)
+        if self.cache:
+            self.cache.put(method, date_str, data)
+        return data
+
+    def _call_garmin(self, method: str, date_str: str, watch: Optional[CallWatch] = None):
+        """Call a Garmin endpoint through the shared rate limiter, retrying
+        throttles and transient errors with jittered exponential backoff.
+
+        With a watch, a cancelled call stops before taking a limiter token
+        and before each retry, and each attempt is timed from when it starts.
+        """
+        watch = watch or CallWatch()
+        for attempt in range(self.max_retries + 1):
+            if watch.cancelled(method) or not self.limiter.acquire(watch.cancel):
+                raise MetricUnavailable("cancelled")
+            self.stats.add(calls=1)
+            watch.start(method)
+            try:
+                data = getattr(self.client, method)(date_str)
+            except Exception as e:
+                watch.stop(method)
+                kind, retry_after = classify_error(e)
+                if kind == "fatal":
+                    raise
+                self.stats.add(wasted=1)
+                if kind == "throttled":
+                    self.stats.add(throttles=1)
+                    self.limiter.on_throttle(retry_after)
+                if attempt == self.max_retries:
+                    raise MetricUnavailable(f"{kind} after {attempt + 1} attempts: {e}") from e
+                if watch.cancelled(method):
+                    raise MetricUnavailable(f"cancelled after {kind} on attempt {attempt + 1}") from e
+                self.stats.add(retries=1)
+                watch.cancel.wait(backoff_delay(attempt, retry_after=retry_after))
+            else:
+                watch.stop(method)
+                self.limiter.on_success()
+                return data
+
+
+# ─── Metric Parsers ───────────────────────────────────────────────────────
+# Each parser turns one raw Garmin payload into HealthSnapshot fields.
+
+def _parse_heart_rate(hr_data: dict) -> dict:
+    return {"restingHeartRate": hr_data.get("restingHeartRate")}
+
+
+def _parse_hrv(hrv_data: dict) -> dict:
+    summary = hrv_data.get("hrvSummary")
+    if not summary:
+        return {}
+    return {
+        "hrvRmssd": summary.get("lastNightAvg"),
+        "hrvWeeklyAvg": summary.get("weeklyAvg"),
+    }
+
+
+def _parse_sleep(sleep_data: dict) -> dict:
+    daily = sleep_data.get("dailySleepDTO", {})
+    scores = daily.get("sleepScores", {})
+    overall = scores.get("overall", {})
+    return {
+        "sleepScore": overall.get("value") if isinstance(overall, dict) else overall,
+        "deepSleepMinutes": daily.get("deepSleepSeconds", 0) // 60 if daily.get("deepSleepSeconds") else None,
+        "lightSleepMinutes": daily.get("lightSleepSeconds", 0) // 60 if daily.get("lightSleepSeconds") else None,
+        "remSleepMinutes": daily.get("remSleepSeconds", 0) // 60 if daily.get("remSleepSeconds") else None,
+        "awakeMinutes": daily.get("awakeSleepSeconds", 0) // 60 if daily.get("awakeSleepSeconds") else None,
+    }
+
+
+def _parse_stats(stats: dict) -> dict:
+    return {
+        "steps": stats.get("totalSteps"),
+        "activeCalories": stats.get("activeKilocalories"),
+        "stressLevel": stats.get("averageStressLevel"),
+    }
+
+
+def _parse_body_battery(bb_data: list) -> dict:
+    day = bb_data[0]
+    fields = {
+        "bodyBatteryCharged": day.get("charged"),
+        "bodyBatteryDrained": day.get("drained"),
+    }
+    # Morning peak = highest value in the array (capacity you started with)
+    values = day.get("bodyBatteryValuesArray", [])
+    if values:
+        fields["bodyBattery"] = max(v[1] for v in values if v[1] is not None)
+    return fields
+
+
+def _parse_respiration(resp_data: dict) -> dict:
+    return {"respirationRate": resp_data.get("avgBreathingRate")}
+
+
+def _parse_spo2(spo2_data: dict) -> dict:
+    return {"spo2": spo2_data.get("averageSpO2")}
+
+
+# (metric name, Garmin client method, parser) — one Garmin Connect call each.
+METRIC_ENDPOINTS = (
+    ("heart_rate", "get_heart_rates", _parse_heart_rate),
+    ("hrv", "get_hrv_data", _parse_hrv),
+    ("sleep", "get_sleep_data", _parse_sleep),
+    ("stats", "get_stats", _parse_stats),
+    ("body_battery", "get_body_battery", _parse_body_battery),
+    ("respiration", "get_respiration_data", _parse_respiration),
+    ("spo2", "get_spo2_data", _parse_spo2),
+)
 
 
 # ─── Firebase Writer ──────────────────────────────────────────────────────
@@ -218,6 +705,25 @@ class FirestoreWriter:
 
         self.db = firestore.client()
 
+    def read_existing(self, uid: str, dates: List[str]) -> dict:
+        """Bulk-read existing garmin_metrics docs. Returns {date: data} for those that exist."""
+        collection = self.db.collection("users").document(uid).collection("garmin_metrics")
+        existing = {}
+        for i in range(0, len(dates), FIRESTORE_BATCH_LIMIT):
+            refs = [collection.document(d) for d in dates[i:i + FIRESTORE_BATCH_LIMIT]]
+            for doc in self.db.get_all(refs):
+                if doc.exists:
+                    existing[doc.id] = doc.to_dict()
+        return existing
+
+    @staticmethod
+    def _payload(data: dict, unavailable: List[str]) -> dict:
+        data["syncedAt"] = firestore.SERVER_TIMESTAMP
+        # Flag partially throttled days so incremental sync retries them;
+        # clear the flag once a later sync gets every metric.
+        data["unavailableMetrics"] = unavailable or firestore.DELETE_FIELD
+        return data
+
     def write_snapshot(self, uid: str, snapshot: HealthSnapshot) -> None:
         """Write a single day's metrics to Firestore."""
         ref = (
@@ -227,29 +733,248 @@ class FirestoreWriter:
             .document(snapshot.date)
         )
 
-        data = snapshot.to_dict()
-        data["syncedAt"] = firestore.SERVER_TIMESTAMP
-
-        ref.set(data, merge=True)
+        ref.set(self._payload(snapshot.to_dict(), snapshot.unavailable), merge=True)
         logger.info(f"Wrote {snapshot.date} to Firestore")
 
     def write_batch(self, uid: str, snapshots: List[HealthSnapshot]) -> None:
-        """Write multiple days in a batch."""
-        batch = self.db.batch()
+        """Write multiple days, committing at most FIRESTORE_BATCH_LIMIT per batch."""
+        collection = self.db.collection("users").document(uid).collection("garmin_metrics")
+        batch, count = self.db.batch(), 0
+        for snapshot in snapshots:
+            batch.set(collection.document(snapshot.date),
+                      self._payload(snapshot.to_dict(), snapshot.unavailable), merge=True)
+            count += 1
+            if count == FIRESTORE_BATCH_LIMIT:
+                batch.commit()
+                logger.info(f"Batch wrote {count} days to Firestore")
+                batch, count = self.db.batch(), 0
+        if count:
+            batch.commit()
+            logger.info(f"Batch wrote {count} days to Firestore")
+
+
+# ─── Range Pipeline ───────────────────────────────────────────────────────
+
+def date_range(start_date: str, end_date: str) -> Iterator[str]:
+    """Yield YYYY-MM-DD strings from start_date to end_date inclusive."""
+    current = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    while current <= end:
+        yield current.strftime("%Y-%m-%d")
+        current += timedelta(days=1)
+
+
+@dataclass
+class RangeSyncResult:
+    synced: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def days_per_sec(self) -> float:
+        return (self.synced + self.failed) / self.elapsed if self.elapsed else 0.0
+
+
+def sync_range(
+    garmin: GarminClient,
+    writer: FirestoreWriter,
+    uid: str,
+    dates: Iterable[str],
+    workers: int = 4,
+    batch_size: int = FIRESTORE_BATCH_LIMIT,
+    on_flush: Optional[Callable[[List[HealthSnapshot]], None]] = None,
+) -> RangeSyncResult:
+    """Fetch days on a pool of workers and stream them into batched writes.
+
+    Workers pull dates lazily and hand snapshots to the writer through a
+    bounded queue, and the writer flushes every `batch_size` days, so memory
+    stays flat however long the range is and a crash only loses the batch
+    in flight. `on_flush` is called with each batch once it is committed.
+    """
+    batch_size = max(1, min(batch_size, FIRESTORE_BATCH_LIMIT))
+    dates = iter(dates)
+    dates_lock = threading.Lock()
+    stop = threading.Event()
+    results: "queue.Queue" = queue.Queue(maxsize=workers * 2)
+    done_marker = object()
+
+    def fetch_worker():
+        try:
+            while not stop.is_set():
+                with dates_lock:
+                    date_str = next(dates, None)
+                if date_str is None:
+                    break
+                try:
+                    snapshot = garmin.fetch_day(date_str)
+                    logger.info(f"Fetched {date_str}")
+                except Exception as e:
+                    logger.warning(f"Failed {date_str}: {e}")
+                    snapshot = None
+                results.put(snapshot)
+        finally:
+            results.put(done_marker)
+
+    result = RangeSyncResult()
+    started = time.monotonic()
+    threads = [
+        threading.Thread(target=fetch_worker, name=f"garmin-day-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+
+    pending: List[HealthSnapshot] = []
+    running = workers
+
+    def flush():
+        writer.write_batch(uid, pending)
+        if on_flush:
+            on_flush(pending)
+        result.synced += len(pending)
+        pending.clear()
+        result.elapsed = time.monotonic() - started
+        logger.info(
+            f"Progress: {result.synced} days written, {result.failed} failed "
+            f"({result.days_per_sec:.2f} days/sec)"
+        )
+
+    try:
+        while running:
+            item = results.get()
+            if item is done_marker:
+                running -= 1
+            elif item is None:
+                result.failed += 1
+            else:
+                pending.append(item)
+                if len(pending) >= batch_size:
+                    flush()
+        if pending:
+            flush()
+    except BaseException:
+        # Unblock workers stuck on a full queue so they can exit.
+        stop.set()
+        while running:
+            if results.get() is done_marker:
+                running -= 1
+        raise
 
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+# ─── Incremental Sync ─────────────────────────────────────────────────────
+
+DEFAULT_CHECKPOINT_PATH = Path(__file__).parent / ".garmin_sync_checkpoint.json"
+
+
+def _to_local_naive(ts) -> Optional[datetime]:
+    """Normalize a Firestore timestamp or ISO string to a naive local datetime."""
+    if ts is None:
+        return None
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone().replace(tzinfo=None)
+    return ts
+
+
+def is_final(date_str: str, synced_at, settle_hours: float = DEFAULT_SETTLE_HOURS) -> bool:
+    """A day is final once it was synced more than settle_hours after it ended."""
+    synced_at = _to_local_naive(synced_at)
+    if synced_at is None:
+        return False
+    day_end = datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=1)
+    return synced_at >= day_end + timedelta(hours=settle_hours)
+
+
+class SyncCheckpoint:
+    """Local record of days already synced as final, so an interrupted
+    backfill resumes where it stopped without re-reading Firestore.
+
+    Every written day is recorded, empty or not; is_final() keeps it due
+    until the sync landed past the settle window. A settled sync with
+    unavailable metrics is only counted, and the day is given up on (marked
+    final as it stands) after max_unavailable_runs of them.
+    """
+
+    def __init__(self, path: Path, uid: str, max_unavailable_runs: int = DEFAULT_UNAVAILABLE_RUNS,
+                 settle_hours: float = DEFAULT_SETTLE_HOURS):
+        self.path = Path(path)
+        self.uid = uid
+        self.max_unavailable_runs = max_unavailable_runs
+        self.settle_hours = settle_hours
+        self.synced = {}            # date -> ISO local sync time
+        self.unavailable_runs = {}  # date -> settled syncs that still lacked a metric
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+                if data.get("uid") == uid:
+                    self.synced = data.get("synced", {})
+                    self.unavailable_runs = data.get("unavailableRuns", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+
+    def synced_at(self, date_str: str) -> Optional[str]:
+        return self.synced.get(date_str)
+
+    def mark(self, date_str: str, synced_at: datetime) -> None:
+        self.synced[date_str] = _to_local_naive(synced_at).isoformat(timespec="seconds")
+
+    def record(self, snapshots: List[HealthSnapshot]) -> None:
+        """Mark freshly written snapshots as synced now and persist."""
+        now = datetime.now()
         for snapshot in snapshots:
-            ref = (
-                self.db.collection("users")
-                .document(uid)
-                .collection("garmin_metrics")
-                .document(snapshot.date)
-            )
-            data = snapshot.to_dict()
-            data["syncedAt"] = firestore.SERVER_TIMESTAMP
-            batch.set(ref, data, merge=True)
+            date_str, unavailable = snapshot.date, snapshot.unavailable
+            if not unavailable:
+                self.unavailable_runs.pop(date_str, None)
+                self.mark(date_str, now)
+            elif is_final(date_str, now, self.settle_hours):
+                runs = self.unavailable_runs.get(date_str, 0) + 1
+                self.unavailable_runs[date_str] = runs
+                if runs >= self.max_unavailable_runs:
+                    logger.warning(f"{date_str}: {', '.join(unavailable)} still unavailable after "
+                                   f"{runs} settled syncs; no longer retrying")
+                    self.mark(date_str, now)
+        self.save()
+
+    def save(self) -> None:
+        # Write-then-rename so a crash mid-save never corrupts the checkpoint.
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"uid": self.uid, "synced": self.synced,
+                                   "unavailableRuns": self.unavailable_runs}, sort_keys=True))
+        os.replace(tmp, self.path)
 
-        batch.commit()
-        logger.info(f"Batch wrote {len(snapshots)} days to Firestore")
+
+def plan_incremental(
+    writer: FirestoreWriter,
+    uid: str,
+    dates: Iterable[str],
+    checkpoint: SyncCheckpoint,
+    settle_hours: float = DEFAULT_SETTLE_HOURS,
+) -> List[str]:
+    """Return only the dates that still need fetching: missing, settling, or
+    flagged with unavailable metrics.
+
+    The checkpoint answers first; only dates it can't vouch for are read from
+    Firestore, in bulk. Days Firestore shows as final, including ones synced
+    with no metrics at all, are folded back into the checkpoint so the next
+    run doesn't read them again.
+    """
+    unknown = [d for d in dates if not is_final(d, checkpoint.synced_at(d), settle_hours)]
+    existing = writer.read_existing(uid, unknown) if unknown else {}
+
+    todo = []
+    for date_str in unknown:
+        data = existing.get(date_str)
+        if data and not data.get("unavailableMetrics") and is_final(date_str, data.get("syncedAt"), settle_hours):
+            checkpoint.mark(date_str, _to_local_naive(data["syncedAt"]))
+        else:
+            todo.append(date_str)
+
+    checkpoint.save()
+    return todo
 
 
 # ─── CLI ──────────────────────────────────────────────────────────────────
@@ -259,6 +984,36 @@ def main():
     parser.add_argument("--date", help="Specific date to sync (YYYY-MM-DD). Defaults to today.")
     parser.add_argument("--range", type=int, default=1, help="Number of days to sync (counting back from --date). Default: 1")
     parser.add_argument("--uid", help="Firebase user ID. Falls back to FIREBASE_UID env var.")
+    parser.add_argument("--concurrency", type=int, default=len(METRIC_ENDPOINTS),
+                        help=f"Max concurrent metric calls per day (1 = serial). Default: {len(METRIC_ENDPOINTS)}")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="Per-call timeout in seconds for concurrent fetches. Default: 30")
+    parser.add_argument("--rate", type=float, default=4.0,
+                        help="Starting Garmin call rate (calls/sec); adapts up or down with throttling. Default: 4")
+    parser.add_argument("--max-rate", type=float, default=10.0,
+                        help="Ceiling for the adaptive call rate (calls/sec). Default: 10")
+    parser.add_argument("--retries", type=int, default=4,
+                        help="Retries per call on throttling or transient errors. Default: 4")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE_PATH),
+                        help="Raw Garmin response cache (SQLite). Default: scripts/.garmin_cache.sqlite")
+    parser.add_argument("--no-cache", action="store_true", help="Always call Garmin; don't read or write the cache.")
+    parser.add_argument("--cache-max-mb", type=int, default=512,
+                        help="Evict least recently used cached responses beyond this size. Default: 512")
+    parser.add_argument("--offline", action="store_true",
+                        help="Re-derive snapshots from cached responses only; never contacts Garmin.")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Days fetched in parallel when --range > 1. Default: 4")
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help=f"Days per Firestore batch commit (max {FIRESTORE_BATCH_LIMIT}). Default: 100")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch days that are missing or still settling; resume from the local checkpoint.")
+    parser.add_argument("--settle-hours", type=float, default=DEFAULT_SETTLE_HOURS,
+                        help=f"Hours after a day ends before its sync counts as final. Default: {DEFAULT_SETTLE_HOURS}")
+    parser.add_argument("--unavailable-runs", type=int, default=DEFAULT_UNAVAILABLE_RUNS,
+                        help="Settled syncs with unavailable metrics before --incremental stops retrying a day. "
+                             f"Default: {DEFAULT_UNAVAILABLE_RUNS}")
+    parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT_PATH),
+                        help="Checkpoint file for --incremental. Default: scripts/.garmin_sync_checkpoint.json")
     args = parser.parse_args()
 
     logging.basicConfig(
@@ -279,42 +1034,72 @@ def main():
         datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=args.range - 1)
     ).strftime("%Y-%m-%d")
 
-    # Authenticate Garmin
-    garmin = GarminClient()
-    garmin.authenticate()
-
     # Connect to Firestore
     writer = FirestoreWriter()
 
+    # Work out which days need fetching
+    dates = date_range(start_date, end_date)
+    checkpoint = None
+    if args.incremental:
+        checkpoint = SyncCheckpoint(args.checkpoint, uid, args.unavailable_runs, args.settle_hours)
+        dates = plan_incremental(writer, uid, dates, checkpoint, args.settle_hours)
+        logger.info(f"Incremental: {len(dates)} of {args.range} days need syncing")
+        if not dates:
+            print(f"\nAlready up to date ({start_date} → {end_date})")
+            return
+
+    # Authenticate Garmin
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(args.cache, max_bytes=args.cache_max_mb * 1024 * 1024, settle_hours=args.settle_hours)
+    elif args.offline:
+        logger.error("--offline reads from the response cache; drop --no-cache")
+        sys.exit(1)
+
+    limiter = AdaptiveRateLimiter(rate=args.rate, max_rate=max(args.rate, args.max_rate))
+    garmin = GarminClient(
+        concurrency=args.concurrency, call_timeout=args.timeout,
+        limiter=limiter, max_retries=args.retries,
+        cache=cache, offline=args.offline,
+    )
+    if not args.offline:
+        garmin.authenticate()
+
     # Fetch and write
     if args.range == 1:
-        snapshot = garmin.fetch_day(end_date)
+        try:
+            snapshot = garmin.fetch_day(end_date)
+        except MetricUnavailable as e:
+            logger.error(f"Garmin unavailable, nothing written: {e} ({garmin.stats})")
+            sys.exit(1)
         writer.write_snapshot(uid, snapshot)
+        if checkpoint:
+            checkpoint.record([snapshot])
         print(f"\n--- {end_date} ---")
         for key, value in snapshot.to_dict().items():
             if key not in ("date", "source"):
                 print(f"  {key}: {value}")
+        if snapshot.unavailable:
+            print(f"  unavailable (retry later): {', '.join(snapshot.unavailable)}")
     else:
-        current = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-        snapshots = []
-
-        while current <= end:
-            date_str = current.strftime("%Y-%m-%d")
-            try:
-                snapshot = garmin.fetch_day(date_str)
-                snapshots.append(snapshot)
-                logger.info(f"Fetched {date_str}")
-            except Exception as e:
-                logger.warning(f"Failed {date_str}: {e}")
-            current += timedelta(days=1)
-
-        if snapshots:
-            writer.write_batch(uid, snapshots)
-            print(f"\nSynced {len(snapshots)} days ({start_date} → {end_date})")
+        result = sync_range(
+            garmin, writer, uid, dates,
+            workers=args.workers, batch_size=args.batch_size,
+            on_flush=checkpoint.record if checkpoint else None,
+        )
+        if result.synced:
+            print(f"\nSynced {result.synced} days ({start_date} → {end_date}) "
+                  f"in {result.elapsed:.1f}s — {result.days_per_sec:.2f} days/sec")
+            if result.failed:
+                print(f"  Failed: {result.failed} days (see warnings above)")
         else:
             print("No data fetched.")
 
+    logger.info(f"Garmin: {garmin.stats} (settled at {garmin.limiter.rate:.2f} calls/sec)")
+    if cache:
+        logger.info(f"Response cache: {cache.hits} hits, {cache.misses} misses")
+        cache.close()
+
 
 if __name__ == "__main__":
     main()
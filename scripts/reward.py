@@ -0,0 +1,246 @@
+"""
+Reward Function (Python port of lib/reward.ts)
+===============================================
+Scalar g* computation for a single daily log. Shared by the backfill and
+the offline reward tools so they all score days the same way.
+"""
+
+import math
+from collections import Counter, deque
+from datetime import datetime
+
+REWARD_FLOOR = 0.05
+
+# Weighted geometric mean exponents for GE: sleep, training, body, nervous system
+GE_EXPONENTS = (0.35, 0.2, 0.2, 0.25)
+
+# g* = gate * geo_mean - fragmentation * FRAGMENTATION_WEIGHT + theta * THETA_WEIGHT
+FRAGMENTATION_WEIGHT = 0.3
+THETA_WEIGHT = 0.15
+
+NERVOUS_SYSTEM_GATE = {
+    "regulated": 1.0,
+    "slightly_spiked": 0.7,
+    "spiked": 0.3,
+}
+
+TRAINING_SCORE = {
+    "strength": 1.0,
+    "yoga": 0.8,
+    "vo2": 1.0,
+    "zone2": 0.9,
+    "rest": 0.5,
+    "none": 0.2,
+}
+
+BODY_FELT_SCORE = {
+    "open": 1.0,
+    "neutral": 0.6,
+    "tense": 0.2,
+}
+
+NS_STATE_ENERGY_SCORE = {
+    "regulated": 1.0,
+    "slightly_spiked": 0.5,
+    "spiked": 0.1,
+}
+
+# Default project allocation (matches SEED_PROJECTS in constants.ts)
+THESIS_ALLOCATION = {
+    "armstrong": 0.6,
+    "manifold": 0.15,
+    "deep_tech": 0.05,
+    "jobs": 0.01,
+    "learning": 0.19,
+}
+
+
+def clamp(val, lo, hi):
+    return max(lo, min(hi, val))
+
+
+def floor_val(val):
+    return max(val, REWARD_FLOOR)
+
+
+def compute_ge(log):
+    sleep_target = 7.5
+    sleep_score = floor_val(clamp((log.get("sleepHours", 0) or 0) / sleep_target, 0, 1) if sleep_target > 0 else 0)
+
+    types = log.get("trainingTypes", []) or []
+    if not types:
+        t = log.get("trainingType")
+        types = [t] if t and t != "none" else []
+    training = floor_val(max((TRAINING_SCORE.get(t, 0.2) for t in types), default=0.2))
+
+    body = floor_val(BODY_FELT_SCORE.get(log.get("bodyFelt", "neutral"), 0.6))
+    ns = floor_val(NS_STATE_ENERGY_SCORE.get(log.get("nervousSystemState", "regulated"), 1.0))
+
+    sleep_exp, training_exp, body_exp, ns_exp = GE_EXPONENTS
+    return floor_val(
+        math.pow(sleep_score, sleep_exp) *
+        math.pow(training, training_exp) *
+        math.pow(body, body_exp) *
+        math.pow(ns, ns_exp)
+    )
+
+
+def compute_gi(log):
+    problems = log.get("problems", []) or []
+    filled = sum(1 for p in problems if p.get("problem", "").strip())
+    problem_score = 0.1 if filled == 0 else 0.5 if filled == 1 else 0.8 if filled == 2 else 1.0
+    selected_bonus = 0.2 if (log.get("problemSelected", "") or "").strip() else 0
+    return floor_val(clamp(problem_score + selected_bonus, 0, 1))
+
+
+def compute_gvc(log):
+    shipped_base = 0.4 if (log.get("whatShipped", "") or "").strip() else 0.05
+    public_bonus = 0.2 if log.get("publicIteration") else 0
+    focus_target = 6
+    focus_ratio = clamp((log.get("focusHoursActual", 0) or 0) / focus_target, 0, 1) if focus_target > 0 else 0
+    speed_bonus = 0.1 if log.get("speedOverPerfection") else 0
+
+    days_out = log.get("daysSinceLastOutput", 0) or 0
+    recency = 1.0 if days_out == 0 else 0.7 if days_out == 1 else 0.4 if days_out == 2 else 0.1
+
+    raw = (shipped_base + public_bonus) * 0.35 + focus_ratio * 0.35 + recency * 0.2 + speed_bonus
+    return floor_val(clamp(raw, 0, 1))
+
+
+def compute_kappa(log):
+    ask_quota = 2
+    ask_ratio = clamp((log.get("revenueAsksCount", 0) or 0) / ask_quota, 0, 1) if ask_quota > 0 else 0
+    revenue_signal = 1.0 if (log.get("revenueThisSession", 0) or 0) > 0 else 0.2
+    feedback_bonus = 0.15 if log.get("feedbackLoopClosed") else 0
+
+    stream = log.get("revenueStreamType", "one_time")
+    multiplier = 1.15 if stream == "recurring" else 0.9 if stream == "organic" else 1.0
+
+    raw = (ask_ratio * 0.5 + revenue_signal * 0.35 + feedback_bonus) * multiplier
+    return floor_val(clamp(raw, 0, 1))
+
+
+def compute_optionality():
+    """Uses SEED_PROJECTS allocation — static for backfill."""
+    shares = [0.6, 0.15, 0.05, 0.01]  # Armstrong, Manifold, Deep Tech, Jobs
+    total = sum(shares)
+    hhi = sum((s / total) ** 2 for s in shares)
+    backup_bonus = 0.1  # Jobs + Deep Tech are backup/optionality
+    return floor_val(clamp(1 - hhi + backup_bonus, 0, 1))
+
+
+def compute_fragmentation(log):
+    """Simplified: if spine is Armstrong, fragmentation is low."""
+    focus = log.get("focusHoursActual", 0) or 0
+    if focus == 0:
+        return 0
+    spine = (log.get("spineProject", "") or "").lower()
+    # If focusing on the spine project, low fragmentation
+    if spine in ("armstrong", ""):
+        return 0.05  # small divergence (not perfect allocation)
+    return 0.3  # higher divergence if not on spine
+
+
+def _theta_from_count(count):
+    return 0.0 if count == 0 else 0.33 if count == 1 else 0.67 if count == 2 else 1.0
+
+
+def compute_theta(log, recent_logs=None):
+    """7-day rolling pillar engagement."""
+    all_logs = list(recent_logs or []) + [log]
+    touched = set()
+    for l in all_logs:
+        for p in (l.get("pillarsTouched", []) or []):
+            touched.add(p)
+    return _theta_from_count(len(touched))
+
+
+class RewardWindow:
+    """The last `size` logs behind theta and delta, updated in O(1) per day.
+
+    Keeps each log's pillars and score in a deque plus a reference count per
+    pillar, so theta never re-unions the window. Serializes with to_dict() so
+    a later run can resume without re-reading the prior days.
+    """
+
+    def __init__(self, size=7):
+        self.size = size
+        self.entries = deque()   # (pillars, score) per log, oldest first
+        self.counts = Counter()  # pillar -> logs in the window touching it
+        self.last_date = None
+
+    def theta(self, log):
+        """compute_theta(log, <the logs in this window>), without the rebuild."""
+        current = set(log.get("pillarsTouched", []) or [])
+        return _theta_from_count(len(self.counts) + len(current.difference(self.counts)))
+
+    def delta(self, score):
+        """Change from the previous log's score, or None if it has none."""
+        if not self.entries or self.entries[-1][1] is None:
+            return None
+        return round(score - self.entries[-1][1], 1)
+
+    def push(self, log):
+        """Slide the window forward by one log (which may carry a rewardScore)."""
+        pillars = sorted(set(log.get("pillarsTouched", []) or []))
+        reward = log.get("rewardScore", {})
+        score = reward.get("score") if reward else None
+
+        if len(self.entries) == self.size:
+            old_pillars, _ = self.entries.popleft()
+            for p in old_pillars:
+                self.counts[p] -= 1
+                if not self.counts[p]:
+                    del self.counts[p]
+
+        self.entries.append((pillars, score))
+        self.counts.update(pillars)
+        self.last_date = log.get("date")
+
+    def to_dict(self):
+        return {
+            "size": self.size,
+            "lastDate": self.last_date,
+            "entries": [{"pillars": pillars, "score": score} for pillars, score in self.entries],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        window = cls(data.get("size", 7))
+        for entry in data.get("entries", []):
+            window.push({"pillarsTouched": entry["pillars"], "rewardScore": {"score": entry["score"]}})
+        window.last_date = data.get("lastDate")
+        return window
+
+
+def compute_reward(log, recent_logs=None, window=None):
+    ge = compute_ge(log)
+    gi = compute_gi(log)
+    gvc = compute_gvc(log)
+    kappa = compute_kappa(log)
+    optionality = compute_optionality()
+    fragmentation = compute_fragmentation(log)
+    theta = window.theta(log) if window is not None else compute_theta(log, recent_logs)
+
+    ns_state = log.get("nervousSystemState", "regulated")
+    gate = NERVOUS_SYSTEM_GATE.get(ns_state, 1.0)
+
+    geo_mean = math.pow(ge * gi * gvc * kappa * optionality, 1 / 5)
+    raw_score = gate * geo_mean - fragmentation * FRAGMENTATION_WEIGHT + theta * THETA_WEIGHT
+    score = clamp(round(raw_score * 10 * 10) / 10, 0, 10)
+
+    return {
+        "score": score,
+        "delta": None,
+        "components": {
+            "ge": round(ge, 4),
+            "gi": round(gi, 4),
+            "gvc": round(gvc, 4),
+            "kappa": round(kappa, 4),
+            "optionality": round(optionality, 4),
+            "fragmentation": round(fragmentation, 4),
+            "theta": round(theta, 4),
+            "gate": gate,
+        },
+        "computedAt": datetime.utcnow().isoformat() + "Z",
+    }
@@ -0,0 +1,398 @@
+"""
+Batch Reward Engine (vectorized port of reward.py)
+==================================================
+Scores a whole sequence of daily logs at once. Logs are encoded into columns
+a single time (LogColumns), after which every component and the final g*
+are computed with NumPy array ops — cheap enough to re-score years of days
+under hundreds of parameter variants.
+
+Output is bit-for-bit identical to the scalar compute_reward, for the default
+parameters and for any variant of the constants reward.py exposes
+(scripts/tests/test_reward_parity.py guards this). Check it against real logs (a JSONL of logs, the records
+written by `backfill_daily_logs.py --dry-run`, or a snapshot_store table):
+
+    python scripts/reward_batch.py backfill_dry_run.jsonl --check-parity
+    python scripts/reward_batch.py backfill_dry_run.jsonl --bench 200
+"""
+
+import sys
+import json
+import math
+import time
+import argparse
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+import reward
+from reward import clamp, compute_optionality, compute_reward
+
+# compute_theta looks at the current log plus the 7 logs before it
+THETA_WINDOW = 7
+
+
+# ─── Parameters ──────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class RewardParams:
+    """Tunable reward constants. Defaults mirror reward.py exactly."""
+    training_score: dict = field(default_factory=lambda: dict(reward.TRAINING_SCORE))
+    training_default: float = 0.2
+    body_felt_score: dict = field(default_factory=lambda: dict(reward.BODY_FELT_SCORE))
+    body_felt_default: float = 0.6
+    ns_energy_score: dict = field(default_factory=lambda: dict(reward.NS_STATE_ENERGY_SCORE))
+    ns_energy_default: float = 1.0
+    ns_gate: dict = field(default_factory=lambda: dict(reward.NERVOUS_SYSTEM_GATE))
+    ns_gate_default: float = 1.0
+    ge_exponents: tuple = reward.GE_EXPONENTS
+    fragmentation_weight: float = reward.FRAGMENTATION_WEIGHT
+    theta_weight: float = reward.THETA_WEIGHT
+
+
+DEFAULT_PARAMS = RewardParams()
+
+
+# ─── Columnar Encoding ───────────────────────────────────────────────────
+
+def _training_types(log: dict) -> list:
+    types = log.get("trainingTypes", []) or []
+    if not types:
+        t = log.get("trainingType")
+        types = [t] if t and t != "none" else []
+    return types
+
+
+def _encode(values: list):
+    """Categorical values → (vocabulary, int index array)."""
+    vocab = list(dict.fromkeys(values))
+    lookup = {v: i for i, v in enumerate(vocab)}
+    return vocab, np.array([lookup[v] for v in values], dtype=np.int32)
+
+
+def _multi_hot(rows: List[list]):
+    """Lists of labels → (vocabulary, bool matrix [n_rows, n_labels])."""
+    vocab = list(dict.fromkeys(label for row in rows for label in row))
+    lookup = {v: i for i, v in enumerate(vocab)}
+    hot = np.zeros((len(rows), len(vocab)), dtype=bool)
+    for i, row in enumerate(rows):
+        for label in row:
+            hot[i, lookup[label]] = True
+    return vocab, hot
+
+
+class LogColumns:
+    """A sequence of daily logs encoded as arrays, in order.
+
+    Extraction mirrors the scalar .get(...) / `or` defaults in reward.py so
+    both engines read the same values. Categorical fields stay as codes so
+    parameter variants can re-map them without re-encoding.
+    """
+
+    def __init__(self, logs: Sequence[dict]):
+        self.n = len(logs)
+        self.dates = [log.get("date") for log in logs]
+
+        # GE
+        self.sleep_hours = np.array([log.get("sleepHours", 0) or 0 for log in logs], dtype=np.float64)
+        self.training_vocab, self.training_hot = _multi_hot([_training_types(log) for log in logs])
+        self.body_vocab, self.body_idx = _encode([log.get("bodyFelt", "neutral") for log in logs])
+        self.ns_vocab, self.ns_idx = _encode([log.get("nervousSystemState", "regulated") for log in logs])
+
+        # GI
+        self.problems_filled = np.array([
+            sum(1 for p in (log.get("problems", []) or []) if p.get("problem", "").strip())
+            for log in logs
+        ], dtype=np.int32)
+        self.problem_selected = np.array(
+            [bool((log.get("problemSelected", "") or "").strip()) for log in logs], dtype=bool)
+
+        # GVC
+        self.shipped = np.array([bool((log.get("whatShipped", "") or "").strip()) for log in logs], dtype=bool)
+        self.public_iteration = np.array([bool(log.get("publicIteration")) for log in logs], dtype=bool)
+        self.focus_hours = np.array([log.get("focusHoursActual", 0) or 0 for log in logs], dtype=np.float64)
+        self.speed = np.array([bool(log.get("speedOverPerfection")) for log in logs], dtype=bool)
+        self.days_out = np.array([log.get("daysSinceLastOutput", 0) or 0 for log in logs], dtype=np.float64)
+
+        # Kappa
+        self.asks = np.array([log.get("revenueAsksCount", 0) or 0 for log in logs], dtype=np.float64)
+        self.has_revenue = np.array([(log.get("revenueThisSession", 0) or 0) > 0 for log in logs], dtype=bool)
+        self.feedback = np.array([bool(log.get("feedbackLoopClosed")) for log in logs], dtype=bool)
+        streams = [log.get("revenueStreamType", "one_time") for log in logs]
+        self.recurring = np.array([s == "recurring" for s in streams], dtype=bool)
+        self.organic = np.array([s == "organic" for s in streams], dtype=bool)
+
+        # Fragmentation
+        self.on_spine = np.array(
+            [(log.get("spineProject", "") or "").lower() in ("armstrong", "") for log in logs], dtype=bool)
+
+        # Theta
+        self.pillar_vocab, self.pillars_hot = _multi_hot([log.get("pillarsTouched", []) or [] for log in logs])
+
+        self._static = None  # filled lazily by _static_components
+
+    @classmethod
+    def from_logs(cls, logs: Sequence[dict]) -> "LogColumns":
+        return cls(logs)
+
+
+# ─── Vectorized Components ───────────────────────────────────────────────
+
+def _pow(base: np.ndarray, exponent: float) -> np.ndarray:
+    """Elementwise math.pow, evaluated once per distinct base value.
+
+    np.power may dispatch to SIMD kernels that differ from libm pow in the
+    last ulp; going through math.pow keeps results identical to reward.py,
+    and daily inputs have few distinct values so the cost stays negligible.
+    """
+    uniq, inverse = np.unique(base, return_inverse=True)
+    return np.array([math.pow(b, exponent) for b in uniq.tolist()], dtype=np.float64)[inverse]
+
+
+def _floor(values: np.ndarray) -> np.ndarray:
+    return np.maximum(values, reward.REWARD_FLOOR)
+
+
+def _tier(count: np.ndarray, tiers: Sequence[float]) -> np.ndarray:
+    """count 0, 1, 2, ... → tiers[count], saturating at the last tier."""
+    return np.asarray(tiers, dtype=np.float64)[np.minimum(count, len(tiers) - 1).astype(np.intp)]
+
+
+def _lookup(vocab: list, idx: np.ndarray, scores: dict, default: float) -> np.ndarray:
+    table = np.array([scores.get(v, default) for v in vocab] or [default], dtype=np.float64)
+    return table[idx]
+
+
+def _rolling_distinct(hot: np.ndarray, window: int) -> np.ndarray:
+    """Distinct labels over each row plus the `window` rows before it."""
+    n = hot.shape[0]
+    csum = np.vstack([np.zeros((1, hot.shape[1]), dtype=np.int64), np.cumsum(hot, axis=0, dtype=np.int64)])
+    hi = np.arange(1, n + 1)
+    lo = np.maximum(0, hi - 1 - window)
+    return ((csum[hi] - csum[lo]) > 0).sum(axis=1)
+
+
+@dataclass
+class BatchReward:
+    """Per-day reward arrays for a LogColumns sequence."""
+    ge: np.ndarray
+    gi: np.ndarray
+    gvc: np.ndarray
+    kappa: np.ndarray
+    optionality: np.ndarray
+    fragmentation: np.ndarray
+    theta: np.ndarray
+    gate: np.ndarray
+    rounded: np.ndarray  # g* rounded to 0.1, before clamping to [0, 10]
+
+    @property
+    def score(self) -> np.ndarray:
+        return np.clip(self.rounded, 0, 10)
+
+    def to_dicts(self) -> List[dict]:
+        """Materialize rewardScore dicts shaped exactly like compute_reward's."""
+        computed_at = datetime.utcnow().isoformat() + "Z"
+        cols = {name: getattr(self, name).tolist() for name in (
+            "ge", "gi", "gvc", "kappa", "optionality", "fragmentation", "theta", "gate", "rounded")}
+        return [
+            {
+                "score": clamp(cols["rounded"][i], 0, 10),
+                "delta": None,
+                "components": {
+                    "ge": round(cols["ge"][i], 4),
+                    "gi": _saturated(cols["gi"][i]),
+                    "gvc": _saturated(cols["gvc"][i]),
+                    "kappa": _saturated(cols["kappa"][i]),
+                    "optionality": round(cols["optionality"][i], 4),
+                    # compute_fragmentation returns int 0 on days without focus hours
+                    "fragmentation": round(cols["fragmentation"][i], 4) if cols["fragmentation"][i] else 0,
+                    "theta": round(cols["theta"][i], 4),
+                    "gate": cols["gate"][i],
+                },
+                "computedAt": computed_at,
+            }
+            for i in range(len(cols["rounded"]))
+        ]
+
+
+def _saturated(value: float):
+    """round(..., 4) as compute_reward sees it: clamp(x, 0, 1) returns the
+    int 1 whenever x >= 1, so a saturated component serializes as 1."""
+    return 1 if value == 1.0 else round(value, 4)
+
+
+def _static_components(cols: LogColumns) -> dict:
+    """Components no RewardParams field touches, computed once per LogColumns."""
+    if cols._static is None:
+        # GI
+        problem_score = _tier(cols.problems_filled, (0.1, 0.5, 0.8, 1.0))
+        gi = _floor(np.clip(problem_score + np.where(cols.problem_selected, 0.2, 0), 0, 1))
+
+        # GVC
+        shipped_base = np.where(cols.shipped, 0.4, 0.05)
+        public_bonus = np.where(cols.public_iteration, 0.2, 0)
+        focus_ratio = np.clip(cols.focus_hours / 6, 0, 1)
+        speed_bonus = np.where(cols.speed, 0.1, 0)
+        recency = np.select(
+            [cols.days_out == 0, cols.days_out == 1, cols.days_out == 2], [1.0, 0.7, 0.4], default=0.1)
+        gvc = _floor(np.clip(
+            (shipped_base + public_bonus) * 0.35 + focus_ratio * 0.35 + recency * 0.2 + speed_bonus, 0, 1))
+
+        # Kappa
+        ask_ratio = np.clip(cols.asks / 2, 0, 1)
+        revenue_signal = np.where(cols.has_revenue, 1.0, 0.2)
+        feedback_bonus = np.where(cols.feedback, 0.15, 0)
+        multiplier = np.select([cols.recurring, cols.organic], [1.15, 0.9], default=1.0)
+        kappa = _floor(np.clip((ask_ratio * 0.5 + revenue_signal * 0.35 + feedback_bonus) * multiplier, 0, 1))
+
+        optionality = np.full(cols.n, compute_optionality(), dtype=np.float64)
+        fragmentation = np.where(cols.focus_hours == 0, 0.0, np.where(cols.on_spine, 0.05, 0.3))
+        theta = _tier(_rolling_distinct(cols.pillars_hot, THETA_WINDOW), (0.0, 0.33, 0.67, 1.0))
+        cols._static = {
+            "sleep": _floor(np.clip(cols.sleep_hours / 7.5, 0, 1)),
+            "gi": gi, "gvc": gvc, "kappa": kappa,
+            "optionality": optionality, "fragmentation": fragmentation, "theta": theta,
+        }
+    return cols._static
+
+
+def score_batch(cols: LogColumns, params: RewardParams = DEFAULT_PARAMS) -> BatchReward:
+    """Vectorized compute_reward over every log in `cols`."""
+    static = _static_components(cols)
+    gi, gvc, kappa = static["gi"], static["gvc"], static["kappa"]
+    optionality, fragmentation, theta = static["optionality"], static["fragmentation"], static["theta"]
+
+    # GE — same operation order as compute_ge so floats match exactly
+    sleep = static["sleep"]
+    type_scores = np.array(
+        [params.training_score.get(t, params.training_default) for t in cols.training_vocab], dtype=np.float64)
+    best = np.where(cols.training_hot, type_scores, -np.inf).max(axis=1, initial=-np.inf)
+    training = _floor(np.where(np.isfinite(best), best, params.training_default))
+    body = _floor(_lookup(cols.body_vocab, cols.body_idx, params.body_felt_score, params.body_felt_default))
+    ns = _floor(_lookup(cols.ns_vocab, cols.ns_idx, params.ns_energy_score, params.ns_energy_default))
+    sleep_exp, training_exp, body_exp, ns_exp = params.ge_exponents
+    ge = _floor(_pow(sleep, sleep_exp) * _pow(training, training_exp) * _pow(body, body_exp) * _pow(ns, ns_exp))
+
+    gate = _lookup(cols.ns_vocab, cols.ns_idx, params.ns_gate, params.ns_gate_default)
+
+    geo_mean = _pow(ge * gi * gvc * kappa * optionality, 1 / 5)
+    raw_score = gate * geo_mean - fragmentation * params.fragmentation_weight + theta * params.theta_weight
+    rounded = np.rint(raw_score * 10 * 10) / 10
+
+    return BatchReward(ge, gi, gvc, kappa, optionality, fragmentation, theta, gate, rounded)
+
+
+def score_many(cols: LogColumns, param_sets: Sequence[RewardParams]) -> np.ndarray:
+    """g* for every (parameter set, day) pair → array [len(param_sets), cols.n]."""
+    out = np.empty((len(param_sets), cols.n), dtype=np.float64)
+    for i, params in enumerate(param_sets):
+        out[i] = score_batch(cols, params).score
+    return out
+
+
+# ─── Parity Check ────────────────────────────────────────────────────────
+
+# RewardParams field → the reward.py constant compute_reward reads it from
+_SCALAR_CONSTANTS = {
+    "training_score": "TRAINING_SCORE",
+    "body_felt_score": "BODY_FELT_SCORE",
+    "ns_energy_score": "NS_STATE_ENERGY_SCORE",
+    "ns_gate": "NERVOUS_SYSTEM_GATE",
+    "ge_exponents": "GE_EXPONENTS",
+    "fragmentation_weight": "FRAGMENTATION_WEIGHT",
+    "theta_weight": "THETA_WEIGHT",
+}
+
+
+@contextmanager
+def _scalar_params(params: RewardParams):
+    """Point reward.py's module constants at `params` for the duration.
+
+    The *_default fields are literals inside reward.py, so a variant that
+    changes them has no scalar counterpart to compare against.
+    """
+    for name in ("training_default", "body_felt_default", "ns_energy_default", "ns_gate_default"):
+        if getattr(params, name) != getattr(DEFAULT_PARAMS, name):
+            raise ValueError(f"compute_reward hard-codes {name}; it can't be varied in a parity check")
+    saved = {const: getattr(reward, const) for const in _SCALAR_CONSTANTS.values()}
+    try:
+        for name, const in _SCALAR_CONSTANTS.items():
+            setattr(reward, const, getattr(params, name))
+        yield
+    finally:
+        for const, value in saved.items():
+            setattr(reward, const, value)
+
+
+def check_parity(logs: Sequence[dict], params: RewardParams = DEFAULT_PARAMS) -> List[str]:
+    """Compare score_batch against compute_reward day by day, under `params`.
+
+    Returns the dates whose reward differs in any field (computedAt aside);
+    an empty list means the engines agree bit for bit.
+    """
+    batch = score_batch(LogColumns.from_logs(logs), params).to_dicts()
+    mismatches = []
+    with _scalar_params(params):
+        scalars = [compute_reward(log, logs[max(0, i - THETA_WINDOW):i]) for i, log in enumerate(logs)]
+    for i, (log, scalar) in enumerate(zip(logs, scalars)):
+        scalar.pop("computedAt")
+        batch[i].pop("computedAt")
+        if scalar != batch[i] or repr(scalar) != repr(batch[i]):
+            mismatches.append(log.get("date") or str(i))
+    return mismatches
+
+
+def load_logs(path: str) -> List[dict]:
+    """Read daily logs from a snapshot_store table directory, or from JSONL —
+    bare logs or --dry-run {"path", "data"} records."""
+    if Path(path).is_dir():
+        from snapshot_store import Table
+        return Table(path).docs()
+
+    logs = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                logs.append(record.get("data", record) if "path" in record else record)
+    logs.sort(key=lambda log: log.get("date") or "")
+    return logs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized reward scoring for daily logs")
+    parser.add_argument("logs", help="JSONL file of daily logs, backfill --dry-run output, "
+                                     "or a snapshot_store daily_logs directory")
+    parser.add_argument("--check-parity", action="store_true", help="Verify results match scalar compute_reward")
+    parser.add_argument("--bench", type=int, default=0, metavar="N",
+                        help="Time re-scoring all logs under N parameter variants")
+    args = parser.parse_args()
+
+    logs = load_logs(args.logs)
+    print(f"Loaded {len(logs)} logs from {args.logs}")
+
+    if args.check_parity:
+        mismatches = check_parity(logs)
+        if mismatches:
+            print(f"PARITY FAILED on {len(mismatches)} days: {', '.join(mismatches[:10])}")
+            sys.exit(1)
+        print(f"Parity OK — {len(logs)} days identical to compute_reward")
+
+    if args.bench:
+        started = time.perf_counter()
+        cols = LogColumns.from_logs(logs)
+        encoded = time.perf_counter()
+        variants = [
+            replace(DEFAULT_PARAMS, theta_weight=0.05 + 0.2 * i / args.bench) for i in range(args.bench)
+        ]
+        scores = score_many(cols, variants)
+        done = time.perf_counter()
+        print(f"Encoded {cols.n} days in {encoded - started:.3f}s; "
+              f"scored {scores.size:,} (variant, day) pairs in {done - encoded:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
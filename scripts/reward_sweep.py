@@ -0,0 +1,237 @@
+"""
+Reward Parameter Sweep
+======================
+Evaluates many variants of the reward constants against a local snapshot of
+daily logs, offline. The snapshot is loaded and encoded once; parameter sets
+are sharded across a process pool and scored with the batch engine
+(reward_batch.py), so a sweep scales with core count.
+
+Parameters are addressed as RewardParams fields, with a key or index for
+maps and tuples:
+    theta_weight                 fragmentation_weight
+    ge_exponents.0 (sleep) .1 (training) .2 (body) .3 (nervous system)
+    training_score.<type>        body_felt_score.<state>
+    ns_gate.<state>              ns_energy_score.<state>
+
+Usage:
+    # Full grid over explicit values / ranges (lo:hi:steps)
+    python scripts/reward_sweep.py logs.jsonl --param theta_weight=0.05:0.3:6 --param ge_exponents.0=0.25,0.35,0.45
+
+    # Random sample over every knob, ±50% around today's values
+    python scripts/reward_sweep.py logs.jsonl --samples 2000
+
+The logs argument is a JSONL of daily logs, `backfill_daily_logs.py --dry-run`
+output, or a local mirror from snapshot_store.py (e.g. .snapshots/<uid>/daily_logs).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from reward_batch import DEFAULT_PARAMS, LogColumns, RewardParams, load_logs, score_batch
+
+
+# ─── Parameter Space ─────────────────────────────────────────────────────
+
+def default_knobs(params: RewardParams = DEFAULT_PARAMS) -> Dict[str, float]:
+    """Every tunable scalar in RewardParams, by sweep name, at its current value."""
+    knobs = {
+        "theta_weight": params.theta_weight,
+        "fragmentation_weight": params.fragmentation_weight,
+    }
+    for i, exponent in enumerate(params.ge_exponents):
+        knobs[f"ge_exponents.{i}"] = exponent
+    for name in ("training_score", "body_felt_score", "ns_gate", "ns_energy_score"):
+        for key, value in getattr(params, name).items():
+            knobs[f"{name}.{key}"] = value
+    return knobs
+
+
+def apply_overrides(base: RewardParams, overrides: Dict[str, float]) -> RewardParams:
+    """Return `base` with sweep-named values replaced."""
+    changes = {}
+    for name, value in overrides.items():
+        field_name, _, key = name.partition(".")
+        if not hasattr(base, field_name):
+            raise ValueError(f"Unknown reward parameter: {name}")
+        current = changes.get(field_name, getattr(base, field_name))
+        if not key:
+            changes[field_name] = value
+        elif isinstance(current, tuple):
+            items = list(current)
+            items[int(key)] = value
+            changes[field_name] = tuple(items)
+        else:
+            changes[field_name] = {**current, key: value}
+    return replace(base, **changes)
+
+
+def parse_param(spec: str) -> Tuple[str, List[float]]:
+    """'name=lo:hi:steps' or 'name=v1,v2,...' → (name, values)."""
+    name, _, values = spec.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"Expected name=values, got {spec!r}")
+    if ":" in values:
+        lo, hi, steps = values.split(":")
+        return name, np.linspace(float(lo), float(hi), int(steps)).tolist()
+    return name, [float(v) for v in values.split(",")]
+
+
+def grid(space: Dict[str, List[float]]) -> List[Dict[str, float]]:
+    names = list(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(space[n] for n in names))]
+
+
+def random_sample(space: Dict[str, List[float]], n: int, seed: int) -> List[Dict[str, float]]:
+    """Uniform draws between each parameter's min and max value."""
+    rng = random.Random(seed)
+    bounds = {name: (min(values), max(values)) for name, values in space.items()}
+    return [{name: rng.uniform(lo, hi) for name, (lo, hi) in bounds.items()} for _ in range(n)]
+
+
+# ─── Parallel Evaluation ─────────────────────────────────────────────────
+
+_COLUMNS = None  # per-worker copy of the encoded snapshot
+
+
+def _init_worker(columns: LogColumns) -> None:
+    global _COLUMNS
+    _COLUMNS = columns
+
+
+def _summarize(scores: np.ndarray) -> Dict[str, float]:
+    p10, p50, p90 = np.percentile(scores, [10, 50, 90]) if scores.size else (0.0, 0.0, 0.0)
+    return {
+        "mean": float(scores.mean()) if scores.size else 0.0,
+        "std": float(scores.std()) if scores.size else 0.0,
+        "p10": float(p10), "p50": float(p50), "p90": float(p90),
+    }
+
+
+def _score_shard(shard: Sequence[Tuple[int, Dict[str, float]]]) -> List[Tuple[int, Dict[str, float]]]:
+    return [
+        (i, _summarize(score_batch(_COLUMNS, apply_overrides(DEFAULT_PARAMS, overrides)).score))
+        for i, overrides in shard
+    ]
+
+
+def evaluate(columns: LogColumns, param_sets: List[Dict[str, float]], workers: int) -> List[Dict[str, float]]:
+    """Score every parameter set on a process pool; returns summaries in input order."""
+    indexed = list(enumerate(param_sets))
+    # A few shards per worker keeps cores busy when shard costs vary
+    n_shards = max(1, min(len(indexed), workers * 4))
+    shards = [indexed[i::n_shards] for i in range(n_shards)]
+
+    results = [None] * len(param_sets)
+    if workers <= 1:
+        _init_worker(columns)
+        for shard in shards:
+            for i, summary in _score_shard(shard):
+                results[i] = summary
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(columns,)) as pool:
+        for shard_results in pool.map(_score_shard, shards):
+            for i, summary in shard_results:
+                results[i] = summary
+    return results
+
+
+def sensitivities(param_sets: List[Dict[str, float]], summaries: List[Dict[str, float]]) -> Dict[str, float]:
+    """Change in mean g* across each parameter's swept range.
+
+    A least-squares slope of mean g* on the parameter (marginal over the
+    others), scaled by the range swept — comparable across parameters with
+    different units.
+    """
+    means = np.array([s["mean"] for s in summaries])
+    out = {}
+    for name in param_sets[0] if param_sets else []:
+        x = np.array([p[name] for p in param_sets])
+        span = x.max() - x.min()
+        if span == 0:
+            continue
+        slope = np.polyfit(x, means, 1)[0]
+        out[name] = float(slope * span)
+    return out
+
+
+# ─── CLI ─────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep reward parameters over a local snapshot of daily logs")
+    parser.add_argument("logs", help="JSONL file of daily logs, backfill --dry-run output, "
+                                     "or a snapshot_store daily_logs directory")
+    parser.add_argument("--param", action="append", type=parse_param, default=[],
+                        help="Parameter values: name=lo:hi:steps or name=v1,v2,... (repeatable)")
+    parser.add_argument("--samples", type=int,
+                        help="Draw N random parameter sets instead of the full grid")
+    parser.add_argument("--spread", type=float, default=0.5,
+                        help="Without --param, sweep every knob ±spread around its current value (default: 0.5)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for --samples (default: 0)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: all cores)")
+    parser.add_argument("--top", type=int, default=5, help="Parameter sets to show, by mean g* (default: 5)")
+    parser.add_argument("--out", help="Write every parameter set and its score summary to this JSONL file")
+    args = parser.parse_args()
+
+    logs = load_logs(args.logs)
+    if not logs:
+        print(f"No logs in {args.logs}")
+        sys.exit(1)
+    columns = LogColumns.from_logs(logs)
+    baseline = _summarize(score_batch(columns).score)
+
+    if args.param:
+        space = dict(args.param)
+    else:
+        space = {name: [value * (1 - args.spread), value * (1 + args.spread)]
+                 for name, value in default_knobs().items()}
+        args.samples = args.samples or 1000
+    try:
+        apply_overrides(DEFAULT_PARAMS, {name: values[0] for name, values in space.items()})
+    except (ValueError, IndexError) as e:
+        parser.error(str(e))
+
+    param_sets = random_sample(space, args.samples, args.seed) if args.samples else grid(space)
+
+    started = time.perf_counter()
+    summaries = evaluate(columns, param_sets, args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"Evaluated {len(param_sets):,} parameter sets × {columns.n:,} days "
+          f"in {elapsed:.2f}s on {args.workers} worker(s)")
+    print(f"\nBaseline g*: mean {baseline['mean']:.2f}  p10 {baseline['p10']:.1f}  "
+          f"p50 {baseline['p50']:.1f}  p90 {baseline['p90']:.1f}")
+
+    means = np.array([s["mean"] for s in summaries])
+    print(f"Sweep mean g*: min {means.min():.2f}  p50 {np.median(means):.2f}  max {means.max():.2f}")
+
+    print("\nSensitivity (Δ mean g* across swept range):")
+    for name, effect in sorted(sensitivities(param_sets, summaries).items(), key=lambda kv: -abs(kv[1])):
+        print(f"  {name:<32} {effect:+.3f}")
+
+    print(f"\nTop {args.top} by mean g*:")
+    for i in np.argsort(-means)[:args.top]:
+        s = summaries[i]
+        values = "  ".join(f"{k}={v:.3g}" for k, v in param_sets[i].items())
+        print(f"  mean {s['mean']:.2f}  p10 {s['p10']:.1f}  p90 {s['p90']:.1f}  | {values}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            for params, summary in zip(param_sets, summaries):
+                f.write(json.dumps({"params": params, **summary}) + "\n")
+        print(f"\nWrote {len(param_sets):,} results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
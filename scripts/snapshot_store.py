@@ -0,0 +1,286 @@
+"""
+Local Snapshot Store
+====================
+Mirrors users/{uid}/garmin_metrics and users/{uid}/daily_logs into compact
+columnar files on disk, so backfills, reward sweeps and dashboards can read
+years of history locally instead of one Firestore document at a time.
+
+Layout (one directory per collection):
+    .snapshots/<uid>/<collection>/
+        manifest.json    row count, columns, sync watermark, last reconcile
+        date.npy         sorted YYYY-MM-DD keys
+        <field>.npy      float64 column per numeric/bool field (NaN = missing)
+        docs.bin         every document as JSON, back to back
+        offsets.npy      byte offsets of each document in docs.bin
+
+Everything is memory-mapped on read — no parsing until a column or document
+is touched. Syncs are incremental: only documents whose syncedAt (Garmin) or
+updatedAt (daily logs) is at or past the stored watermark are fetched.
+
+A watermark query never sees a deleted document, so once every
+RECONCILE_DAYS (or with --full) a sync also lists the collection's document
+IDs, fields excluded, and drops rows Firestore no longer has.
+
+Usage:
+    python scripts/snapshot_store.py sync            # both collections
+    python scripts/snapshot_store.py sync --collection daily_logs
+    python scripts/snapshot_store.py sync --full     # reconcile deletions now
+    python scripts/snapshot_store.py info
+"""
+
+import os
+import sys
+import json
+import shutil
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_ROOT = Path(__file__).parent / ".snapshots"
+
+# Collection -> server timestamp field that moves whenever a document changes
+WATERMARK_FIELDS = {
+    "garmin_metrics": "syncedAt",
+    "daily_logs": "updatedAt",
+}
+
+# Days between the ID listings that catch documents deleted in Firestore
+RECONCILE_DAYS = 7
+
+
+def _json_default(value):
+    """Firestore timestamps (DatetimeWithNanoseconds) and sentinels → strings."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _is_numeric(value) -> bool:
+    return value is None or (isinstance(value, (int, float, bool)))
+
+
+# ─── Reading ──────────────────────────────────────────────────────────────
+
+class Table:
+    """Read-only, memory-mapped view of one mirrored collection."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        manifest_path = self.path / "manifest.json"
+        self.manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {
+            "rows": 0, "columns": [], "watermark": None,
+        }
+        self.rows = self.manifest["rows"]
+        self.columns = self.manifest["columns"]
+        self.watermark = self.manifest["watermark"]
+        if self.rows:
+            self.dates = np.load(self.path / "date.npy", mmap_mode="r")
+            self._offsets = np.load(self.path / "offsets.npy", mmap_mode="r")
+            self._docs = np.memmap(self.path / "docs.bin", dtype=np.uint8, mode="r")
+        else:
+            self.dates = np.empty(0, dtype="U10")
+            self._offsets = np.zeros(1, dtype=np.int64)
+            self._docs = np.empty(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str) -> np.ndarray:
+        """Float64 column for a numeric field, NaN where the document lacks it."""
+        if name not in self.columns:
+            raise KeyError(f"No column {name!r} in {self.path.name}; have {self.columns}")
+        return np.load(self.path / f"{name}.npy", mmap_mode="r")
+
+    def span(self, start: Optional[str] = None, end: Optional[str] = None) -> slice:
+        """Row slice covering start..end (inclusive YYYY-MM-DD bounds)."""
+        lo = int(np.searchsorted(self.dates, start, side="left")) if start else 0
+        hi = int(np.searchsorted(self.dates, end, side="right")) if end else self.rows
+        return slice(lo, hi)
+
+    def doc(self, i: int) -> dict:
+        return json.loads(self._docs[self._offsets[i]:self._offsets[i + 1]].tobytes())
+
+    def docs(self, rows: slice = slice(None)) -> List[dict]:
+        return [self.doc(i) for i in range(*rows.indices(self.rows))]
+
+    def index(self) -> Dict[str, dict]:
+        """{date: document} for every row — the shape prefetch_docs returns."""
+        return {str(d): self.doc(i) for i, d in enumerate(self.dates.tolist())}
+
+
+# ─── Writing ──────────────────────────────────────────────────────────────
+
+def write_table(path: Path, docs: Dict[str, dict], watermark: Optional[str],
+                reconciled_at: Optional[str] = None) -> None:
+    """Write {date: document} as a table, replacing any previous version atomically."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    dates = sorted(docs)
+    rows = [docs[d] for d in dates]
+    np.save(tmp / "date.npy", np.array(dates, dtype="U10"))
+
+    fields = sorted({k for row in rows for k in row})
+    columns = [f for f in fields if f != "date" and all(_is_numeric(row.get(f)) for row in rows)]
+    for name in columns:
+        values = [row.get(name) for row in rows]
+        np.save(tmp / f"{name}.npy", np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64))
+
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    with open(tmp / "docs.bin", "wb") as f:
+        for i, row in enumerate(rows):
+            encoded = json.dumps(row, default=_json_default, separators=(",", ":")).encode()
+            f.write(encoded)
+            offsets[i + 1] = offsets[i] + len(encoded)
+    np.save(tmp / "offsets.npy", offsets)
+
+    (tmp / "manifest.json").write_text(json.dumps({
+        "rows": len(rows),
+        "columns": columns,
+        "watermark": watermark,
+        "reconciledAt": reconciled_at,
+        "writtenAt": datetime.now(timezone.utc).isoformat(),
+    }, indent=2))
+
+    # Swap in the new version; readers holding old mmaps keep their files
+    old = path.with_name(path.name + ".old")
+    if path.exists():
+        if old.exists():
+            shutil.rmtree(old)
+        os.replace(path, old)
+    os.replace(tmp, path)
+    if old.exists():
+        shutil.rmtree(old)
+
+
+class SnapshotStore:
+    """Local mirror of one user's garmin_metrics and daily_logs."""
+
+    def __init__(self, uid: str, root: Path = DEFAULT_STORE_ROOT):
+        self.uid = uid
+        self.root = Path(root) / uid
+
+    def path(self, collection: str) -> Path:
+        return self.root / collection
+
+    def table(self, collection: str) -> Table:
+        return Table(self.path(collection))
+
+    def sync(self, db, collection: str, full: bool = False) -> int:
+        """Pull documents changed since the last sync and rewrite the table.
+
+        Returns the number of documents fetched. The first sync reads the whole
+        collection; later ones query on the watermark field with >= so a
+        document written in the same instant as the watermark isn't missed
+        (re-fetched rows simply replace themselves). When a reconcile is due,
+        or `full` is set, rows whose document is gone are dropped as well.
+        """
+        field = WATERMARK_FIELDS[collection]
+        current = self.table(collection)
+        docs = current.index()
+        now = datetime.now(timezone.utc)
+        reconciled_at = current.manifest.get("reconciledAt")
+        reconcile = full or not reconciled_at or (
+            now - datetime.fromisoformat(reconciled_at) >= timedelta(days=RECONCILE_DAYS))
+
+        ref = db.collection("users").document(self.uid).collection(collection)
+        removed = 0
+        if reconcile and docs:
+            live = {snap.id for snap in ref.select([]).stream()}
+            for date_str in [d for d in docs if d not in live]:
+                del docs[date_str]
+                removed += 1
+        if reconcile:
+            reconciled_at = now.isoformat()
+
+        query = ref
+        if current.watermark:
+            query = query.where(field, ">=", datetime.fromisoformat(current.watermark))
+
+        watermark = current.watermark
+        fetched = 0
+        for snap in query.stream():
+            data = snap.to_dict()
+            docs[snap.id] = data
+            fetched += 1
+            stamp = data.get(field)
+            if isinstance(stamp, datetime):
+                stamp = stamp.isoformat()
+                if watermark is None or stamp > watermark:
+                    watermark = stamp
+
+        del current  # release mmaps before the files are swapped
+        if fetched or reconcile:
+            write_table(self.path(collection), docs, watermark, reconciled_at)
+        logger.info(f"{collection}: {fetched} changed docs, {removed} deleted, {len(docs)} rows, "
+                    f"watermark {watermark}")
+        return fetched
+
+
+# ─── CLI ──────────────────────────────────────────────────────────────────
+
+def _firestore_client():
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    key_path = Path(__file__).parent / "firebase-service-account.json"
+    if not key_path.exists():
+        logger.error(f"Firebase service account key not found at {key_path}")
+        sys.exit(1)
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(str(key_path)))
+    return firestore.client()
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv(Path(__file__).parent / ".env")
+
+    parser = argparse.ArgumentParser(description="Mirror Firestore history into a local columnar store")
+    parser.add_argument("command", choices=["sync", "info"])
+    parser.add_argument("--collection", action="append", choices=sorted(WATERMARK_FIELDS),
+                        help="Collection to sync (repeatable). Default: all")
+    parser.add_argument("--uid", help="Firebase user ID. Falls back to FIREBASE_UID env var.")
+    parser.add_argument("--full", action="store_true",
+                        help=f"Reconcile deletions now instead of every {RECONCILE_DAYS} days")
+    parser.add_argument("--root", default=str(DEFAULT_STORE_ROOT),
+                        help="Store directory. Default: scripts/.snapshots")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%H:%M:%S",
+    )
+
+    uid = args.uid or os.environ.get("FIREBASE_UID")
+    if not uid:
+        logger.error("Firebase UID required. Pass --uid or set FIREBASE_UID in .env")
+        sys.exit(1)
+
+    store = SnapshotStore(uid, args.root)
+    collections: Iterable[str] = args.collection or sorted(WATERMARK_FIELDS)
+
+    if args.command == "sync":
+        db = _firestore_client()
+        for collection in collections:
+            store.sync(db, collection, full=args.full)
+
+    for collection in collections:
+        table = store.table(collection)
+        first, last = (table.dates[0], table.dates[-1]) if len(table) else ("—", "—")
+        print(f"{collection}: {len(table)} days ({first} → {last}), "
+              f"{len(table.columns)} columns, watermark {table.watermark}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The scripts are run directly, not installed; import them as top-level modules.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,118 @@
+"""Parity between the vectorized reward_batch engine and scalar reward.compute_reward.
+
+Synthetic logs cover missing and null fields, saturated components, every
+training type and nervous-system state (known and unknown), and pillars that
+sit exactly on and just past the theta window edge.
+"""
+
+import random
+from dataclasses import replace
+from datetime import date, timedelta
+
+import pytest
+
+import reward
+from reward_batch import DEFAULT_PARAMS, LogColumns, check_parity, score_batch
+
+TRAINING = [*reward.TRAINING_SCORE, "climbing"]
+NS_STATES = [*reward.NERVOUS_SYSTEM_GATE, "frozen"]
+BODY = [*reward.BODY_FELT_SCORE, "numb"]
+PILLARS = ["body", "mind", "craft", "people", "money"]
+WINDOW = reward.RewardWindow().size   # logs before the current one that theta counts
+
+
+def day(i):
+    return (date(2026, 1, 1) + timedelta(days=i)).isoformat()
+
+
+def random_log(rng, i):
+    log = {"date": day(i)}
+    fields = {
+        "sleepHours": lambda: rng.choice([None, 0, 3.25, 7.5, 9.0]),
+        "trainingTypes": lambda: rng.choice([None, [], rng.sample(TRAINING, rng.randint(1, 3))]),
+        "trainingType": lambda: rng.choice([None, *TRAINING]),
+        "bodyFelt": lambda: rng.choice(BODY),
+        "nervousSystemState": lambda: rng.choice(NS_STATES),
+        "problems": lambda: rng.choice([None, [{"problem": "x"}] * rng.randint(0, 5) + [{"problem": "  "}, {}]]),
+        "problemSelected": lambda: rng.choice([None, "", " ", "ship it"]),
+        "whatShipped": lambda: rng.choice([None, "", "release"]),
+        "publicIteration": lambda: rng.choice([None, False, True]),
+        "focusHoursActual": lambda: rng.choice([None, 0, 2.5, 6, 11]),
+        "speedOverPerfection": lambda: rng.choice([None, True]),
+        "daysSinceLastOutput": lambda: rng.choice([None, 0, 1, 2, 3, 40]),
+        "revenueAsksCount": lambda: rng.choice([None, 0, 1, 2, 7]),
+        "revenueThisSession": lambda: rng.choice([None, 0, 120]),
+        "feedbackLoopClosed": lambda: rng.choice([None, True]),
+        "revenueStreamType": lambda: rng.choice(["one_time", "recurring", "organic", "grant"]),
+        "spineProject": lambda: rng.choice([None, "", "Armstrong", "manifold"]),
+        "pillarsTouched": lambda: rng.choice([None, [], rng.sample(PILLARS, rng.randint(1, 3))]),
+    }
+    for name, value in fields.items():
+        if rng.random() < 0.8:               # otherwise the key is missing altogether
+            log[name] = value()
+    return log
+
+
+def saturated_log(i):
+    return {
+        "date": day(i), "sleepHours": 10, "trainingTypes": ["strength", "vo2"], "bodyFelt": "open",
+        "problems": [{"problem": p} for p in "abcd"], "problemSelected": "a",
+        "whatShipped": "v2", "publicIteration": True, "focusHoursActual": 9, "speedOverPerfection": True,
+        "daysSinceLastOutput": 0, "revenueAsksCount": 5, "revenueThisSession": 500,
+        "feedbackLoopClosed": True, "revenueStreamType": "recurring", "pillarsTouched": PILLARS,
+    }
+
+
+def theta_edge_logs(start):
+    """Pillars exactly WINDOW and WINDOW + 1 days back from the last log."""
+    logs = [{"date": day(start + i)} for i in range(WINDOW + 2)]
+    logs[0]["pillarsTouched"] = ["body"]        # falls out of the last log's window
+    logs[1]["pillarsTouched"] = ["mind"]        # the oldest log still inside it
+    logs[-1]["pillarsTouched"] = ["craft"]
+    return logs
+
+
+def synthetic_logs(n=400, seed=7):
+    rng = random.Random(seed)
+    logs = [random_log(rng, i) for i in range(n)]
+    logs += [saturated_log(n), {"date": day(n + 1)}]
+    logs += theta_edge_logs(n + 2)
+    return logs
+
+
+VARIANTS = {
+    "defaults": DEFAULT_PARAMS,
+    "weights": replace(DEFAULT_PARAMS, theta_weight=0.35, fragmentation_weight=0.05),
+    "exponents": replace(DEFAULT_PARAMS, ge_exponents=(0.1, 0.4, 0.15, 0.35)),
+    "tables": replace(
+        DEFAULT_PARAMS,
+        training_score={**DEFAULT_PARAMS.training_score, "yoga": 1.0, "rest": 0.05},
+        body_felt_score={**DEFAULT_PARAMS.body_felt_score, "tense": 0.45},
+        ns_energy_score={**DEFAULT_PARAMS.ns_energy_score, "spiked": 0.0},
+        ns_gate={**DEFAULT_PARAMS.ns_gate, "slightly_spiked": 0.85, "spiked": 0.1},
+    ),
+}
+
+
+@pytest.mark.parametrize("params", VARIANTS.values(), ids=VARIANTS.keys())
+def test_batch_engine_matches_scalar_reward_bit_for_bit(params):
+    assert check_parity(synthetic_logs(), params) == []
+
+
+def test_theta_window_edges_are_covered():
+    logs = theta_edge_logs(0)
+    window = reward.RewardWindow()
+    for log in logs[:-1]:
+        window.push(log)
+    assert window.theta(logs[-1]) == 0.67                          # "body" aged out, "mind" did not
+    assert score_batch(LogColumns.from_logs(logs)).theta[-1] == 0.67
+
+
+def test_parity_check_leaves_reward_constants_untouched():
+    check_parity(synthetic_logs(n=20), VARIANTS["tables"])
+    assert reward.TRAINING_SCORE["yoga"] == 0.8 and reward.THETA_WEIGHT == 0.15
+
+
+def test_a_variant_of_a_hard_coded_default_is_rejected():
+    with pytest.raises(ValueError, match="training_default"):
+        check_parity(synthetic_logs(n=5), replace(DEFAULT_PARAMS, training_default=0.3))